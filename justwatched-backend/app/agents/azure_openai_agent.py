@@ -1,9 +1,26 @@
 import os
-import requests
 import json
 import re
+import time
+import asyncio
+import httpx
 import demjson3
 from app.core.config import settings
+from app.core.deadline import check_deadline, deadline_allows, run_within_deadline
+from app.core.http_clients import get_llm_client, get_llm_sync_client, deadline_timeout
+from app.core.resilience import RetryBudget
+from app.core.single_flight import SingleFlight
+from app.agents import llm_metrics
+from app.agents.llm_cache import llm_cache
+from app.agents.llm_limiter import llm_limiter
+from app.agents.output_schemas import TasteProfileBatchOutput, output_model_for, response_format, salvage_output, validate_output
+from app.agents.prompt_compaction import summarize_reviews
+from app.agents.prompts import TASTE_PROFILE, TASTE_PROFILE_BATCH, MOODBOARD
+
+llm_flight = SingleFlight("llm", lock_ttl=settings.LLM_SINGLE_FLIGHT_LOCK_TTL)
+PARSE_FAILED = "JSON parsing failed"
+# Shared by every AzureOpenAIAgent instance in the process; set once the deployment rejects json_schema
+_structured_outputs_rejected = False
 
 class AzureOpenAIAgent:
     def __init__(self):
@@ -38,46 +55,303 @@ class AzureOpenAIAgent:
             return json_str
         return s  # fallback
 
-    def chat(self, messages, temperature=0.8, max_tokens=4000):
-        url = f"{self.endpoint}/openai/deployments/{self.deployment}/chat/completions?api-version={self.api_version}"
-        headers = {
-            "api-key": self.api_key,
-            "Content-Type": "application/json"
-        }
-        data = {
+    def chat(self, messages, temperature=0.8, max_tokens=4000, task_type="default", use_cache=True, priority="on_demand", user_id=None, output_model=None):
+        """Blocking chat completion, for sync callers such as Celery tasks."""
+        use_cache = use_cache and settings.LLM_CACHE_ENABLED
+        output_model = output_model_for(task_type, output_model)
+        key = self._cache_key(messages, temperature, max_tokens, output_model)
+        if use_cache:
+            cached = llm_cache.get(key)
+            if cached is not None:
+                llm_metrics.observe_cache_hit(task_type)
+                return cached
+        # Identical concurrent prompts share one completion
+        return llm_flight.do_sync(
+            key,
+            lambda: self._chat_uncoalesced(messages, temperature, max_tokens, key, task_type, use_cache, priority, user_id, output_model),
+            distributed=settings.SINGLE_FLIGHT_DISTRIBUTED
+        )
+
+    async def achat(self, messages, temperature=0.8, max_tokens=4000, task_type="default", use_cache=True, priority="on_demand", user_id=None, output_model=None):
+        """Non-blocking chat completion, for async callers (FastAPI handlers, async services)."""
+        use_cache = use_cache and settings.LLM_CACHE_ENABLED
+        output_model = output_model_for(task_type, output_model)
+        key = self._cache_key(messages, temperature, max_tokens, output_model)
+        if use_cache:
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                llm_metrics.observe_cache_hit(task_type)
+                return cached
+        return await llm_flight.do(
+            key,
+            lambda: self._achat_uncoalesced(messages, temperature, max_tokens, key, task_type, use_cache, priority, user_id, output_model),
+            distributed=settings.SINGLE_FLIGHT_DISTRIBUTED
+        )
+
+    async def achat_stream(self, messages, temperature=0.8, max_tokens=4000, task_type="default", use_cache=True, priority="interactive", user_id=None, output_model=None):
+        """
+        Stream completion text as the model generates it (Azure server-sent events).
+        A cached response is replayed as a single chunk; a completed stream is cached like achat().
+        """
+        use_cache = use_cache and settings.LLM_CACHE_ENABLED
+        output_model = output_model_for(task_type, output_model)
+        key = self._cache_key(messages, temperature, max_tokens, output_model)
+        if use_cache:
+            cached = await llm_cache.aget(key)
+            if cached is not None:
+                llm_metrics.observe_cache_hit(task_type)
+                yield json.dumps(cached, ensure_ascii=False)
+                return
+
+        body = self._request_body(messages, temperature, max_tokens, output_model)
+        body["stream"] = True
+        body["stream_options"] = {"include_usage": True}
+        parts, usage, ok = [], None, False
+        lease = await llm_limiter.acquire(messages, max_tokens, priority, user_id)
+        started = time.monotonic()
+        try:
+            check_deadline("LLM stream")
+            client = get_llm_client()
+            while True:
+                async with client.stream("POST", self._completions_url(), json=body, timeout=deadline_timeout(client)) as response:
+                    if response.status_code == 400:
+                        await response.aread()
+                        fallback_body = self._json_object_fallback(body, response.status_code, response.text)
+                        if fallback_body is not None:
+                            body = fallback_body
+                            continue
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        # Text already yielded stays with the caller; the rest of the stream is abandoned
+                        check_deadline("the rest of the LLM stream")
+                        if not line.startswith("data:"):
+                            continue
+                        payload = line[len("data:"):].strip()
+                        if payload == "[DONE]":
+                            break
+                        event = json.loads(payload)
+                        usage = event.get("usage") or usage
+                        for choice in event.get("choices", []):
+                            delta = (choice.get("delta") or {}).get("content")
+                            if delta:
+                                parts.append(delta)
+                                yield delta
+                break
+            ok = True
+        finally:
+            await llm_limiter.arelease(lease, usage)
+            llm_metrics.observe_call(task_type, "stream", time.monotonic() - started, usage, ok)
+
+        result = self._parse_content("".join(parts), task_type, output_model)
+        if use_cache and not self._is_fallback(result):
+            await llm_cache.aset(key, result, usage, task_type)
+
+    def _completions_url(self):
+        return f"{self.endpoint}/openai/deployments/{self.deployment}/chat/completions?api-version={self.api_version}"
+
+    @staticmethod
+    def _structured(output_model):
+        return output_model is not None and settings.LLM_STRUCTURED_OUTPUTS and not _structured_outputs_rejected
+
+    @staticmethod
+    def _json_object_fallback(body, status_code, error_text):
+        """
+        The body to resend with a json_object response_format when the deployment rejected json_schema
+        (a 400 naming it), otherwise None. After the first rejection the process stops asking for json_schema.
+        """
+        global _structured_outputs_rejected
+        if status_code != 400 or (body.get("response_format") or {}).get("type") != "json_schema":
+            return None
+        if "response_format" not in error_text and "json_schema" not in error_text:
+            return None
+        if not _structured_outputs_rejected:
+            print(f"[AzureOpenAIAgent] Deployment rejected json_schema output, falling back to json_object: {error_text[:300]}")
+            _structured_outputs_rejected = True
+        return {**body, "response_format": {"type": "json_object"}}
+
+    def _cache_key(self, messages, temperature, max_tokens, output_model):
+        # A schema-constrained request is a different request from a json_object one
+        schema = output_model.__name__ if self._structured(output_model) else None
+        return llm_cache.make_key(self.deployment, messages, temperature, max_tokens, schema)
+
+    def _request_body(self, messages, temperature, max_tokens, output_model=None):
+        return {
             "messages": messages,
             "temperature": temperature,
             "max_tokens": max_tokens,
-            "response_format": {"type": "json_object"}
+            "response_format": response_format(output_model) if self._structured(output_model) else {"type": "json_object"}
         }
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        content = response.json()["choices"][0]["message"]["content"].strip()
+
+    def _retry_budget(self):
+        return RetryBudget(
+            max_retries=settings.LLM_MAX_RETRIES,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_RETRY_MAX_DELAY,
+            max_delay_total=settings.LLM_RETRY_BUDGET_SECONDS,
+        )
+
+    @staticmethod
+    def _retry_reason(response, error):
+        """Why an attempt should be retried (429, 5xx, transport), or None if its response is final."""
+        if error is not None:
+            return "transport"
+        if response.status_code == 429:
+            return "429"
+        return "5xx" if response.status_code >= 500 else None
+
+    def _post_completion(self, body, task_type):
+        """POST a completion, retrying 429s, 5xx and transport errors within the retry budget and request deadline."""
+        budget = self._retry_budget()
+        while True:
+            check_deadline("LLM completion")
+            client = get_llm_sync_client()
+            response, error = None, None
+            try:
+                response = client.post(self._completions_url(), json=body, timeout=deadline_timeout(client))
+            except httpx.TimeoutException as e:
+                check_deadline("LLM completion")
+                error = e
+            except httpx.TransportError as e:
+                error = e
+            if response is not None:
+                fallback_body = self._json_object_fallback(body, response.status_code, response.text)
+                if fallback_body is not None:
+                    body = fallback_body
+                    continue
+            reason = self._retry_reason(response, error)
+            delay = budget.next_delay(response.headers.get("retry-after") if response is not None else None) if reason else None
+            if delay is None or not deadline_allows(delay):
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+                return response.json()
+            llm_metrics.observe_retry(task_type, reason)
+            time.sleep(delay)
+
+    async def _apost_completion(self, body, task_type):
+        """Async variant of _post_completion()."""
+        budget = self._retry_budget()
+        while True:
+            check_deadline("LLM completion")
+            response, error = None, None
+            try:
+                response = await run_within_deadline(get_llm_client().post(self._completions_url(), json=body), "LLM completion")
+            except httpx.TransportError as e:
+                error = e
+            if response is not None:
+                fallback_body = self._json_object_fallback(body, response.status_code, response.text)
+                if fallback_body is not None:
+                    body = fallback_body
+                    continue
+            reason = self._retry_reason(response, error)
+            delay = budget.next_delay(response.headers.get("retry-after") if response is not None else None) if reason else None
+            if delay is None or not deadline_allows(delay):
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+                return response.json()
+            llm_metrics.observe_retry(task_type, reason)
+            await asyncio.sleep(delay)
+
+    def _chat_uncoalesced(self, messages, temperature, max_tokens, key, task_type, use_cache, priority, user_id, output_model):
+        lease = llm_limiter.acquire_sync(messages, max_tokens, priority, user_id)
+        completion = None
+        started = time.monotonic()
+        try:
+            completion = self._post_completion(self._request_body(messages, temperature, max_tokens, output_model), task_type)
+        finally:
+            usage = (completion or {}).get("usage")
+            llm_limiter.release(lease, usage)
+            llm_metrics.observe_call(task_type, "sync", time.monotonic() - started, usage, completion is not None)
+        return self._handle_completion(completion, key, task_type, use_cache, output_model)
+
+    async def _achat_uncoalesced(self, messages, temperature, max_tokens, key, task_type, use_cache, priority, user_id, output_model):
+        lease = await llm_limiter.acquire(messages, max_tokens, priority, user_id)
+        completion = None
+        started = time.monotonic()
+        try:
+            completion = await self._apost_completion(self._request_body(messages, temperature, max_tokens, output_model), task_type)
+        finally:
+            usage = (completion or {}).get("usage")
+            await llm_limiter.arelease(lease, usage)
+            llm_metrics.observe_call(task_type, "async", time.monotonic() - started, usage, completion is not None)
+        return await self._ahandle_completion(completion, key, task_type, use_cache, output_model)
+
+    def _completion_result(self, completion, task_type, output_model=None):
+        choice = completion["choices"][0]
+        if choice.get("finish_reason") == "length":
+            print(f"[AzureOpenAIAgent] {task_type} completion hit max_tokens, salvaging complete items")
+        return self._parse_content(choice["message"]["content"], task_type, output_model)
+
+    def _handle_completion(self, completion, key, task_type, use_cache, output_model=None):
+        result = self._completion_result(completion, task_type, output_model)
+        # A failed parse is not cached, so the next identical request gets a fresh generation
+        if use_cache and not self._is_fallback(result):
+            llm_cache.set(key, result, completion.get("usage"), task_type)
+        return result
+
+    async def _ahandle_completion(self, completion, key, task_type, use_cache, output_model=None):
+        result = self._completion_result(completion, task_type, output_model)
+        if use_cache and not self._is_fallback(result):
+            await llm_cache.aset(key, result, completion.get("usage"), task_type)
+        return result
+
+    @staticmethod
+    def _is_fallback(result):
+        return isinstance(result, dict) and result.get("error") == PARSE_FAILED
+
+    def _decode_content(self, content):
+        """Parse completion text as JSON, tolerating fences and chatter; returns (data, parse path) or (None, None)."""
         # Try parsing the whole output first
         try:
-            return json.loads(content)
+            return json.loads(content), "json"
         except Exception as e:
             print("[AzureOpenAIAgent] json.loads() failed:", e)
-            # Try extracting JSON block
-            json_str = self.extract_json_from_string(content)
-            try:
-                return json.loads(json_str)
-            except Exception as e2:
-                print("[AzureOpenAIAgent] extract_json_from_string failed:", e2)
-                # Try tolerant parsing
-                try:
-                    return demjson3.decode(json_str)
-                except Exception as e3:
-                    print("[AzureOpenAIAgent] LLM raw output (for debugging):\n", content)
-                    print("[AzureOpenAIAgent] All JSON parsing failed, returning fallback")
-                    # Return a fallback response to prevent task failure
-                    return {
-                        "recommendations": [],
-                        "generated_at": "2025-07-08T11:36:00.000000",
-                        "error": "JSON parsing failed"
-                    }
-
-    async def analyze_taste_profile(self, user_id: str, reviews: list) -> dict:
+        # Try extracting JSON block
+        json_str = self.extract_json_from_string(content)
+        try:
+            return json.loads(json_str), "extracted"
+        except Exception as e2:
+            print("[AzureOpenAIAgent] extract_json_from_string failed:", e2)
+        # Try tolerant parsing
+        try:
+            return demjson3.decode(json_str), "demjson"
+        except Exception:
+            return None, None
+
+    def _parse_content(self, content, task_type="default", output_model=None):
+        """
+        Parse and, when the call has an output model, validate completion text. Invalid items of a list
+        output are dropped, and complete items are salvaged from output that was cut off mid-list.
+        """
+        content = content.strip()
+        data, path = self._decode_content(content)
+        if output_model is None and data is not None:
+            llm_metrics.observe_parse(task_type, path)
+            return data
+        if data is not None:
+            result, complete = validate_output(output_model, data)
+            if result is not None:
+                llm_metrics.observe_parse(task_type, path if complete else "partial")
+                return result
+            print(f"[AzureOpenAIAgent] {task_type} output failed {output_model.__name__} validation")
+        if output_model is not None:
+            result = salvage_output(output_model, content)
+            if result is not None:
+                print(f"[AzureOpenAIAgent] Salvaged {len(result[output_model.items_field])} items from incomplete {task_type} output")
+                llm_metrics.observe_parse(task_type, "salvaged")
+                return result
+        print("[AzureOpenAIAgent] LLM raw output (for debugging):\n", content)
+        print("[AzureOpenAIAgent] All JSON parsing failed, returning fallback")
+        llm_metrics.observe_parse(task_type, "fallback")
+        # Return a fallback response to prevent task failure
+        return {
+            "recommendations": [],
+            "generated_at": "2025-07-08T11:36:00.000000",
+            "error": PARSE_FAILED
+        }
+
+    async def analyze_taste_profile(self, user_id: str, reviews: list, priority: str = "on_demand") -> dict:
         """Analyze user reviews to generate a taste profile."""
         if not reviews:
             return {
@@ -98,29 +372,31 @@ class AzureOpenAIAgent:
             for review in reviews[:20]  # Limit to 20 most recent reviews
         ])
         
-        messages = [
-            {
-                "role": "system",
-                "content": """You are a film taste analyzer. Analyze the user's movie reviews and create a comprehensive taste profile. 
-                You must respond with valid JSON only. Return a JSON object with the following structure:
-                {
-                    "user_id": "string",
-                    "favorite_genres": ["list", "of", "genres"],
-                    "favorite_actors": ["list", "of", "actors"],
-                    "favorite_directors": ["list", "of", "directors"],
-                    "mood_preferences": ["list", "of", "moods"],
-                    "preferred_era": "modern|classic|mixed",
-                    "preferred_language": "english|foreign|mixed",
-                    "analysis_confidence": 0.85
-                }"""
-            },
-            {
-                "role": "user",
-                "content": f"Analyze these movie reviews for user {user_id}:\n\n{reviews_text}"
-            }
-        ]
+        messages = TASTE_PROFILE.messages(f"Analyze these movie reviews for user {user_id}:\n\n{reviews_text}")
         
-        return self.chat(messages, temperature=0.3)
+        profile = await self.achat(messages, temperature=0.3, task_type="taste_profile", priority=priority, user_id=user_id)
+        return {**profile, "user_id": user_id}
+
+    async def analyze_taste_profiles_batch(self, reviews_by_user: dict, priority: str = "scheduled") -> dict:
+        """Analyze several users' reviews in one request; returns {user_id: profile} for the profiles that parsed."""
+        users = list(reviews_by_user)
+        sections = "\n\n".join(
+            f"### U{index}\n{summarize_reviews(reviews_by_user[user_id], settings.TASTE_PROFILE_BATCH_REVIEW_CHARS)}"
+            for index, user_id in enumerate(users, start=1)
+        )
+        messages = TASTE_PROFILE_BATCH.messages(sections)
+        max_tokens = settings.TASTE_PROFILE_BATCH_TOKENS_PER_USER * len(users) + 200
+        result = await self.achat(messages, temperature=0.3, max_tokens=max_tokens, task_type="taste_profile", priority=priority, output_model=TasteProfileBatchOutput)
+
+        profiles = {}
+        for item in (result.get("profiles") if isinstance(result, dict) else None) or []:
+            if not isinstance(item, dict) or not isinstance(item.get("favorite_genres"), list):
+                continue
+            label = str(item.pop("u", "")).upper().lstrip("U")
+            if label.isdigit() and 1 <= int(label) <= len(users):
+                user_id = users[int(label) - 1]
+                profiles[user_id] = {**item, "user_id": user_id}
+        return profiles
 
     async def generate_moodboard(self, movie_id: int, movie_details: dict) -> dict:
         """Generate moodboard assets for a movie."""
@@ -129,35 +405,6 @@ class AzureOpenAIAgent:
         movie_info += f"Genres: {', '.join([g['name'] for g in movie_details.get('genres', [])])}\n"
         movie_info += f"Release Date: {movie_details.get('release_date', '')}"
         
-        messages = [
-            {
-                "role": "system",
-                "content": """You are a creative moodboard generator. Create a moodboard for the given movie.
-                Return ONLY a JSON object with the following structure:
-                {
-                    "movie_id": "integer",
-                    "color_palette": {
-                        "primary": "#hexcolor",
-                        "secondary": "#hexcolor",
-                        "accent": "#hexcolor"
-                    },
-                    "mood_keywords": ["list", "of", "moods"],
-                    "music_suggestions": [
-                        {
-                            "title": "string",
-                            "artist": "string",
-                            "genre": "string",
-                            "mood": "string"
-                        }
-                    ],
-                    "visual_elements": ["list", "of", "visual", "elements"],
-                    "atmosphere_description": "string"
-                }"""
-            },
-            {
-                "role": "user",
-                "content": f"Generate a moodboard for this movie:\n\n{movie_info}"
-            }
-        ]
+        messages = MOODBOARD.messages(f"Generate a moodboard for this movie:\n\n{movie_info}")
         
-        return self.chat(messages, temperature=0.8) 
\ No newline at end of file
+        return await self.achat(messages, temperature=0.8, task_type="moodboard") 
\ No newline at end of file
@@ -0,0 +1,60 @@
+import json
+from typing import Any, List
+
+class IncrementalArrayParser:
+    """
+    Incrementally scan streamed JSON text and return each element of a top-level array
+    (e.g. "recommendations") as soon as its closing brace arrives.
+    Text outside the top-level object (markdown fences, chatter) is ignored.
+    """
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key = None
+        self._array_depth = None
+        self._array_done = False
+        self._item_start = None
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add streamed text and return the array elements completed by it."""
+        self.text += chunk
+        items = []
+        text = self.text
+        while self._pos < len(text):
+            ch = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start + 1:self._pos]
+            elif ch == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif ch in "{[":
+                if ch == "[" and self._depth == 1 and self._last_key == self.array_key and not self._array_done:
+                    self._array_depth = self._depth + 1
+                elif ch == "{" and self._array_depth is not None and self._depth == self._array_depth:
+                    self._item_start = self._pos
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._item_start is not None and self._depth == self._array_depth:
+                    try:
+                        items.append(json.loads(text[self._item_start:self._pos + 1]))
+                    except ValueError:
+                        pass  # Malformed element; the rest of the array can still be used
+                    self._item_start = None
+                elif ch == "]" and self._array_depth is not None and self._depth == self._array_depth - 1:
+                    self._array_depth = None
+                    self._array_done = True
+            self._pos += 1
+        return items
@@ -0,0 +1,126 @@
+import re
+import json
+import time
+import zlib
+import hashlib
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.redis_client import redis_client, run_redis
+
+KEY_PREFIX = "llm:cache:"
+INDEX_KEY = "llm:cache:index"  # Sorted set of cached keys by store time, used to bound the entry count
+STATS_KEY = "llm:cache:stats"
+
+# TTL (seconds) per task type; unknown task types use "default"
+TASK_TTLS = {
+    "recommendations": settings.LLM_CACHE_TTL_RECOMMENDATIONS,
+    "group_recommendations": settings.LLM_CACHE_TTL_GROUP_RECOMMENDATIONS,
+    "taste_profile": settings.LLM_CACHE_TTL_TASTE_PROFILE,
+    "moodboard": settings.LLM_CACHE_TTL_MOODBOARD,
+    "default": settings.LLM_CACHE_TTL_DEFAULT,
+}
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of parsed LLM responses in Redis, shared by all processes.
+    Keys hash the deployment, sampling params and whitespace-normalized messages; values are zlib-compressed JSON.
+    """
+    def __init__(self, redis=redis_client):
+        self.redis = redis
+
+    @staticmethod
+    def make_key(deployment: str, messages: List[Dict[str, Any]], temperature: float, max_tokens: int, output_schema: Optional[str] = None) -> str:
+        """Canonical hash of a completion request; prompts differing only in whitespace share a key."""
+        normalized = [
+            {"role": m.get("role"), "content": re.sub(r"\s+", " ", str(m.get("content", ""))).strip()}
+            for m in messages
+        ]
+        parts = [deployment, normalized, temperature, max_tokens]
+        if output_schema:
+            parts.append(output_schema)
+        raw = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _incr(self, **counts: int) -> None:
+        try:
+            pipe = self.redis.pipeline()
+            for field, amount in counts.items():
+                pipe.hincrby(STATS_KEY, field, amount)
+            pipe.execute()
+        except Exception:
+            pass
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached parsed response, counting the hit (and the tokens it saved) or the miss."""
+        try:
+            raw = self.redis.get(KEY_PREFIX + key)
+        except Exception:
+            return None
+        if raw is None:
+            self._incr(misses=1)
+            return None
+        entry = json.loads(zlib.decompress(raw))
+        usage = entry.get("usage") or {}
+        self._incr(
+            hits=1,
+            prompt_tokens_saved=usage.get("prompt_tokens", 0),
+            completion_tokens_saved=usage.get("completion_tokens", 0),
+        )
+        return entry["result"]
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for async callers; the Redis round trips run off the event loop."""
+        return await run_redis(self.get, key)
+
+    def set(self, key: str, result: Any, usage: Optional[Dict[str, int]], task_type: str = "default") -> None:
+        """Store a parsed response; oversized entries are skipped and the oldest entries evicted past the limit."""
+        if isinstance(result, dict) and result.get("error"):
+            return  # Never cache the parse-failure fallback
+        entry = {"result": result, "usage": usage or {}, "cached_at": time.time()}
+        blob = zlib.compress(json.dumps(entry, separators=(",", ":")).encode("utf-8"))
+        if len(blob) > settings.LLM_CACHE_MAX_ENTRY_BYTES:
+            self._incr(skipped_too_large=1)
+            return
+        ttl = TASK_TTLS.get(task_type, TASK_TTLS["default"])
+        try:
+            pipe = self.redis.pipeline()
+            pipe.setex(KEY_PREFIX + key, ttl, blob)
+            pipe.zadd(INDEX_KEY, {key: time.time()})
+            pipe.hincrby(STATS_KEY, "stores", 1)
+            pipe.hincrby(STATS_KEY, "bytes_stored", len(blob))
+            pipe.execute()
+            self._evict_overflow()
+        except Exception as e:
+            print(f"Error caching LLM response: {e}")
+
+    async def aset(self, key: str, result: Any, usage: Optional[Dict[str, int]], task_type: str = "default") -> None:
+        """set() for async callers; the Redis round trips run off the event loop."""
+        await run_redis(self.set, key, result, usage, task_type)
+
+    def _evict_overflow(self) -> None:
+        overflow = self.redis.zcard(INDEX_KEY) - settings.LLM_CACHE_MAX_ENTRIES
+        if overflow <= 0:
+            return
+        # Entries that already expired are in the index too; deleting them again is harmless
+        oldest = [key for key, _ in self.redis.zpopmin(INDEX_KEY, overflow)]
+        if oldest:
+            keys = [KEY_PREFIX + (key.decode() if isinstance(key, bytes) else key) for key in oldest]
+            self.redis.delete(*keys)
+            self._incr(evictions=len(keys))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and tokens saved across all processes."""
+        try:
+            raw = self.redis.hgetall(STATS_KEY)
+            entries = self.redis.zcard(INDEX_KEY)
+        except Exception as e:
+            return {"error": str(e)}
+        stats = {(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()}
+        hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+        stats["entries"] = entries
+        stats["hit_rate"] = round(hits / (hits + misses), 4) if hits + misses else 0.0
+        stats["tokens_saved"] = stats.get("prompt_tokens_saved", 0) + stats.get("completion_tokens_saved", 0)
+        return stats
+
+# Shared by every AzureOpenAIAgent instance in the process
+llm_cache = LLMResponseCache()
@@ -0,0 +1,246 @@
+import time
+import uuid
+import random
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.redis_client import redis_client, run_redis
+from app.core.resilience import RateLimitTimeout
+from app.core.deadline import DeadlineExceeded, within_deadline
+from app.agents.prompt_compaction import estimate_messages_tokens
+
+LEASES_KEY = "llm:limiter:leases"  # Sorted set of in-flight calls, scored by lease expiry
+WAITING_KEY = "llm:limiter:waiting"  # Sorted set of "<rank>:<lease id>" waiters, scored by heartbeat expiry
+TPM_KEY_PREFIX = "llm:tpm"
+QUOTA_KEY_PREFIX = "llm:quota"
+
+# Lower rank = higher priority
+LANES = {"interactive": 0, "on_demand": 1, "scheduled": 2}
+
+# Take a concurrency slot unless a higher-priority caller is already waiting or the lane is at its cap.
+# Returns 1 when the lease was granted, 0 when the caller should wait and retry.
+_ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local rank = tonumber(ARGV[2])
+local waiter = ARGV[2] .. ':' .. ARGV[1]
+for _, member in ipairs(redis.call('ZRANGE', KEYS[2], 0, -1)) do
+    if tonumber(string.match(member, '^(%d+):')) < rank then
+        redis.call('ZADD', KEYS[2], now + tonumber(ARGV[5]), waiter)
+        return 0
+    end
+end
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), ARGV[1])
+    redis.call('ZREM', KEYS[2], waiter)
+    return 1
+end
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[5]), waiter)
+return 0
+"""
+
+# Reserve tokens in the current one-minute window. Returns {wait_ms, window}; wait_ms is 0 when reserved.
+# A request larger than the remaining allowance still goes through in an empty window.
+_TPM_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local window = math.floor(now / 60000)
+local key = KEYS[1] .. ':' .. window
+local used = tonumber(redis.call('GET', key) or '0')
+local cost = tonumber(ARGV[1])
+if used > 0 and used + cost > tonumber(ARGV[2]) then
+    return {60000 - now % 60000, window}
+end
+redis.call('INCRBY', key, cost)
+redis.call('EXPIRE', key, 120)
+return {0, window}
+"""
+
+class LLMQuotaExceeded(Exception):
+    """Raised when a user has used up their daily LLM token quota."""
+
+class LLMLease:
+    """One admitted LLM call: its concurrency slot and the tokens reserved for it."""
+    def __init__(self, lane: str, user_id: Optional[str], reserved_tokens: int):
+        self.id = uuid.uuid4().hex
+        self.lane = lane
+        self.user_id = user_id
+        self.reserved_tokens = reserved_tokens
+        self.window = None
+        self.holds_slot = False
+
+class LLMLimiter:
+    """
+    Cross-process admission control for Azure OpenAI calls, coordinated through Redis:
+    a concurrency semaphore with priority lanes (interactive > on_demand > scheduled),
+    tokens-per-minute accounting against the deployment limit, and per-user daily token quotas.
+    Fails open (admits the call) if Redis is unavailable.
+    """
+    def __init__(self, redis=redis_client):
+        self.redis = redis
+
+    @staticmethod
+    def lane_concurrency(lane: str) -> int:
+        """Concurrent calls a lane may have in flight; part of the pool is reserved for interactive calls."""
+        shared = max(1, settings.LLM_MAX_CONCURRENCY - settings.LLM_INTERACTIVE_RESERVED)
+        if lane == "interactive":
+            return settings.LLM_MAX_CONCURRENCY
+        if lane == "scheduled":
+            return min(shared, settings.LLM_SCHEDULED_MAX_CONCURRENCY)
+        return shared
+
+    @staticmethod
+    def lane_tpm(lane: str) -> int:
+        share = {
+            "interactive": 1.0,
+            "on_demand": settings.LLM_TPM_SHARE_ON_DEMAND,
+            "scheduled": settings.LLM_TPM_SHARE_SCHEDULED,
+        }[lane]
+        return int(settings.LLM_TOKENS_PER_MINUTE * share)
+
+    @staticmethod
+    def max_wait(lane: str) -> float:
+        return {
+            "interactive": settings.LLM_LIMITER_MAX_WAIT_INTERACTIVE,
+            "on_demand": settings.LLM_LIMITER_MAX_WAIT_ON_DEMAND,
+            "scheduled": settings.LLM_LIMITER_MAX_WAIT_SCHEDULED,
+        }[lane]
+
+    @staticmethod
+    def _quota_key(user_id: str) -> str:
+        return f"{QUOTA_KEY_PREFIX}:{user_id}:{datetime.utcnow().strftime('%Y%m%d')}"
+
+    def _new_lease(self, messages: List[Dict[str, Any]], max_tokens: int, lane: str, user_id: Optional[str]) -> LLMLease:
+        if lane not in LANES:
+            raise ValueError(f"Unknown LLM priority lane: {lane}")
+        lease = LLMLease(lane, user_id, estimate_messages_tokens(messages) + max_tokens)
+        quota = settings.LLM_USER_DAILY_TOKEN_QUOTA
+        if user_id and quota > 0:
+            try:
+                used = int(self.redis.get(self._quota_key(user_id)) or 0)
+            except Exception:
+                used = 0
+            if used >= quota:
+                raise LLMQuotaExceeded(f"User {user_id} has used their daily LLM quota ({used}/{quota} tokens)")
+        return lease
+
+    def _try_slot(self, lease: LLMLease) -> bool:
+        try:
+            granted = self.redis.eval(
+                _ACQUIRE_SCRIPT, 2, LEASES_KEY, WAITING_KEY, lease.id, LANES[lease.lane],
+                self.lane_concurrency(lease.lane), int(settings.LLM_LIMITER_LEASE_TTL * 1000),
+                int(settings.LLM_LIMITER_WAITER_TTL * 1000)
+            )
+        except Exception as e:
+            print(f"LLM limiter unavailable, admitting call: {e}")
+            return True
+        lease.holds_slot = bool(granted)
+        return lease.holds_slot
+
+    def _try_tpm(self, lease: LLMLease) -> float:
+        """Reserve the lease's tokens; returns 0, or seconds until the next window."""
+        try:
+            wait_ms, window = self.redis.eval(_TPM_SCRIPT, 1, TPM_KEY_PREFIX, lease.reserved_tokens, self.lane_tpm(lease.lane))
+        except Exception:
+            return 0.0
+        if int(wait_ms) == 0:
+            lease.window = int(window)
+        return int(wait_ms) / 1000
+
+    def _give_up(self, lease: LLMLease, waited: str, max_wait: float) -> Exception:
+        self.release(lease)
+        try:
+            self.redis.zrem(WAITING_KEY, f"{LANES[lease.lane]}:{lease.id}")
+        except Exception:
+            pass
+        if max_wait < self.max_wait(lease.lane):
+            return DeadlineExceeded(f"Request deadline passed while the LLM {lease.lane} call waited for {waited}")
+        return RateLimitTimeout(f"LLM {lease.lane} call waited over {max_wait}s for {waited}")
+
+    async def acquire(self, messages: List[Dict[str, Any]], max_tokens: int, lane: str = "on_demand", user_id: Optional[str] = None) -> LLMLease:
+        """
+        Wait for a concurrency slot and token allowance for one call (non-blocking for the event loop:
+        the Redis scripts run on the Redis thread pool).
+        """
+        lease = await run_redis(self._new_lease, messages, max_tokens, lane, user_id)
+        # Never wait past the request's own deadline
+        max_wait = within_deadline(self.max_wait(lane))
+        deadline = time.monotonic() + max_wait
+        while not await run_redis(self._try_slot, lease):
+            if time.monotonic() >= deadline:
+                raise await run_redis(self._give_up, lease, "a concurrency slot", max_wait)
+            await asyncio.sleep(settings.LLM_LIMITER_POLL_INTERVAL * random.uniform(0.5, 1.5))
+        while True:
+            wait = await run_redis(self._try_tpm, lease)
+            if wait <= 0:
+                return lease
+            if time.monotonic() + wait > deadline:
+                raise await run_redis(self._give_up, lease, "tokens-per-minute allowance", max_wait)
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, messages: List[Dict[str, Any]], max_tokens: int, lane: str = "on_demand", user_id: Optional[str] = None) -> LLMLease:
+        """Blocking variant of acquire() for sync callers."""
+        lease = self._new_lease(messages, max_tokens, lane, user_id)
+        # Never wait past the request's own deadline
+        max_wait = within_deadline(self.max_wait(lane))
+        deadline = time.monotonic() + max_wait
+        while not self._try_slot(lease):
+            if time.monotonic() >= deadline:
+                raise self._give_up(lease, "a concurrency slot", max_wait)
+            time.sleep(settings.LLM_LIMITER_POLL_INTERVAL * random.uniform(0.5, 1.5))
+        while True:
+            wait = self._try_tpm(lease)
+            if wait <= 0:
+                return lease
+            if time.monotonic() + wait > deadline:
+                raise self._give_up(lease, "tokens-per-minute allowance", max_wait)
+            time.sleep(wait)
+
+    def release(self, lease: LLMLease, usage: Optional[Dict[str, int]] = None) -> None:
+        """Free the slot and settle the token reservation against the actual usage."""
+        try:
+            pipe = self.redis.pipeline()
+            if lease.holds_slot:
+                pipe.zrem(LEASES_KEY, lease.id)
+            used = (usage or {}).get("total_tokens")
+            if lease.window is not None:
+                # Without usage (failed call) the reservation is refunded entirely
+                pipe.incrby(f"{TPM_KEY_PREFIX}:{lease.window}", (used or 0) - lease.reserved_tokens)
+            if lease.user_id and used:
+                quota_key = self._quota_key(lease.user_id)
+                pipe.incrby(quota_key, used)
+                pipe.expire(quota_key, 2 * 86400)
+            pipe.execute()
+        except Exception as e:
+            print(f"Error releasing LLM lease: {e}")
+        lease.holds_slot = False
+        lease.window = None
+
+    async def arelease(self, lease: LLMLease, usage: Optional[Dict[str, int]] = None) -> None:
+        """release() for async callers, run off the event loop."""
+        await run_redis(self.release, lease, usage)
+
+    def stats(self) -> Dict[str, Any]:
+        """In-flight calls, waiters per lane and tokens used this minute, across all processes."""
+        try:
+            now_ms = int(time.time() * 1000)
+            waiting = {lane: 0 for lane in LANES}
+            ranks = {rank: lane for lane, rank in LANES.items()}
+            for member in self.redis.zrangebyscore(WAITING_KEY, now_ms, "+inf"):
+                member = member.decode() if isinstance(member, bytes) else member
+                waiting[ranks.get(int(member.split(":", 1)[0]), "scheduled")] += 1
+            return {
+                "in_flight": self.redis.zcount(LEASES_KEY, now_ms, "+inf"),
+                "max_concurrency": settings.LLM_MAX_CONCURRENCY,
+                "waiting": waiting,
+                "tokens_this_minute": int(self.redis.get(f"{TPM_KEY_PREFIX}:{now_ms // 60000}") or 0),
+                "tokens_per_minute": settings.LLM_TOKENS_PER_MINUTE,
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+# Shared by every AzureOpenAIAgent instance in the process
+llm_limiter = LLMLimiter()
@@ -0,0 +1,64 @@
+import os
+from typing import Dict, Optional, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+from app.core.config import settings
+
+# Labelled by task_type: recommendations, group_recommendations, taste_profile, moodboard, default
+LLM_REQUESTS = Counter(
+    "llm_requests_total", "LLM chat requests by outcome (ok, error, cache_hit)", ["task_type", "outcome"]
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "Upstream time per LLM call, retries included (limiter wait excluded)",
+    ["task_type", "mode"], buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens reported in the usage block (prompt, cached prompt tokens, completion)", ["task_type", "kind"]
+)
+LLM_COST = Counter("llm_cost_usd_total", "Estimated spend from token usage and the configured prices", ["task_type"])
+LLM_RETRIES = Counter("llm_retries_total", "Retried LLM calls by reason (429, 5xx, transport)", ["task_type", "reason"])
+LLM_PARSE = Counter(
+    "llm_parse_total",
+    "Which parse path turned the completion into output (json, extracted, demjson, partial, salvaged, fallback)",
+    ["task_type", "path"]
+)
+
+def observe_call(task_type: str, mode: str, seconds: float, usage: Optional[Dict[str, int]], ok: bool) -> None:
+    """Record one finished upstream call (mode: sync, async or stream)."""
+    LLM_REQUESTS.labels(task_type, "ok" if ok else "error").inc()
+    LLM_LATENCY.labels(task_type, mode).observe(seconds)
+    if not usage:
+        return
+    prompt = usage.get("prompt_tokens") or 0
+    # Prompt tokens served from the provider's prefix cache (a subset of prompt_tokens, billed at a discount)
+    cached = min(prompt, (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0)
+    completion = usage.get("completion_tokens") or 0
+    LLM_TOKENS.labels(task_type, "prompt").inc(prompt)
+    LLM_TOKENS.labels(task_type, "cached").inc(cached)
+    LLM_TOKENS.labels(task_type, "completion").inc(completion)
+    cost = (
+        (prompt - cached) / 1000 * settings.LLM_PRICE_PER_1K_PROMPT_TOKENS
+        + cached / 1000 * settings.LLM_PRICE_PER_1K_CACHED_PROMPT_TOKENS
+        + completion / 1000 * settings.LLM_PRICE_PER_1K_COMPLETION_TOKENS
+    )
+    LLM_COST.labels(task_type).inc(cost)
+
+def observe_cache_hit(task_type: str) -> None:
+    LLM_REQUESTS.labels(task_type, "cache_hit").inc()
+
+def observe_retry(task_type: str, reason: str) -> None:
+    LLM_RETRIES.labels(task_type, reason).inc()
+
+def observe_parse(task_type: str, path: str) -> None:
+    LLM_PARSE.labels(task_type, path).inc()
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Exposition-format metrics for this process, or for every process sharing PROMETHEUS_MULTIPROC_DIR
+    (gunicorn workers and Celery children) when it is set.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
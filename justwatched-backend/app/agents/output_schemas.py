@@ -0,0 +1,173 @@
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
+from app.core.config import settings
+from app.agents.json_stream import IncrementalArrayParser
+
+class LLMOutput(BaseModel):
+    """
+    Base for structured completions; keys the model adds beyond the schema are dropped. Subclasses leave
+    their defining fields without defaults, so off-schema output fails validation instead of passing as empty.
+    """
+    model_config = ConfigDict(extra="ignore")
+    # List field whose items are validated, and salvaged from truncated output, one by one
+    items_field: ClassVar[Optional[str]] = None
+
+class Pick(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    i: int
+    s: float = 0.0
+    why: str = ""
+
+    @field_validator("s")
+    @classmethod
+    def clamp_score(cls, value: float) -> float:
+        return min(1.0, max(0.0, value))
+
+class GroupPick(Pick):
+    why: List[str] = []
+    u: List[int] = []
+
+    @field_validator("why", mode="before")
+    @classmethod
+    def listify_reasons(cls, value: Any) -> Any:
+        return [value] if isinstance(value, str) else value
+
+class RecommendationsOutput(LLMOutput):
+    items_field: ClassVar[Optional[str]] = "r"
+    r: List[Pick]
+
+class GroupRecommendationsOutput(LLMOutput):
+    items_field: ClassVar[Optional[str]] = "r"
+    r: List[GroupPick]
+
+class TasteProfileOutput(LLMOutput):
+    favorite_genres: List[str]
+    favorite_actors: List[str] = []
+    favorite_directors: List[str] = []
+    mood_preferences: List[str] = []
+    preferred_era: str = "mixed"
+    preferred_language: str = "mixed"
+    analysis_confidence: float = 0.5
+
+class BatchTasteProfile(TasteProfileOutput):
+    u: str
+
+class TasteProfileBatchOutput(LLMOutput):
+    items_field: ClassVar[Optional[str]] = "profiles"
+    profiles: List[BatchTasteProfile]
+
+class Track(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    title: str = ""
+    artist: str = ""
+    genre: str = ""
+    mood: str = ""
+
+class ColorPalette(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    primary: str = ""
+    secondary: str = ""
+    accent: str = ""
+
+class MoodboardOutput(LLMOutput):
+    """Moodboard from AzureOpenAIAgent.generate_moodboard (Celery task)."""
+    color_palette: ColorPalette
+    mood_keywords: List[str]
+    music_suggestions: List[Track] = []
+    visual_elements: List[str] = []
+    atmosphere_description: str = ""
+
+class MoodboardAssetsOutput(LLMOutput):
+    """Moodboard from the /generate/moodboard endpoint."""
+    images: List[str]
+    music: List[Track] = []
+    colors: List[str]
+
+# Every output model calls may use, for schema checks
+OUTPUT_MODELS: Tuple[Type[LLMOutput], ...] = (
+    RecommendationsOutput, GroupRecommendationsOutput, TasteProfileOutput, TasteProfileBatchOutput,
+    MoodboardOutput, MoodboardAssetsOutput,
+)
+
+# Default output per task type; calls whose prompt asks for another shape pass their own model
+TASK_OUTPUTS: Dict[str, Type[LLMOutput]] = {
+    "recommendations": RecommendationsOutput,
+    "group_recommendations": GroupRecommendationsOutput,
+    "taste_profile": TasteProfileOutput,
+    "moodboard": MoodboardOutput,
+}
+
+def output_model_for(task_type: str, output_model: Optional[Type[LLMOutput]] = None) -> Optional[Type[LLMOutput]]:
+    return output_model or TASK_OUTPUTS.get(task_type)
+
+def _make_strict(node: Any) -> None:
+    """Adapt a Pydantic JSON schema in place to what strict structured outputs accept."""
+    if isinstance(node, list):
+        for item in node:
+            _make_strict(item)
+        return
+    if not isinstance(node, dict):
+        return
+    # Pydantic wraps a $ref that has a default in allOf, which strict mode rejects; the default goes too
+    all_of = node.pop("allOf", None)
+    if all_of:
+        if len(all_of) != 1:
+            raise ValueError("Strict structured outputs cannot combine schemas with allOf")
+        node.update(all_of[0])
+    node.pop("title", None)
+    node.pop("default", None)
+    properties = node.get("properties")
+    if properties is not None:
+        # Strict mode wants every property listed as required and no extras
+        node["required"] = list(properties)
+        node["additionalProperties"] = False
+        for schema in properties.values():
+            _make_strict(schema)
+    for schema in (node.get("$defs") or {}).values():
+        _make_strict(schema)
+    for key in ("items", "anyOf"):
+        if key in node:
+            _make_strict(node[key])
+
+def response_format(output_model: Type[LLMOutput]) -> Dict[str, Any]:
+    """The json_schema response_format for a model's output."""
+    schema = output_model.model_json_schema()
+    if not settings.LLM_COMPACT_INCLUDE_REASONING:
+        # The compact prompts leave out "why" then, so the schema must not demand it
+        for definition in (schema.get("$defs") or {}).values():
+            if definition.get("title") in ("Pick", "GroupPick"):
+                definition["properties"].pop("why", None)
+    _make_strict(schema)
+    return {"type": "json_schema", "json_schema": {"name": output_model.__name__, "strict": True, "schema": schema}}
+
+def _valid_items(output_model: Type[LLMOutput], items: List[Any]) -> List[Dict[str, Any]]:
+    field = output_model.items_field
+    valid = []
+    for item in items:
+        try:
+            valid.extend(output_model.model_validate({field: [item]}).model_dump(exclude_unset=True)[field])
+        except ValidationError:
+            continue
+    return valid
+
+def validate_output(output_model: Type[LLMOutput], data: Any) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """
+    Validate parsed output against its model. Returns (result, complete): a list output with some invalid
+    items keeps the valid ones (complete=False); otherwise invalid output gives (None, False).
+    """
+    try:
+        return output_model.model_validate(data).model_dump(exclude_unset=True), True
+    except ValidationError:
+        field = output_model.items_field
+        if not field or not isinstance(data, dict) or not isinstance(data.get(field), list):
+            return None, False
+        valid = _valid_items(output_model, data[field])
+        return ({field: valid} if valid else None), False
+
+def salvage_output(output_model: Type[LLMOutput], content: str) -> Optional[Dict[str, Any]]:
+    """Every complete, valid item of a list output from text that is not valid JSON (e.g. cut off by max_tokens)."""
+    field = output_model.items_field
+    if not field:
+        return None
+    valid = _valid_items(output_model, IncrementalArrayParser(field).feed(content))
+    return {field: valid} if valid else None
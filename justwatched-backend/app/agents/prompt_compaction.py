@@ -0,0 +1,183 @@
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.genre_registry import genre_registry
+from app.agents.prompts import PERSONAL_RECOMMENDATIONS, GROUP_RECOMMENDATIONS
+
+# Taste profile fields the recommendation prompts use, with the short keys sent to the model
+PROFILE_FIELDS = {
+    "favorite_genres": "genres",
+    "favorite_actors": "actors",
+    "favorite_directors": "directors",
+    "mood_preferences": "moods",
+    "preferred_era": "era",
+    "preferred_language": "lang",
+}
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 UTF-8 bytes per token), good enough for budgeting prompts."""
+    return (len(text.encode("utf-8")) + 3) // 4
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimated prompt tokens for a chat request, including per-message framing."""
+    return sum(estimate_tokens(str(m.get("content", ""))) + 4 for m in messages) + 3
+
+def trim_text(text: Optional[str], max_chars: int) -> str:
+    """Cut text at a word boundary so it fits max_chars."""
+    text = " ".join((text or "").split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0] if max_chars > 0 else ""
+    return cut.rstrip(",.;:") + "…" if cut else ""
+
+def compact_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the non-empty taste fields, with lists capped to the strongest entries."""
+    compact = {}
+    for field, short in PROFILE_FIELDS.items():
+        value = profile.get(field)
+        if isinstance(value, list):
+            value = [v for v in value if v][:settings.LLM_PROMPT_PROFILE_LIST_LIMIT]
+        if value:
+            compact[short] = value
+    return compact
+
+def compact_candidates(candidates: List[Dict[str, Any]], overview_chars: int) -> List[Dict[str, Any]]:
+    """Candidate rows keyed by position (i=1..n) with trimmed overviews and genre names instead of IDs."""
+    rows = []
+    for index, movie in enumerate(candidates, start=1):
+        row = {"i": index, "t": movie.get("title", "")}
+        year = (movie.get("release_date") or "")[:4]
+        if year:
+            row["y"] = int(year) if year.isdigit() else year
+        genres = movie.get("genres") or genre_registry.names_for(movie.get("genre_ids", []))
+        if genres:
+            row["g"] = genres
+        if movie.get("vote_average"):
+            row["r"] = round(float(movie["vote_average"]), 1)
+        if overview_chars > 0:
+            overview = trim_text(movie.get("overview"), overview_chars)
+            if overview:
+                row["o"] = overview
+        rows.append(row)
+    return rows
+
+def summarize_reviews(reviews: List[Dict[str, Any]], review_chars: int, limit: int = 20) -> str:
+    """One line per review (title, rating, trimmed text) for taste analysis prompts."""
+    lines = []
+    for review in reviews[:limit]:
+        line = f"{review.get('movie_title', 'Unknown')} | {review.get('rating', 0)}"
+        text = trim_text(review.get("review_text"), review_chars)
+        lines.append(f"{line} | {text}" if text else line)
+    return "\n".join(lines)
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+class CompactPrompt:
+    """
+    A budgeted recommendation prompt plus the lookup tables needed to expand the model's
+    compact answer ({"r": [{"i", "s", "why", "u"}]}) back into full recommendation dicts.
+    """
+    def __init__(self, kind: str, messages: List[Dict[str, str]], movies: Dict[int, Dict[str, Any]], users: Optional[Dict[int, str]] = None):
+        self.kind = kind
+        self.messages = messages
+        self.movies = movies
+        self.users = users or {}
+
+    @property
+    def estimated_tokens(self) -> int:
+        return estimate_messages_tokens(self.messages)
+
+    def expand_item(self, item: Any) -> Optional[Dict[str, Any]]:
+        """Map one compact item back to a candidate; items naming unknown candidates are dropped."""
+        if not isinstance(item, dict):
+            return None
+        try:
+            movie = self.movies.get(int(item.get("i")))
+        except (TypeError, ValueError):
+            return None
+        if movie is None:
+            return None
+        score = item.get("s", 0)
+        rec = {"tmdb_id": movie["tmdb_id"], "title": movie.get("title"), "poster_path": movie.get("poster_path")}
+        if self.kind == "group":
+            reasons = item.get("why") or []
+            rec["group_score"] = score
+            rec["reasons"] = [reasons] if isinstance(reasons, str) else list(reasons)
+            rec["participants_who_liked"] = [self.users[u] for u in item.get("u", []) if u in self.users]
+        else:
+            rec["confidence_score"] = score
+            rec["reasoning"] = item.get("why", "")
+        return rec
+
+    def expand(self, result: Any) -> Any:
+        """Expand a parsed compact response into the {"recommendations": [...]} shape callers expect."""
+        if not isinstance(result, dict) or "r" not in result:
+            return result  # Parse-failure fallback, or a model that ignored the schema
+        recommendations = []
+        for item in result.get("r") or []:
+            rec = self.expand_item(item)
+            if rec is not None:
+                recommendations.append(rec)
+        return {"recommendations": recommendations, "generated_at": datetime.utcnow().isoformat()}
+
+def _fit_to_budget(candidates: List[Dict[str, Any]], build: Callable[[List[Dict[str, Any]]], List[Dict[str, str]]]) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    """Shorten overviews, then drop the lowest-ranked candidates, until the prompt fits the token budget."""
+    budget = settings.LLM_PROMPT_TOKEN_BUDGET
+    overview_chars = settings.LLM_PROMPT_OVERVIEW_CHARS
+    messages = []
+    for chars in (overview_chars, overview_chars // 2, overview_chars // 4, 0):
+        messages = build(compact_candidates(candidates, chars))
+        if estimate_messages_tokens(messages) <= budget:
+            return messages, candidates
+    # Candidates arrive best-first, so trim from the tail
+    keep = len(candidates)
+    while keep > settings.LLM_PROMPT_MIN_CANDIDATES and estimate_messages_tokens(messages) > budget:
+        keep -= 1
+        messages = build(compact_candidates(candidates[:keep], 0))
+    return messages, candidates[:keep]
+
+def build_personal_prompt(taste_profile: Dict[str, Any], candidates: List[Dict[str, Any]], count: Optional[int] = None) -> CompactPrompt:
+    """
+    Compact prompt asking the model to pick the best `count` candidates for one user. The count never
+    exceeds the candidates actually sent; by default the model ranks all of them.
+    """
+    profile = compact_profile(taste_profile)
+
+    def build(rows: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        # Candidates before the profile: pools shared across users extend the cached prefix
+        return PERSONAL_RECOMMENDATIONS.messages(
+            f"Candidates: {_dumps(rows)}",
+            f"Taste profile: {_dumps(profile)}",
+            f"Pick the {len(rows) if count is None else min(count, len(rows))} best candidates.",
+        )
+
+    messages, kept = _fit_to_budget(candidates, build)
+    return CompactPrompt("personal", messages, {i: movie for i, movie in enumerate(kept, start=1)})
+
+def _pick_range(count: Tuple[int, int], available: int) -> str:
+    """A "low-high" pick count capped at the candidates available ("7-10", or "5" with only five)."""
+    low, high = min(count[0], available), min(count[1], available)
+    return str(high) if low == high else f"{low}-{high}"
+
+def build_group_prompt(taste_profiles: List[Dict[str, Any]], candidates: List[Dict[str, Any]], count: Tuple[int, int] = (7, 10)) -> CompactPrompt:
+    """
+    Compact prompt asking the model to pick between count[0] and count[1] candidates for a group, capped at the
+    candidates actually sent; members are numbered u=1..n.
+    """
+    users = {}
+    profiles = []
+    for index, taste_profile in enumerate(taste_profiles, start=1):
+        users[index] = taste_profile.get("user_id", str(index))
+        profiles.append({"u": index, **compact_profile(taste_profile)})
+
+    def build(rows: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        return GROUP_RECOMMENDATIONS.messages(
+            f"Candidates: {_dumps(rows)}",
+            f"Members: {_dumps(profiles)}",
+            f"Pick {_pick_range(count, len(rows))} candidates.",
+        )
+
+    messages, kept = _fit_to_budget(candidates, build)
+    return CompactPrompt("group", messages, {i: movie for i, movie in enumerate(kept, start=1)}, users)
@@ -0,0 +1,96 @@
+import hashlib
+from typing import Dict, List
+from app.core.config import settings
+
+class PromptTemplate:
+    """
+    A registered prompt. The system message is fixed text, byte-identical on every call, so it forms the
+    start of the cacheable prefix; everything that varies goes in the user message, most-shared data first.
+    """
+    def __init__(self, name: str, system: str):
+        self.name = name
+        self.system = system
+        self.fingerprint = hashlib.sha1(system.encode("utf-8")).hexdigest()[:12]
+
+    def messages(self, *user_parts: str) -> List[Dict[str, str]]:
+        """System prompt followed by a user message built from parts ordered from most to least shared."""
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": "\n".join(part for part in user_parts if part)},
+        ]
+
+# Shared by every caller in the process
+PROMPTS: Dict[str, PromptTemplate] = {}
+
+def register(name: str, system: str) -> PromptTemplate:
+    if name in PROMPTS:
+        raise ValueError(f"Prompt {name} is already registered")
+    PROMPTS[name] = PromptTemplate(name, system)
+    return PROMPTS[name]
+
+def prompt_fingerprints() -> Dict[str, str]:
+    """Name -> hash of each static prefix, to spot prefix changes that reset the provider's cache."""
+    return {name: prompt.fingerprint for name, prompt in PROMPTS.items()}
+
+CANDIDATE_LEGEND = "Candidates use short keys: i=id, t=title, y=year, g=genres, r=TMDB rating, o=overview."
+
+_PERSONAL_WHY = ',"why":"<one short sentence>"' if settings.LLM_COMPACT_INCLUDE_REASONING else ""
+_GROUP_WHY = ',"why":["<short reason>"]' if settings.LLM_COMPACT_INCLUDE_REASONING else ""
+
+PERSONAL_RECOMMENDATIONS = register("personal_recommendations", (
+    "You are a movie recommendation expert. Pick the candidates that best match the user's taste profile; "
+    "the last line says how many.\n"
+    f"{CANDIDATE_LEGEND}\n"
+    "Rules: only use candidate ids; each id at most once; best match first.\n"
+    f'Return only JSON: {{"r":[{{"i":<candidate id>,"s":<match score 0-1>{_PERSONAL_WHY}}}]}}'
+))
+
+GROUP_RECOMMENDATIONS = register("group_recommendations", (
+    "You are a group movie recommendation expert. Pick candidates the group would enjoy together; "
+    "the last line says how many.\n"
+    f"{CANDIDATE_LEGEND} Members are numbered by u.\n"
+    "Rules: only use candidate ids; each id at most once; best match first.\n"
+    f'Return only JSON: {{"r":[{{"i":<candidate id>,"s":<group score 0-1>{_GROUP_WHY},"u":[<members who would like it>]}}]}}'
+))
+
+TASTE_PROFILE = register("taste_profile", (
+    "You are a film taste analyzer. Analyze the user's movie reviews and create a comprehensive taste profile.\n"
+    "You must respond with valid JSON only. Return a JSON object with the following structure:\n"
+    '{"favorite_genres": ["list", "of", "genres"], "favorite_actors": ["list", "of", "actors"], '
+    '"favorite_directors": ["list", "of", "directors"], "mood_preferences": ["list", "of", "moods"], '
+    '"preferred_era": "modern|classic|mixed", "preferred_language": "english|foreign|mixed", "analysis_confidence": 0.85}'
+))
+
+TASTE_PROFILE_BATCH = register("taste_profile_batch", (
+    "You are a film taste analyzer. Each section below holds one user's reviews, "
+    "one per line as: title | rating | review.\n"
+    "Build a taste profile for EVERY user. Respond with valid JSON only:\n"
+    '{"profiles": [{"u": "U1", "favorite_genres": [], "favorite_actors": [], "favorite_directors": [], '
+    '"mood_preferences": [], "preferred_era": "modern|classic|mixed", '
+    '"preferred_language": "english|foreign|mixed", "analysis_confidence": 0.85}]}'
+))
+
+TASTE_ANALYSIS = register("taste_analysis", (
+    "You are a movie taste profile analyzer.\n"
+    "Given a list of user reviews (with genres, actors, directors, ratings, and review text),\n"
+    "analyze and return a strict JSON taste_profile object with these keys: favorite_genres, favorite_actors, favorite_directors, mood_preferences.\n"
+    "Each value should be a list of strings.\n"
+    "Strictly output only JSON, no extra text."
+))
+
+MOODBOARD = register("moodboard", (
+    "You are a creative moodboard generator. Create a moodboard for the given movie.\n"
+    "Return ONLY a JSON object with the following structure:\n"
+    '{"color_palette": {"primary": "#hexcolor", "secondary": "#hexcolor", "accent": "#hexcolor"}, '
+    '"mood_keywords": ["list", "of", "moods"], '
+    '"music_suggestions": [{"title": "string", "artist": "string", "genre": "string", "mood": "string"}], '
+    '"visual_elements": ["list", "of", "visual", "elements"], "atmosphere_description": "string"}'
+))
+
+MOODBOARD_ASSETS = register("moodboard_assets", (
+    "You're a creative moodboard assistant. Using the movie metadata and user notes, generate a list of:\n"
+    "- 3–4 image URLs (frames/posters)\n"
+    "- 2–3 soundtrack tracks\n"
+    "- 5 hex color codes\n"
+    "Return a JSON object: images, music, colors. No other text."
+))
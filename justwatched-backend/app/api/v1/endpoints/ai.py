@@ -1,9 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, AsyncIterator, Optional
+from datetime import datetime
 import json
+from app.core.config import settings
+from app.core.resilience import RateLimitTimeout
+from app.core.deadline import DeadlineExceeded
 from app.agents.azure_openai_agent import AzureOpenAIAgent
+from app.agents.json_stream import IncrementalArrayParser
+from app.agents.llm_cache import llm_cache
+from app.agents.llm_limiter import llm_limiter, LLMQuotaExceeded
+from app.agents.output_schemas import MoodboardAssetsOutput
+from app.agents.prompts import MOODBOARD_ASSETS, TASTE_ANALYSIS, prompt_fingerprints
+from app.agents.prompt_compaction import CompactPrompt, build_personal_prompt, build_group_prompt
 from app.services.tmdb_service import TMDBService
+from app.services.genre_registry import genre_registry
+from app.services.candidate_ranker import rank_candidates, heuristic_recommendations
 from app.services.user_data_service import UserDataService
 
 router = APIRouter()
@@ -64,212 +77,271 @@ async def get_trending_movies(limit: int = 20) -> List[Dict[str, Any]]:
         print(f"Error fetching trending movies: {e}")
         return []
 
-# --- Endpoints ---
-@router.post("/recommend/personal")
-async def recommend_personal(data: PersonalRecommendRequest):
-    """Generate personal recommendations using real TMDB data."""
+# --- Prompt building ---
+async def prepare_personal_prompt(data: PersonalRecommendRequest) -> CompactPrompt:
+    """Fetch candidates for a taste profile and build the compact personal recommendation prompt."""
     profile = data.taste_profile
     watched = data.watched_movie_ids
+
+    # Get candidate movies from TMDB based on taste profile
+    candidate_movies = await search_candidate_movies(profile, limit=50)
     
-    try:
-        # Get candidate movies from TMDB based on taste profile
-        candidate_movies = await search_candidate_movies(profile, limit=50)
-        
-        # Filter out already watched movies
+    # Filter out already watched movies
+    filtered_candidates = [
+        movie for movie in candidate_movies 
+        if movie["id"] not in watched
+    ]
+    
+    # If no candidates, use trending movies as fallback
+    if not filtered_candidates:
+        filtered_candidates = await get_trending_movies(20)
         filtered_candidates = [
-            movie for movie in candidate_movies 
+            movie for movie in filtered_candidates 
             if movie["id"] not in watched
         ]
-        
-        # If no candidates, use trending movies as fallback
-        if not filtered_candidates:
-            filtered_candidates = await get_trending_movies(20)
-            filtered_candidates = [
-                movie for movie in filtered_candidates 
-                if movie["id"] not in watched
-            ]
-        
-        if not filtered_candidates:
-            raise HTTPException(status_code=404, detail="No suitable movies found")
-        
-        # Prepare candidate movies for AI
-        candidate_data = []
-        seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
-        
-        for movie in filtered_candidates[:30]:  # Limit to top 30 for AI processing
-            if movie["id"] not in seen_movie_ids:  # Only add if not already seen
-                candidate_data.append({
-                    "tmdb_id": movie["id"],
-                    "title": movie["title"],
-                    "overview": movie.get("overview", ""),
-                    "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
-                    "release_date": movie.get("release_date", ""),
-                    "poster_path": movie.get("poster_path"),
-                    "vote_average": movie.get("vote_average", 0)
-                })
-                seen_movie_ids.add(movie["id"])
-        
-        messages = [
-            {"role": "system", "content": (
-                "You are a movie recommendation expert. You will receive a list of real movies from TMDB "
-                "and a user's taste profile. Your task is to select the best 20 movies from the provided list "
-                "that match the user's preferences.\n\n"
-                "IMPORTANT RULES:\n"
-                "1. Only use movies from the provided candidate list.\n"
-                "2. Each movie can appear ONLY ONCE in your recommendations.\n"
-                "3. Do not duplicate any movie titles or IDs.\n"
-                "4. Select exactly 20 unique movies.\n\n"
-                "Return a JSON object with this exact structure:\n"
-                "{\n"
-                '  "recommendations": [\n'
-                '    {\n'
-                '      "tmdb_id": "movie_id_from_list",\n'
-                '      "title": "movie_title_from_list",\n'
-                '      "poster_path": "poster_path_from_list",\n'
-                '      "confidence_score": 0.85,\n'
-                '      "reasoning": "explanation of why this movie matches the user\'s taste"\n'
-                '    }\n'
-                '  ],\n'
-                '  "generated_at": "timestamp"\n'
-                "}\n\n"
-                "CRITICAL: Ensure no duplicate tmdb_id values in the recommendations array."
-            )},
-            {"role": "user", "content": f"User Taste Profile: {json.dumps(profile, ensure_ascii=False)}\n\nCandidate Movies: {json.dumps(candidate_data, ensure_ascii=False)}"}
-        ]
-        
-        result = ai_agent.chat(messages, temperature=0.7, max_tokens=6000)
-        
-        # Validate and clean the response
-        if not isinstance(result, dict) or "recommendations" not in result:
-            raise HTTPException(status_code=500, detail="Invalid AI response format")
-        
-        # Deduplicate recommendations by tmdb_id
+    
+    if not filtered_candidates:
+        raise HTTPException(status_code=404, detail="No suitable movies found")
+    
+    # Prepare candidate movies for AI
+    candidate_data = []
+    seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
+    
+    # Only the best-scoring candidates go to the AI
+    for movie in rank_candidates(filtered_candidates, [profile], watched, settings.RANKER_TOP_K):
+        if movie["id"] not in seen_movie_ids:  # Only add if not already seen
+            candidate_data.append({
+                "tmdb_id": movie["id"],
+                "title": movie["title"],
+                "overview": movie.get("overview", ""),
+                "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
+                "genres": genre_registry.names_for(movie.get("genre_ids", [])),
+                "release_date": movie.get("release_date", ""),
+                "poster_path": movie.get("poster_path"),
+                "vote_average": movie.get("vote_average", 0),
+                "prerank_score": movie.get("prerank_score")
+            })
+            seen_movie_ids.add(movie["id"])
+    
+    return build_personal_prompt(profile, candidate_data)
+
+async def prepare_group_prompt(data: GroupRecommendRequest) -> CompactPrompt:
+    """Fetch candidates for a group's combined taste and build the compact group recommendation prompt."""
+    profiles = data.taste_profiles
+
+    # Aggregate group preferences
+    all_genres = set()
+    all_actors = set()
+    all_directors = set()
+    
+    for profile in profiles:
+        all_genres.update(profile.get("favorite_genres", []))
+        all_actors.update(profile.get("favorite_actors", []))
+        all_directors.update(profile.get("favorite_directors", []))
+    
+    # Create aggregated taste profile
+    aggregated_profile = {
+        "favorite_genres": list(all_genres)[:5],  # Top 5 genres
+        "favorite_actors": list(all_actors)[:3],  # Top 3 actors
+        "favorite_directors": list(all_directors)[:3]  # Top 3 directors
+    }
+    
+    # Get candidate movies from TMDB based on aggregated profile
+    candidate_movies = await search_candidate_movies(aggregated_profile, limit=40)
+    
+    # If no candidates, use trending movies as fallback
+    if not candidate_movies:
+        candidate_movies = await get_trending_movies(20)
+    
+    if not candidate_movies:
+        raise HTTPException(status_code=404, detail="No suitable movies found")
+    
+    # Prepare candidate movies for AI
+    candidate_data = []
+    seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
+    
+    for movie in rank_candidates(candidate_movies, profiles, top_k=settings.RANKER_TOP_K_GROUP):
+        if movie["id"] not in seen_movie_ids:  # Only add if not already seen
+            candidate_data.append({
+                "tmdb_id": movie["id"],
+                "title": movie["title"],
+                "overview": movie.get("overview", ""),
+                "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
+                "genres": genre_registry.names_for(movie.get("genre_ids", [])),
+                "release_date": movie.get("release_date", ""),
+                "poster_path": movie.get("poster_path"),
+                "vote_average": movie.get("vote_average", 0),
+                "prerank_score": movie.get("prerank_score")
+            })
+            seen_movie_ids.add(movie["id"])
+    
+    return build_group_prompt(profiles, candidate_data)
+
+def dedupe_recommendations(result: Any) -> dict:
+    """Validate the AI response and drop repeated tmdb_ids."""
+    if not isinstance(result, dict) or "recommendations" not in result:
+        raise HTTPException(status_code=500, detail="Invalid AI response format")
+
+    # Deduplicate recommendations by tmdb_id
+    seen_ids = set()
+    unique_recommendations = []
+
+    for rec in result["recommendations"]:
+        if isinstance(rec, dict) and "tmdb_id" in rec:
+            movie_id = str(rec["tmdb_id"])
+            if movie_id not in seen_ids:
+                seen_ids.add(movie_id)
+                unique_recommendations.append(rec)
+
+    # Update the result with deduplicated recommendations
+    result["recommendations"] = unique_recommendations
+    return result
+
+# --- Streaming ---
+async def open_recommendation_stream(chunks: AsyncIterator[str]) -> Optional[AsyncIterator[str]]:
+    """
+    Start the model stream (limiter slot, upstream response, first chunk) before any response is sent, so
+    limiter rejections still become 429/503. Any other failure before the first chunk gives None.
+    """
+    try:
+        first = await chunks.__anext__()
+    except (LLMQuotaExceeded, RateLimitTimeout) as e:
+        raise llm_limit_error(e)
+    except StopAsyncIteration:
+        return None
+    except Exception as e:
+        print(f"AI stream unavailable ({e}), serving pre-ranked candidates")
+        return None
+
+    async def resumed():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    return resumed()
+
+def recommendation_stream_response(chunks: Optional[AsyncIterator[str]], prompt: CompactPrompt, format: str = "ndjson") -> StreamingResponse:
+    """
+    Turn streamed model output into one event per completed recommendation (NDJSON lines or SSE events).
+    Without chunks, or if the stream ends before its first recommendation, the pre-ranker's picks are sent.
+    """
+    def encode(event_type: str, payload: dict) -> str:
+        if format == "sse":
+            return f"event: {event_type}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+        return json.dumps({"type": event_type, **payload}, ensure_ascii=False) + "\n"
+
+    def heuristic_events():
+        fallback = heuristic_recommendations(list(prompt.movies.values()))
+        for rec in fallback["recommendations"]:
+            yield encode("recommendation", {"recommendation": rec})
+        yield encode("done", {"count": len(fallback["recommendations"]), "generated_at": fallback["generated_at"], "generation_method": fallback["generation_method"]})
+
+    async def events():
+        parser = IncrementalArrayParser("r")
         seen_ids = set()
-        unique_recommendations = []
-        
-        for rec in result["recommendations"]:
-            if isinstance(rec, dict) and "tmdb_id" in rec:
-                movie_id = str(rec["tmdb_id"])
-                if movie_id not in seen_ids:
-                    seen_ids.add(movie_id)
-                    unique_recommendations.append(rec)
-        
-        # Update the result with deduplicated recommendations
-        result["recommendations"] = unique_recommendations
-        
-        return result
-        
-    except HTTPException:
+        try:
+            if chunks is not None:
+                async for chunk in chunks:
+                    for item in parser.feed(chunk):
+                        rec = prompt.expand_item(item)
+                        # Same dedupe as the blocking endpoints, applied as items arrive
+                        if rec is None or str(rec["tmdb_id"]) in seen_ids:
+                            continue
+                        seen_ids.add(str(rec["tmdb_id"]))
+                        yield encode("recommendation", {"recommendation": rec})
+        except Exception as e:
+            if seen_ids:
+                yield encode("error", {"detail": f"AI error: {e}"})
+                return
+            print(f"AI stream failed before its first recommendation ({e}), serving pre-ranked candidates")
+        if not seen_ids:
+            for event in heuristic_events():
+                yield event
+            return
+        yield encode("done", {"count": len(seen_ids), "generated_at": datetime.utcnow().isoformat()})
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    # Disable proxy buffering so each event reaches the client immediately
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def llm_limit_error(e: Exception) -> HTTPException:
+    """429 for an exhausted per-user quota, 503 when the shared LLM capacity stayed busy."""
+    if isinstance(e, LLMQuotaExceeded):
+        return HTTPException(status_code=429, detail=str(e))
+    return HTTPException(status_code=503, detail=f"AI service busy: {e}", headers={"Retry-After": "5"})
+
+# --- Endpoints ---
+@router.post("/recommend/personal")
+async def recommend_personal(data: PersonalRecommendRequest):
+    """Generate personal recommendations using real TMDB data."""
+    try:
+        prompt = await prepare_personal_prompt(data)
+        try:
+            result = prompt.expand(await ai_agent.achat(prompt.messages, temperature=0.7, max_tokens=settings.LLM_RECOMMENDATION_MAX_TOKENS, task_type="recommendations", priority="interactive", user_id=data.taste_profile.get("user_id")))
+        except LLMQuotaExceeded:
+            raise
+        except Exception as e:
+            print(f"AI unavailable ({e}), serving pre-ranked candidates")
+            result = None
+        if not isinstance(result, dict) or result.get("error") or not result.get("recommendations"):
+            # The pre-ranker's order is a usable answer on its own
+            return heuristic_recommendations(list(prompt.movies.values()))
+        return dedupe_recommendations(result)
+        
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except (LLMQuotaExceeded, RateLimitTimeout) as e:
+        raise llm_limit_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI error: {e}")
+
+@router.post("/recommend/personal/stream")
+async def recommend_personal_stream(data: PersonalRecommendRequest, format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """Stream personal recommendations one by one as the model generates them (NDJSON or server-sent events)."""
+    try:
+        prompt = await prepare_personal_prompt(data)
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI error: {e}")
+    chunks = await open_recommendation_stream(ai_agent.achat_stream(prompt.messages, temperature=0.7, max_tokens=settings.LLM_RECOMMENDATION_MAX_TOKENS, task_type="recommendations", user_id=data.taste_profile.get("user_id")))
+    return recommendation_stream_response(chunks, prompt, format)
 
 @router.post("/recommend/group")
 async def recommend_group(data: GroupRecommendRequest):
     """Generate group recommendations using real TMDB data."""
-    profiles = data.taste_profiles
-    
     try:
-        # Aggregate group preferences
-        all_genres = set()
-        all_actors = set()
-        all_directors = set()
-        
-        for profile in profiles:
-            all_genres.update(profile.get("favorite_genres", []))
-            all_actors.update(profile.get("favorite_actors", []))
-            all_directors.update(profile.get("favorite_directors", []))
-        
-        # Create aggregated taste profile
-        aggregated_profile = {
-            "favorite_genres": list(all_genres)[:5],  # Top 5 genres
-            "favorite_actors": list(all_actors)[:3],  # Top 3 actors
-            "favorite_directors": list(all_directors)[:3]  # Top 3 directors
-        }
-        
-        # Get candidate movies from TMDB based on aggregated profile
-        candidate_movies = await search_candidate_movies(aggregated_profile, limit=40)
-        
-        # If no candidates, use trending movies as fallback
-        if not candidate_movies:
-            candidate_movies = await get_trending_movies(20)
-        
-        if not candidate_movies:
-            raise HTTPException(status_code=404, detail="No suitable movies found")
-        
-        # Prepare candidate movies for AI
-        candidate_data = []
-        seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
-        
-        for movie in candidate_movies[:25]:  # Limit to top 25 for AI processing
-            if movie["id"] not in seen_movie_ids:  # Only add if not already seen
-                candidate_data.append({
-                    "tmdb_id": movie["id"],
-                    "title": movie["title"],
-                    "overview": movie.get("overview", ""),
-                    "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
-                    "release_date": movie.get("release_date", ""),
-                    "poster_path": movie.get("poster_path"),
-                    "vote_average": movie.get("vote_average", 0)
-                })
-                seen_movie_ids.add(movie["id"])
-        
-        messages = [
-            {"role": "system", "content": (
-                "You are a group movie recommendation expert. You will receive a list of real movies from TMDB "
-                "and multiple user taste profiles. Your task is to select 7-10 movies from the provided list "
-                "that would appeal to the group.\n\n"
-                "IMPORTANT RULES:\n"
-                "1. Only use movies from the provided candidate list.\n"
-                "2. Each movie can appear ONLY ONCE in your recommendations.\n"
-                "3. Do not duplicate any movie titles or IDs.\n"
-                "4. Select 7-10 unique movies.\n\n"
-                "Return a JSON object with this exact structure:\n"
-                "{\n"
-                '  "recommendations": [\n'
-                '    {\n'
-                '      "tmdb_id": "movie_id_from_list",\n'
-                '      "title": "movie_title_from_list",\n'
-                '      "poster_path": "poster_path_from_list",\n'
-                '      "group_score": 0.85,\n'
-                '      "reasons": ["reason1", "reason2"],\n'
-                '      "participants_who_liked": ["user_id1", "user_id2"]\n'
-                '    }\n'
-                '  ],\n'
-                '  "generated_at": "timestamp"\n'
-                "}\n\n"
-                "CRITICAL: Ensure no duplicate tmdb_id values in the recommendations array."
-            )},
-            {"role": "user", "content": f"Group Taste Profiles: {json.dumps(profiles, ensure_ascii=False)}\n\nCandidate Movies: {json.dumps(candidate_data, ensure_ascii=False)}"}
-        ]
-        
-        result = ai_agent.chat(messages, temperature=0.6, max_tokens=6000)
-        
-        # Validate and clean the response
-        if not isinstance(result, dict) or "recommendations" not in result:
-            raise HTTPException(status_code=500, detail="Invalid AI response format")
-        
-        # Deduplicate recommendations by tmdb_id
-        seen_ids = set()
-        unique_recommendations = []
-        
-        for rec in result["recommendations"]:
-            if isinstance(rec, dict) and "tmdb_id" in rec:
-                movie_id = str(rec["tmdb_id"])
-                if movie_id not in seen_ids:
-                    seen_ids.add(movie_id)
-                    unique_recommendations.append(rec)
-        
-        # Update the result with deduplicated recommendations
-        result["recommendations"] = unique_recommendations
-        
-        return result
-        
-    except HTTPException:
+        prompt = await prepare_group_prompt(data)
+        try:
+            result = prompt.expand(await ai_agent.achat(prompt.messages, temperature=0.6, max_tokens=settings.LLM_RECOMMENDATION_MAX_TOKENS, task_type="group_recommendations", priority="interactive"))
+        except LLMQuotaExceeded:
+            raise
+        except Exception as e:
+            print(f"AI unavailable ({e}), serving pre-ranked candidates")
+            result = None
+        if not isinstance(result, dict) or result.get("error") or not result.get("recommendations"):
+            # The pre-ranker's order is a usable answer on its own
+            return heuristic_recommendations(list(prompt.movies.values()))
+        return dedupe_recommendations(result)
+        
+    except (HTTPException, DeadlineExceeded):
         raise
+    except (LLMQuotaExceeded, RateLimitTimeout) as e:
+        raise llm_limit_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI error: {e}")
 
+@router.post("/recommend/group/stream")
+async def recommend_group_stream(data: GroupRecommendRequest, format: str = Query("ndjson", pattern="^(ndjson|sse)$")):
+    """Stream group recommendations one by one as the model generates them (NDJSON or server-sent events)."""
+    try:
+        prompt = await prepare_group_prompt(data)
+    except (HTTPException, DeadlineExceeded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI error: {e}")
+    chunks = await open_recommendation_stream(ai_agent.achat_stream(prompt.messages, temperature=0.6, max_tokens=settings.LLM_RECOMMENDATION_MAX_TOKENS, task_type="group_recommendations"))
+    return recommendation_stream_response(chunks, prompt, format)
+
 @router.post("/generate/moodboard")
 async def generate_moodboard(data: MoodboardRequest):
     """Generate moodboard using real TMDB movie data."""
@@ -280,18 +352,9 @@ async def generate_moodboard(data: MoodboardRequest):
         # Get real movie details from TMDB
         movie_details = await get_movie_details(movie_id)
         
-        messages = [
-            {"role": "system", "content": (
-                "You're a creative moodboard assistant. Using the movie metadata and user notes, generate a list of:\n"
-                "- 3–4 image URLs (frames/posters)\n"
-                "- 2–3 soundtrack tracks\n"
-                "- 5 hex color codes\n"
-                "Return a JSON object: images, music, colors. No other text."
-            )},
-            {"role": "user", "content": f"Movie info: {json.dumps(movie_details, ensure_ascii=False)}, Notes: {notes}"}
-        ]
+        messages = MOODBOARD_ASSETS.messages(f"Movie info: {json.dumps(movie_details, ensure_ascii=False)}, Notes: {notes}")
         
-        gpt_data = ai_agent.chat(messages)
+        gpt_data = await ai_agent.achat(messages, task_type="moodboard", priority="interactive", output_model=MoodboardAssetsOutput)
         
         # Return AI-generated moodboard data
         return {
@@ -301,6 +364,10 @@ async def generate_moodboard(data: MoodboardRequest):
             **gpt_data
         }
         
+    except DeadlineExceeded:
+        raise
+    except (LLMQuotaExceeded, RateLimitTimeout) as e:
+        raise llm_limit_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI error: {e}")
 
@@ -311,19 +378,10 @@ async def analyze_taste(data: TasteAnalysisRequest):
     user_id = reviews[0]["user_id"] if "user_id" in reviews[0] else "user"
     watched_movie_ids = [review["movie_id"] for review in reviews]
     
-    messages = [
-        {"role": "system", "content": (
-            "You are a movie taste profile analyzer.\n"
-            "Given a list of user reviews (with genres, actors, directors, ratings, and review text),\n"
-            "analyze and return a strict JSON taste_profile object with these keys: user_id, favorite_genres, favorite_actors, favorite_directors, mood_preferences.\n"
-            "Each value should be a list of strings, except user_id.\n"
-            "Strictly output only JSON, no extra text."
-        )},
-        {"role": "user", "content": f"Reviews: {json.dumps(reviews)}"}
-    ]
+    messages = TASTE_ANALYSIS.messages(f"Reviews: {json.dumps(reviews)}")
     
     try:
-        taste_profile = ai_agent.chat(messages)
+        taste_profile = await ai_agent.achat(messages, task_type="taste_profile", priority="interactive")
         # Ensure strict output format
         return {
             "taste_profile": {
@@ -335,5 +393,24 @@ async def analyze_taste(data: TasteAnalysisRequest):
             },
             "watched_movie_ids": watched_movie_ids
         }
+    except DeadlineExceeded:
+        raise
+    except (LLMQuotaExceeded, RateLimitTimeout) as e:
+        raise llm_limit_error(e)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI error: {e}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"AI error: {e}")
+
+@router.get("/healthcheck/llm/cache")
+async def llm_cache_stats():
+    """LLM response cache hit rate and tokens saved, across all processes."""
+    return llm_cache.stats()
+
+@router.get("/healthcheck/llm/limiter")
+async def llm_limiter_stats():
+    """In-flight LLM calls, waiters per priority lane and tokens used this minute, across all processes."""
+    return llm_limiter.stats()
+
+@router.get("/healthcheck/llm/prompts")
+async def llm_prompt_fingerprints():
+    """Hash of each registered prompt's static prefix; a change means provider-side prompt caches start cold."""
+    return prompt_fingerprints()
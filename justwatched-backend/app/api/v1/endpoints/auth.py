@@ -3,6 +3,7 @@ from pydantic import BaseModel, EmailStr
 from firebase_admin import auth as firebase_auth
 import requests
 from app.core.config import settings
+from app.core.deadline import check_deadline, within_deadline
 from app.core.security import create_access_token, create_refresh_token, verify_token
 from app.crud.user_crud import UserCRUD
 from datetime import datetime, timedelta
@@ -44,7 +45,8 @@ async def register_user(data: RegisterRequest):
         "returnSecureToken": True
     }
     
-    resp = requests.post(url, json=payload)
+    check_deadline("Firebase auth call")
+    resp = requests.post(url, json=payload, timeout=within_deadline(settings.FIREBASE_AUTH_TIMEOUT))
     if resp.status_code != 200:
         error_data = resp.json()
         error_message = error_data.get("error", {}).get("message", "Registration failed")
@@ -85,7 +87,8 @@ async def login_user(data: LoginRequest):
     
     url = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={settings.FIREBASE_API_KEY}"
     payload = {"email": data.email, "password": data.password, "returnSecureToken": True}
-    resp = requests.post(url, json=payload)
+    check_deadline("Firebase auth call")
+    resp = requests.post(url, json=payload, timeout=within_deadline(settings.FIREBASE_AUTH_TIMEOUT))
     
     if resp.status_code != 200:
         error_data = resp.json()
@@ -146,7 +149,8 @@ async def reset_password(data: ResetPasswordRequest):
         "email": data.email
     }
     
-    resp = requests.post(url, json=payload)
+    check_deadline("Firebase auth call")
+    resp = requests.post(url, json=payload, timeout=within_deadline(settings.FIREBASE_AUTH_TIMEOUT))
     if resp.status_code != 200:
         raise HTTPException(
             status_code=400,
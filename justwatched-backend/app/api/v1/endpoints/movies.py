@@ -1,9 +1,9 @@
 from fastapi import APIRouter, HTTPException, Query, Path, Depends
 import httpx
-from app.core.config import settings
+from app.core.resilience import RateLimitTimeout, CircuitOpenError
 from app.core.security import get_current_user
 from app.services.search_history_service import SearchHistoryService
-from app.services.tmdb_service import TMDBService
+from app.services.tmdb_service import TMDBService, tmdb_breaker
 from typing import Optional
 
 router = APIRouter()
@@ -59,20 +59,7 @@ async def search_multi(
     
     try:
         # Use TMDB multi-search endpoint
-        url = f"{tmdb_service.TMDB_BASE_URL}/search/multi"
-        params = {
-            "api_key": tmdb_service.api_key, 
-            "query": query,
-            "include_adult": include_adult
-        }
-        
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        
-        if resp.status_code != 200:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-        
-        search_results = resp.json()
+        search_results = await tmdb_service.search_multi(query, include_adult=include_adult)
         
         # Record the search in history as multi-search
         await search_history_service.record_search(
@@ -88,6 +75,14 @@ async def search_multi(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Multi-search failed: {str(e)}")
 
+@router.get("/{movie_id}/similar")
+async def get_similar_movies(movie_id: int = Path(...), limit: int = Query(20, ge=1, le=100)):
+    """Movies with similar overviews, genres and keywords, from the local content similarity index."""
+    results = await tmdb_service.get_similar_movies(movie_id, limit)
+    if results is None:
+        raise HTTPException(status_code=404, detail="Movie not in similarity index")
+    return {"movie_id": movie_id, "results": results}
+
 @router.get("/{movie_id}")
 async def get_movie_details(movie_id: int = Path(...)):
     try:
@@ -97,11 +92,15 @@ async def get_movie_details(movie_id: int = Path(...)):
 
 @router.get("/healthcheck/tmdb")
 async def tmdb_healthcheck():
-    url = "https://api.themoviedb.org/3/configuration"
-    headers = {"Authorization": f"Bearer {settings.TMDB_API_KEY}"}
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-    if response.status_code == 200:
+    try:
+        await tmdb_service.get_configuration()
         return {"tmdb": "connected"}
-    else:
-        return {"tmdb": "error", "status_code": response.status_code, "detail": response.text}
\ No newline at end of file
+    except httpx.HTTPStatusError as e:
+        return {"tmdb": "error", "status_code": e.response.status_code, "detail": e.response.text}
+    except (httpx.HTTPError, RateLimitTimeout, CircuitOpenError) as e:
+        return {"tmdb": "error", "detail": str(e), "circuit": tmdb_breaker.stats()}
+
+@router.get("/healthcheck/tmdb/cache")
+async def tmdb_cache_stats():
+    """TMDB response cache counters and circuit breaker state for this worker process."""
+    return {**tmdb_service.cache.stats(), "circuit": tmdb_breaker.stats()}
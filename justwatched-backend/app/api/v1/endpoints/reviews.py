@@ -27,16 +27,12 @@ async def fetch_media_details(media_type: MediaType, media_id: str) -> dict:
     if media_type == MediaType.MOVIE:
         return await tmdb_service.get_movie_details(media_id)
     elif media_type == MediaType.TV:
-        # You may need to implement get_tv_details in TMDBService
-        url = f"https://api.themoviedb.org/3/tv/{media_id}"
-        params = {"api_key": tmdb_api_key}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        if resp.status_code == 404:
-            raise HTTPException(status_code=404, detail="TV show not found")
-        elif resp.status_code != 200:
-            raise HTTPException(status_code=resp.status_code, detail=resp.text)
-        return resp.json()
+        try:
+            return await tmdb_service.get_tv_details(media_id)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                raise HTTPException(status_code=404, detail="TV show not found")
+            raise HTTPException(status_code=e.response.status_code, detail=e.response.text)
     else:
         raise HTTPException(status_code=400, detail="Unsupported media type")
 
@@ -160,13 +160,10 @@ async def search_with_history(
         
         # Use TMDBService for all searches
         if search_type.lower() == "multi":
-            url = f"{tmdb_service.TMDB_BASE_URL}/search/multi"
-            params = {"api_key": tmdb_api_key, "query": query}
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(url, params=params)
-            if resp.status_code != 200:
-                raise HTTPException(status_code=resp.status_code, detail=resp.text)
-            search_results = resp.json()
+            try:
+                search_results = await tmdb_service.search_multi(query)
+            except httpx.HTTPStatusError as e:
+                raise HTTPException(status_code=e.response.status_code, detail=e.response.text)
         else:
             search_results = await tmdb_service.search_movies(query, search_type)
         
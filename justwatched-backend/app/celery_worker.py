@@ -1,12 +1,16 @@
+import asyncio
+from typing import Optional
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.core.config import settings
+from app.core.http_clients import close_http_clients
 
 celery_app = Celery(
     "justwatched",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=['app.tasks.recommendation_tasks']  # Include tasks without circular import
+    include=['app.tasks.recommendation_tasks', 'app.tasks.catalog_tasks', 'app.tasks.movie_list_tasks', 'app.tasks.person_index_tasks', 'app.tasks.similarity_tasks', 'app.tasks.item_cf_tasks']  # Include tasks without circular import
 )
 celery_app.conf.update(task_track_started=True)
 
@@ -15,4 +19,51 @@ celery_app.conf.beat_schedule = {
         'task': 'tasks.refresh_recommendations_for_all_users',
         'schedule': crontab(minute='*/20'),  # Every 20 minutes
     },
-}
\ No newline at end of file
+    'bootstrap-tmdb-catalog': {
+        'task': 'tasks.bootstrap_tmdb_catalog',
+        'schedule': crontab(hour=9, minute=0),  # Daily, after TMDB publishes its ID exports
+    },
+    'sync-tmdb-catalog': {
+        'task': 'tasks.sync_tmdb_catalog',
+        'schedule': crontab(minute=15),  # Hourly
+    },
+    'warm-person-index': {
+        'task': 'tasks.warm_person_index',
+        'schedule': crontab(hour=4, minute=30),  # Daily
+    },
+    'build-similarity-index': {
+        'task': 'tasks.build_similarity_index',
+        'schedule': crontab(hour=11, minute=0),  # Daily, after the catalog bootstrap has fetched new details
+    },
+    'train-item-cf': {
+        'task': 'tasks.train_item_cf',
+        'schedule': crontab(hour=3, minute=30),  # Nightly, off-peak
+    },
+    'precompute-movie-lists': {
+        'task': 'tasks.precompute_movie_lists',
+        'schedule': crontab(minute='*/10'),  # Ahead of MOVIE_LISTS_SOFT_TTL so readers rarely see a stale list
+    },
+}
+
+# Long-lived event loop per worker process so pooled upstream connections survive between tasks
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop shared by all tasks running in this worker process."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    get_worker_loop()
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    global _worker_loop
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.run_until_complete(close_http_clients())
+        _worker_loop.close()
+    _worker_loop = None
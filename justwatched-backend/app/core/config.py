@@ -1,3 +1,4 @@
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -30,6 +31,107 @@ class Settings(BaseSettings):
 
     # External APIs
     TMDB_API_KEY: str
+    TMDB_BASE_URL: str = "https://api.themoviedb.org/3"
+
+    # TMDB HTTP client (shared, connection-pooled per process)
+    TMDB_HTTP2: bool = True
+    TMDB_MAX_CONNECTIONS: int = 50
+    TMDB_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    TMDB_KEEPALIVE_EXPIRY: float = 30.0
+    TMDB_CONNECT_TIMEOUT: float = 3.0
+    TMDB_READ_TIMEOUT: float = 10.0
+    TMDB_POOL_TIMEOUT: float = 5.0
+
+    # TMDB rate limiting (token bucket shared via Redis), retries and circuit breaker
+    TMDB_RATE_LIMIT_PER_SECOND: float = 40.0
+    TMDB_RATE_LIMIT_BURST: int = 40
+    TMDB_RATE_LIMIT_MAX_WAIT: float = 10.0  # Give up on a request after waiting this long for a token
+    TMDB_MAX_RETRIES: int = 3
+    TMDB_RETRY_BASE_DELAY: float = 0.5
+    TMDB_RETRY_MAX_DELAY: float = 8.0
+    TMDB_RETRY_BUDGET_SECONDS: float = 15.0  # Total backoff one request may spend across its retries
+    TMDB_BREAKER_FAILURE_THRESHOLD: int = 5
+    TMDB_BREAKER_RECOVERY_TIMEOUT: float = 30.0
+
+    # TMDB genre registry (live genre lists cached in-process and in Redis)
+    GENRE_REGISTRY_TTL: int = 86400
+    GENRE_REGISTRY_RETRY_INTERVAL: int = 300
+    GENRE_FUZZY_CUTOFF: float = 0.8  # difflib ratio needed to accept a misspelled genre name
+
+    # Precomputed trending/popular/genre lists in Redis (stale-while-revalidate)
+    MOVIE_LISTS_SIZE: int = 20
+    MOVIE_LISTS_SOFT_TTL: int = 15 * 60  # Past this a background refresh is queued, the old copy is still served
+    MOVIE_LISTS_HARD_TTL: int = 2 * 86400
+    MOVIE_LISTS_REFRESH_LOCK_TTL: int = 120
+    MOVIE_LISTS_LOCALES: List[str] = []  # Extra locales to precompute, e.g. ["ko-KR", "de-DE"]
+
+    # Person name -> TMDB ID index (Redis hash)
+    PERSON_INDEX_MIN_CONFIDENCE: float = 0.8  # Matches below this, and misses, are re-resolved after RECHECK_AFTER
+    PERSON_INDEX_RECHECK_AFTER: int = 7 * 86400
+    PERSON_INDEX_LOCAL_MAX_ENTRIES: int = 10000
+    PERSON_INDEX_WARMUP_CONCURRENCY: int = 4
+
+    # TMDB response cache (in-process LRU in front of Redis), TTLs in seconds
+    TMDB_CACHE_ENABLED: bool = True
+    TMDB_CACHE_MAX_ENTRIES: int = 5000
+    TMDB_CACHE_TTL_DETAILS: int = 3 * 86400
+    TMDB_CACHE_TTL_LISTS: int = 15 * 60
+    TMDB_CACHE_TTL_DISCOVER: int = 6 * 3600
+    TMDB_CACHE_TTL_SEARCH: int = 10 * 60
+    TMDB_CACHE_TTL_PERSON: int = 86400
+    TMDB_CACHE_TTL_NEGATIVE: int = 3600
+    TMDB_CACHE_STALE_GRACE: int = 86400  # How long stale entries are kept for ETag revalidation
+
+    # Single-flight coalescing of identical upstream calls
+    SINGLE_FLIGHT_DISTRIBUTED: bool = False  # Also coalesce across processes via a Redis lock
+    SINGLE_FLIGHT_POLL_INTERVAL: float = 0.05
+    SINGLE_FLIGHT_RESULT_TTL: int = 30
+    TMDB_SINGLE_FLIGHT_LOCK_TTL: float = 10.0
+    LLM_SINGLE_FLIGHT_LOCK_TTL: float = 120.0
+
+    # Candidate gathering fan-out
+    TMDB_CANDIDATE_CONCURRENCY: int = 6
+    TMDB_CANDIDATE_SOURCE_TIMEOUT: float = 8.0  # Per source; slow sources are dropped, not awaited
+    TMDB_BULK_DETAILS_CONCURRENCY: int = 8  # Parallel detail fetches per get_movies_details_bulk call
+
+    # Heuristic pre-ranking of candidates before the LLM (weights sum to 1)
+    RANKER_TOP_K: int = 10  # Candidates sent to the LLM for personal recommendations
+    RANKER_TOP_K_GROUP: int = 15
+    RANKER_MIN_VOTES: int = 100  # Bayesian prior weight for vote_average
+    RANKER_WEIGHT_GENRE: float = 0.45
+    RANKER_WEIGHT_RATING: float = 0.2
+    RANKER_WEIGHT_POPULARITY: float = 0.15
+    RANKER_WEIGHT_RECENCY: float = 0.1
+    RANKER_WEIGHT_LANGUAGE: float = 0.1
+
+    # Local TMDB catalog mirror (SQLite), bootstrapped from daily exports and synced from the changes feed
+    TMDB_CATALOG_ENABLED: bool = True
+    TMDB_CATALOG_PATH: str = "data/tmdb_catalog.sqlite3"
+    TMDB_EXPORTS_BASE_URL: str = "https://files.tmdb.org/p/exports"
+    TMDB_EXPORTS_DIR: Optional[str] = None  # Read *_ids_MM_DD_YYYY.json.gz from here instead of downloading
+    TMDB_CHANGES_FEED_FILE: Optional[str] = None  # Local JSON stand-in for /movie/changes and /tv/changes
+    TMDB_CATALOG_BOOTSTRAP_MOVIES: int = 10000  # Most popular movies to fetch full details for
+    TMDB_CATALOG_BOOTSTRAP_TV: int = 2000
+    TMDB_CATALOG_PERSON_MIN_POPULARITY: float = 1.0
+    TMDB_CATALOG_SYNC_CONCURRENCY: int = 8
+    TMDB_CATALOG_MIN_GENRE_RESULTS: int = 20  # Serve genre discovery locally only with at least this many titles
+
+    # Content similarity index (hashed TF-IDF over catalog overviews, genres and keywords)
+    SIMILARITY_INDEX_ENABLED: bool = True
+    SIMILARITY_INDEX_PATH: str = "data/similarity_index.npz"
+    SIMILARITY_HASH_FEATURES: int = 2 ** 18
+    SIMILARITY_SEED_REVIEWS: int = 5  # Top-rated reviews used to seed similar-movie candidates
+    SIMILARITY_SEED_MIN_RATING: float = 4.0
+
+    # Item-item collaborative filtering ("users who liked X also liked Y"), retrained nightly from reviews
+    ITEM_CF_ENABLED: bool = True
+    ITEM_CF_INDEX_PATH: str = "data/item_neighbours.npz"
+    ITEM_CF_NEIGHBOURS: int = 50  # Neighbours kept per movie
+    ITEM_CF_MIN_ITEM_RATINGS: int = 3  # Movies with fewer raters are left out of training
+    ITEM_CF_MIN_COMMON_USERS: int = 2  # Pairs rated by fewer users in common are not neighbours
+    ITEM_CF_SHRINKAGE: float = 10.0  # Similarity is scaled by n / (n + shrinkage) for n co-raters
+    ITEM_CF_WORKERS: int = 4  # Processes computing similarities; 0 or 1 computes in-process
+    ITEM_CF_CHUNK_SIZE: int = 2000  # Movies per worker job
 
     # Celery Configuration
     CELERY_BROKER_URL: str = "redis://redis:6379/0"
@@ -40,4 +142,93 @@ class Settings(BaseSettings):
     AZURE_DEPLOYMENT_NAME: str
     AZURE_API_VERSION: str = "2024-12-01-preview"
 
+    # Azure OpenAI HTTP clients (shared, connection-pooled per process)
+    AZURE_OPENAI_MAX_CONNECTIONS: int = 20
+    AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    AZURE_OPENAI_KEEPALIVE_EXPIRY: float = 60.0
+    AZURE_OPENAI_CONNECT_TIMEOUT: float = 5.0
+    AZURE_OPENAI_READ_TIMEOUT: float = 90.0  # Long completions can legitimately take a minute
+    AZURE_OPENAI_WRITE_TIMEOUT: float = 10.0
+    AZURE_OPENAI_POOL_TIMEOUT: float = 10.0
+
+    # LLM response cache (Redis, content-addressed), TTLs in seconds per task type
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_RECOMMENDATIONS: int = 6 * 3600
+    LLM_CACHE_TTL_GROUP_RECOMMENDATIONS: int = 3600
+    LLM_CACHE_TTL_TASTE_PROFILE: int = 12 * 3600
+    LLM_CACHE_TTL_MOODBOARD: int = 7 * 86400
+    LLM_CACHE_TTL_DEFAULT: int = 3600
+    LLM_CACHE_MAX_ENTRIES: int = 20000
+    LLM_CACHE_MAX_ENTRY_BYTES: int = 64 * 1024  # Compressed size; larger responses are not cached
+
+    # Recommendation prompt compaction
+    LLM_PROMPT_TOKEN_BUDGET: int = 3000  # Estimated input tokens per recommendation prompt
+    LLM_PROMPT_OVERVIEW_CHARS: int = 200  # Starting overview length; shortened further to fit the budget
+    LLM_PROMPT_MIN_CANDIDATES: int = 10  # Never trim the candidate list below this to fit the budget
+    LLM_PROMPT_PROFILE_LIST_LIMIT: int = 8
+    LLM_COMPACT_INCLUDE_REASONING: bool = True
+    LLM_RECOMMENDATION_MAX_TOKENS: int = 2000
+
+    # Structured outputs: json_schema response_format per task type, validated with Pydantic.
+    # Needs a deployment that supports it (gpt-4o 2024-08-06 or later); if the deployment rejects it,
+    # the call is resent once with json_object and the process keeps using json_object.
+    LLM_STRUCTURED_OUTPUTS: bool = True
+
+    # Batched taste profile analysis (several users per LLM call)
+    TASTE_PROFILE_BATCH_SIZE: int = 10  # Users per batch task
+    TASTE_PROFILE_BATCH_TOKEN_BUDGET: int = 6000  # Estimated input tokens per LLM call
+    TASTE_PROFILE_BATCH_REVIEW_CHARS: int = 200
+    TASTE_PROFILE_BATCH_TOKENS_PER_USER: int = 250  # Completion budget per user in the batch
+
+    # Statistical taste profile (decayed, rating-weighted histograms), maintained on every review write
+    TASTE_STATS_HALF_LIFE_DAYS: float = 180.0
+    TASTE_STATS_NEUTRAL_RATING: float = 3.0  # Ratings above count for a movie's genres/people, below against
+    TASTE_STATS_UNRATED_WEIGHT: float = 0.3  # Watched with no rating
+    TASTE_STATS_WATCHLIST_WEIGHT: float = 0.15
+    TASTE_STATS_ACTORS_PER_MOVIE: int = 5
+    TASTE_STATS_FAVORITES: int = 5  # Entries per favorite_* list
+    TASTE_STATS_MAX_FEATURES: int = 200  # Per histogram; the weakest entries are dropped
+    TASTE_STATS_MIN_REVIEWS: int = 3  # Below this, favorites from an LLM-enriched profile are kept
+
+    # LLM admission control across processes (priority lanes: interactive > on_demand > scheduled)
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_INTERACTIVE_RESERVED: int = 3  # Slots only interactive calls may use
+    LLM_SCHEDULED_MAX_CONCURRENCY: int = 2
+    LLM_TOKENS_PER_MINUTE: int = 120000  # Deployment TPM limit
+    LLM_TPM_SHARE_ON_DEMAND: float = 0.9  # Fraction of the TPM limit each lower lane may consume
+    LLM_TPM_SHARE_SCHEDULED: float = 0.6
+    LLM_USER_DAILY_TOKEN_QUOTA: int = 200000  # 0 disables per-user quotas
+    LLM_LIMITER_LEASE_TTL: float = 120.0  # Slots held by crashed processes free up after this
+    LLM_LIMITER_WAITER_TTL: float = 2.0
+    LLM_LIMITER_POLL_INTERVAL: float = 0.1
+    LLM_LIMITER_MAX_WAIT_INTERACTIVE: float = 30.0
+    LLM_LIMITER_MAX_WAIT_ON_DEMAND: float = 120.0
+    LLM_LIMITER_MAX_WAIT_SCHEDULED: float = 600.0
+
+    # LLM retries on 429s, 5xx and transport errors (the limiter slot is held across retries)
+    LLM_MAX_RETRIES: int = 2
+    LLM_RETRY_BASE_DELAY: float = 1.0
+    LLM_RETRY_MAX_DELAY: float = 10.0
+    LLM_RETRY_BUDGET_SECONDS: float = 20.0
+
+    # LLM metrics (Prometheus, served at /metrics); USD per 1K tokens, set to the deployment's pricing
+    LLM_PRICE_PER_1K_PROMPT_TOKENS: float = 0.0025
+    LLM_PRICE_PER_1K_CACHED_PROMPT_TOKENS: float = 0.00125  # Prompt tokens served from the provider's prefix cache
+    LLM_PRICE_PER_1K_COMPLETION_TOKENS: float = 0.01
+
+    # Per-request deadlines (seconds) carried to TMDB, LLM and Firestore calls; 0 disables
+    REQUEST_DEADLINE_SECONDS: float = 30.0
+    REQUEST_DEADLINE_ROUTES: Dict[str, float] = {  # Longest matching path prefix wins
+        "/api/v1/recommend/": 45.0,
+        "/api/v1/recommend/personal/stream": 90.0,
+        "/api/v1/recommend/group/stream": 90.0,
+        "/api/v1/generate/": 45.0,
+        "/api/v1/analyze/": 45.0,
+        "/healthcheck": 5.0,
+        "/metrics": 0,
+    }
+    REQUEST_DEADLINE_HEADER: str = "X-Request-Timeout"  # Lets a client ask for a shorter (or longer) budget
+    REQUEST_DEADLINE_MAX_SECONDS: float = 120.0  # Cap on budgets asked for through the header
+    FIREBASE_AUTH_TIMEOUT: float = 10.0  # Identity Toolkit calls made by the auth endpoints
+
 settings = Settings() 
\ No newline at end of file
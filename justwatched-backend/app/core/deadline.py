@@ -0,0 +1,66 @@
+import time
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# time.monotonic() by which the current request must be answered; None means no deadline (e.g. Celery tasks)
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised when the current request's time budget runs out before or during a piece of work."""
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """Run the block with a deadline `seconds` from now; an enclosing earlier deadline still applies."""
+    current = _deadline.get()
+    new = time.monotonic() + seconds if seconds else None
+    if current is not None and (new is None or current < new):
+        new = current
+    token = _deadline.set(new)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+def without_deadline() -> contextvars.Context:
+    """A copy of the current context with no deadline, for background work that outlives the request."""
+    context = contextvars.copy_context()
+    context.run(_deadline.set, None)
+    return context
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline (negative once passed), or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def check_deadline(what: str) -> None:
+    """Raise DeadlineExceeded instead of starting `what` once the deadline has passed."""
+    left = time_left()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Request deadline passed before {what}")
+
+def within_deadline(timeout: Optional[float]) -> Optional[float]:
+    """A timeout shortened to the time left (None stays unbounded only without a deadline)."""
+    left = time_left()
+    if left is None:
+        return timeout
+    left = max(0.0, left)
+    return left if timeout is None else min(timeout, left)
+
+def deadline_allows(delay: float) -> bool:
+    """Whether sleeping `delay` seconds (e.g. a retry backoff) still leaves time to do anything."""
+    left = time_left()
+    return left is None or delay < left
+
+async def run_within_deadline(awaitable: Awaitable[T], what: str) -> T:
+    """Await `awaitable`, cancelling it and raising DeadlineExceeded if the deadline passes first."""
+    left = time_left()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, max(0.0, left))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Request deadline passed during {what}") from None
@@ -5,6 +5,7 @@ from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor
 import asyncio
 from pathlib import Path
+from app.core.deadline import check_deadline, run_within_deadline
 
 _executor = ThreadPoolExecutor()
 
@@ -24,5 +25,11 @@ def get_firestore_client():
     return firestore.client()
 
 async def run_in_threadpool(func, *args, **kwargs):
+    """
+    Run blocking Firestore work on the shared pool within the request deadline. Work still queued when
+    the deadline passes is cancelled; a call already running finishes in its thread but is no longer awaited.
+    """
+    what = getattr(func, "__qualname__", "threadpool call")
+    check_deadline(what)
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(_executor, lambda: func(*args, **kwargs)) 
\ No newline at end of file
+    return await run_within_deadline(loop.run_in_executor(_executor, lambda: func(*args, **kwargs)), what)
@@ -0,0 +1,99 @@
+import asyncio
+from typing import Optional
+import httpx
+from app.core.config import settings
+from app.core.deadline import within_deadline
+
+# One pooled client per process, rebuilt if the event loop it was created on changes
+_tmdb_client: Optional[httpx.AsyncClient] = None
+_tmdb_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_llm_client: Optional[httpx.AsyncClient] = None
+_llm_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# Blocking client for sync callers (Celery tasks); httpx.Client is thread-safe
+_llm_sync_client: Optional[httpx.Client] = None
+
+def create_tmdb_client() -> httpx.AsyncClient:
+    """Create a keep-alive, connection-pooled client for the TMDB API."""
+    limits = httpx.Limits(
+        max_connections=settings.TMDB_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.TMDB_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.TMDB_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        settings.TMDB_READ_TIMEOUT,
+        connect=settings.TMDB_CONNECT_TIMEOUT,
+        pool=settings.TMDB_POOL_TIMEOUT,
+    )
+    return httpx.AsyncClient(
+        base_url=settings.TMDB_BASE_URL,
+        http2=settings.TMDB_HTTP2,
+        limits=limits,
+        timeout=timeout,
+        headers={"Accept": "application/json"},
+    )
+
+def get_tmdb_client() -> httpx.AsyncClient:
+    """Get the shared TMDB client for the running event loop."""
+    global _tmdb_client, _tmdb_client_loop
+    loop = asyncio.get_running_loop()
+    if _tmdb_client is None or _tmdb_client.is_closed or _tmdb_client_loop is not loop:
+        _tmdb_client = create_tmdb_client()
+        _tmdb_client_loop = loop
+    return _tmdb_client
+
+def _llm_client_options() -> dict:
+    limits = httpx.Limits(
+        max_connections=settings.AZURE_OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.AZURE_OPENAI_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        settings.AZURE_OPENAI_READ_TIMEOUT,
+        connect=settings.AZURE_OPENAI_CONNECT_TIMEOUT,
+        write=settings.AZURE_OPENAI_WRITE_TIMEOUT,
+        pool=settings.AZURE_OPENAI_POOL_TIMEOUT,
+    )
+    return {
+        "limits": limits,
+        "timeout": timeout,
+        "headers": {"api-key": settings.AZURE_OPENAI_KEY, "Content-Type": "application/json"},
+    }
+
+def get_llm_client() -> httpx.AsyncClient:
+    """Get the shared Azure OpenAI client for the running event loop."""
+    global _llm_client, _llm_client_loop
+    loop = asyncio.get_running_loop()
+    if _llm_client is None or _llm_client.is_closed or _llm_client_loop is not loop:
+        _llm_client = httpx.AsyncClient(**_llm_client_options())
+        _llm_client_loop = loop
+    return _llm_client
+
+def get_llm_sync_client() -> httpx.Client:
+    """Get the shared blocking Azure OpenAI client."""
+    global _llm_sync_client
+    if _llm_sync_client is None or _llm_sync_client.is_closed:
+        _llm_sync_client = httpx.Client(**_llm_client_options())
+    return _llm_sync_client
+
+def deadline_timeout(client) -> httpx.Timeout:
+    """The client's timeouts, each capped at what is left of the current request deadline."""
+    timeout = client.timeout
+    return httpx.Timeout(
+        connect=within_deadline(timeout.connect),
+        read=within_deadline(timeout.read),
+        write=within_deadline(timeout.write),
+        pool=within_deadline(timeout.pool),
+    )
+
+async def close_http_clients() -> None:
+    """Close the shared clients (called on app shutdown and worker process exit)."""
+    global _tmdb_client, _tmdb_client_loop, _llm_client, _llm_client_loop, _llm_sync_client
+    running_loop = asyncio.get_running_loop()
+    clients = [(_tmdb_client, _tmdb_client_loop), (_llm_client, _llm_client_loop)]
+    _tmdb_client, _tmdb_client_loop, _llm_client, _llm_client_loop = None, None, None, None
+    for client, client_loop in clients:
+        if client is not None and not client.is_closed and client_loop is running_loop:
+            await client.aclose()
+    if _llm_sync_client is not None:
+        _llm_sync_client.close()
+        _llm_sync_client = None
@@ -1,5 +1,15 @@
 import redis
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from app.core.config import settings
 
 # Create Redis client instance
-redis_client = redis.Redis.from_url(settings.CELERY_RESULT_BACKEND) 
\ No newline at end of file
+redis_client = redis.Redis.from_url(settings.CELERY_RESULT_BACKEND)
+
+# Blocking redis-py calls made from async code run here, so a slow Redis never stalls the event loop
+_executor = ThreadPoolExecutor(thread_name_prefix="redis")
+
+async def run_redis(func, *args, **kwargs):
+    """Await a blocking Redis call (or a function making several) on the Redis thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(_executor, partial(func, *args, **kwargs))
@@ -0,0 +1,176 @@
+import time
+import random
+import asyncio
+import threading
+from typing import Optional
+from app.core.redis_client import redis_client, run_redis
+
+# Refill-then-take on a Redis hash; returns 0 if a token was taken, else milliseconds until one is available.
+# Uses the Redis server clock so every process sees the same bucket.
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return wait
+"""
+
+class RateLimitTimeout(Exception):
+    """Raised when a rate-limit token could not be obtained within the allowed wait."""
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited because the upstream is failing."""
+
+class TokenBucket:
+    """
+    Token bucket shared across API and Celery processes through Redis.
+    Falls back to a per-process bucket with the same rate if Redis is unavailable.
+    """
+    def __init__(self, name: str, rate: float, capacity: int, redis=redis_client):
+        self.key = f"ratelimit:{name}"
+        self.rate = rate
+        self.capacity = capacity
+        self.redis = redis
+        self._local_tokens = float(capacity)
+        self._local_ts = time.monotonic()
+        self._local_lock = threading.Lock()
+
+    def _take_local(self) -> float:
+        with self._local_lock:
+            now = time.monotonic()
+            self._local_tokens = min(self.capacity, self._local_tokens + (now - self._local_ts) * self.rate)
+            self._local_ts = now
+            if self._local_tokens >= 1:
+                self._local_tokens -= 1
+                return 0.0
+            return (1 - self._local_tokens) / self.rate
+
+    def try_take(self) -> float:
+        """Take a token if one is available. Returns 0, or the seconds to wait before trying again."""
+        try:
+            return int(self.redis.eval(_TOKEN_BUCKET_SCRIPT, 1, self.key, self.rate, self.capacity)) / 1000
+        except Exception:
+            return self._take_local()
+
+    async def acquire(self, max_wait: float) -> None:
+        """Wait (up to max_wait seconds) for a token."""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = await run_redis(self.try_take)
+            if wait <= 0:
+                return
+            # Small jitter so waiting callers don't all retry on the same millisecond
+            wait += random.uniform(0, 0.05)
+            if time.monotonic() + wait > deadline:
+                raise RateLimitTimeout(f"Rate limit wait for {self.key} exceeded {max_wait}s")
+            await asyncio.sleep(wait)
+
+class CircuitBreaker:
+    """
+    Per-process circuit breaker: opens after `failure_threshold` consecutive failures,
+    then lets a single trial call through after `recovery_timeout` seconds (half-open).
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream right now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.recovery_timeout:
+                return False
+            # A trial that never reported back (e.g. cancelled) stops blocking after recovery_timeout
+            if self._trial_in_flight and now - self._trial_started < self.recovery_timeout:
+                return False
+            self._state = self.HALF_OPEN
+            self._trial_in_flight = True
+            self._trial_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    print(f"Circuit breaker '{self.name}' opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            return {"state": state, "consecutive_failures": self._failures}
+
+class RetryBudget:
+    """
+    Per-request retry allowance: at most `max_retries` retries and `max_delay_total` seconds of backoff.
+    Delays use full-jitter exponential backoff, or the server's Retry-After when it gives one.
+    """
+    def __init__(self, max_retries: int, base_delay: float, max_delay: float, max_delay_total: float):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.remaining_delay = max_delay_total
+        self.attempt = 0
+
+    def next_delay(self, retry_after: Optional[str] = None) -> Optional[float]:
+        """Seconds to sleep before the next attempt, or None if the budget is spent."""
+        if self.attempt >= self.max_retries:
+            return None
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** self.attempt))
+        if delay > self.remaining_delay:
+            return None
+        self.attempt += 1
+        self.remaining_delay -= delay
+        return delay
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds (HTTP-date values are ignored)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,203 @@
+import copy
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import CancelledError, Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.deadline import run_within_deadline
+from app.core.redis_client import redis_client, run_redis
+
+# Releases the lock only if we still own it
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls so only one upstream request is in flight per key.
+    In-process callers await the leader's result; with distributed=True a short Redis lock
+    extends this across API and Celery processes (results must be JSON-serializable).
+    Followers always get a deep copy of the leader's result, or its exception; if the leader is
+    cancelled instead, the followers run the call again with one of them leading.
+    """
+    def __init__(self, namespace: str, lock_ttl: float, redis=redis_client):
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.redis = redis
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._sync_calls: Dict[str, Future] = {}
+        self._sync_lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a key from normalized request parameters."""
+        raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _lock_key(self, key: str) -> str:
+        return f"singleflight:{self.namespace}:lock:{key}"
+
+    def _result_key(self, key: str) -> str:
+        return f"singleflight:{self.namespace}:result:{key}"
+
+    # --- Async ---
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], distributed: bool = False) -> Any:
+        """Run fn once for all concurrent callers with the same key."""
+        call_key = (id(asyncio.get_running_loop()), key)
+        while True:
+            existing = self._async_calls.get(call_key)
+            if existing is None:
+                break
+            try:
+                # A follower gives up at its own request deadline; the leader carries on for the others
+                return copy.deepcopy(await run_within_deadline(asyncio.shield(existing), f"{self.namespace} single-flight wait"))
+            except asyncio.CancelledError:
+                if not existing.cancelled() or asyncio.current_task().cancelling():
+                    raise  # This caller was cancelled, not the leader
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[call_key] = future
+        try:
+            if distributed:
+                result = await self._run_distributed(key, fn)
+            else:
+                result = await fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled (e.g. the client went away) rather than failed: followers retry instead of inheriting it
+            future.cancel()
+            raise
+        finally:
+            if self._async_calls.get(call_key) is future:
+                del self._async_calls[call_key]
+
+    async def _run_distributed(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Redis calls go through run_redis so coordination never blocks the event loop
+        token = await run_redis(self._acquire, key)
+        if token is None:
+            found, result = await self._wait_for_leader(key)
+            if found:
+                return result
+            return await fn()
+        try:
+            result = await fn()
+            await run_redis(self._publish, key, result)
+            return result
+        finally:
+            await run_redis(self._release, key, token)
+
+    async def _wait_for_leader(self, key: str) -> Tuple[bool, Any]:
+        deadline = time.monotonic() + self.lock_ttl
+        while time.monotonic() < deadline:
+            found, result, leader_alive = await run_redis(self._poll, key)
+            if found or not leader_alive:
+                return found, result
+            await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+        return False, None
+
+    # --- Sync ---
+
+    def do_sync(self, key: str, fn: Callable[[], Any], distributed: bool = False) -> Any:
+        """Blocking variant of do() for sync callers (threads, Celery tasks)."""
+        while True:
+            with self._sync_lock:
+                existing = self._sync_calls.get(key)
+                if existing is None:
+                    future = Future()
+                    self._sync_calls[key] = future
+                    break
+            try:
+                return copy.deepcopy(existing.result())
+            except CancelledError:
+                continue  # The leader was interrupted; take over, or follow whoever did
+
+        try:
+            if distributed:
+                result = self._run_distributed_sync(key, fn)
+            else:
+                result = fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Interrupted rather than failed (e.g. SystemExit): followers retry instead of inheriting it
+            with self._sync_lock:
+                del self._sync_calls[key]
+            future.cancel()
+            raise
+        finally:
+            with self._sync_lock:
+                if self._sync_calls.get(key) is future:
+                    del self._sync_calls[key]
+
+    def _run_distributed_sync(self, key: str, fn: Callable[[], Any]) -> Any:
+        token = self._acquire(key)
+        if token is None:
+            deadline = time.monotonic() + self.lock_ttl
+            while time.monotonic() < deadline:
+                found, result, leader_alive = self._poll(key)
+                if found:
+                    return result
+                if not leader_alive:
+                    break
+                time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+            return fn()
+        try:
+            result = fn()
+            self._publish(key, result)
+            return result
+        finally:
+            self._release(key, token)
+
+    # --- Redis coordination ---
+
+    def _acquire(self, key: str) -> Optional[str]:
+        """Try to become the cross-process leader. Returns a lock token, or None if another process leads."""
+        token = uuid.uuid4().hex
+        try:
+            if self.redis.set(self._lock_key(key), token, nx=True, px=int(self.lock_ttl * 1000)):
+                return token
+            return None
+        except Exception:
+            # Redis unavailable: behave as leader without coordination
+            return ""
+
+    def _release(self, key: str, token: str) -> None:
+        if not token:
+            return
+        try:
+            self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, self._lock_key(key), token)
+        except Exception:
+            pass
+
+    def _publish(self, key: str, result: Any) -> None:
+        try:
+            self.redis.setex(self._result_key(key), settings.SINGLE_FLIGHT_RESULT_TTL, json.dumps(result))
+        except Exception:
+            pass
+
+    def _poll(self, key: str) -> Tuple[bool, Any, bool]:
+        """Check for a published result. Returns (found, result, leader_still_holds_lock)."""
+        try:
+            raw = self.redis.get(self._result_key(key))
+            if raw is not None:
+                return True, json.loads(raw), False
+            return False, None, bool(self.redis.exists(self._lock_key(key)))
+        except Exception:
+            return False, None, False
@@ -0,0 +1,386 @@
+import os
+import json
+import sqlite3
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.firestore import run_in_threadpool
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    original_language TEXT,
+    release_date TEXT,
+    popularity REAL DEFAULT 0,
+    vote_average REAL DEFAULT 0,
+    vote_count INTEGER DEFAULT 0,
+    adult INTEGER DEFAULT 0,
+    poster_path TEXT,
+    overview TEXT,
+    genre_ids TEXT,
+    details TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_movies_popularity ON movies (popularity DESC);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    movie_id INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL,
+    PRIMARY KEY (movie_id, genre_id)
+);
+CREATE INDEX IF NOT EXISTS idx_movie_genres_genre ON movie_genres (genre_id);
+CREATE TABLE IF NOT EXISTS tv_shows (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    original_language TEXT,
+    first_air_date TEXT,
+    popularity REAL DEFAULT 0,
+    vote_average REAL DEFAULT 0,
+    poster_path TEXT,
+    overview TEXT,
+    genre_ids TEXT,
+    details TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER NOT NULL,
+    media_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (id, media_type)
+);
+CREATE TABLE IF NOT EXISTS people (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    normalized_name TEXT,
+    popularity REAL DEFAULT 0,
+    known_for_department TEXT,
+    profile_path TEXT,
+    updated_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_people_normalized_name ON people (normalized_name);
+CREATE TABLE IF NOT EXISTS credits (
+    movie_id INTEGER NOT NULL,
+    person_id INTEGER NOT NULL,
+    credit_type TEXT NOT NULL,
+    job TEXT NOT NULL DEFAULT '',
+    character TEXT,
+    ord INTEGER,
+    PRIMARY KEY (movie_id, person_id, credit_type, job)
+);
+CREATE INDEX IF NOT EXISTS idx_credits_person ON credits (person_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_connections = threading.local()
+
+LIST_COLUMNS = "id, title, original_language, release_date, popularity, vote_average, vote_count, adult, poster_path, overview, genre_ids"
+
+def normalize_name(name: str) -> str:
+    """Normalize a person/title name for lookups: case-folded, accents stripped, single-spaced."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().replace(".", " ").split())
+
+class CatalogCRUD:
+    """
+    Data access layer for the local TMDB catalog mirror (embedded SQLite).
+    Populated by the catalog Celery tasks; read by TMDBService before falling back to the API.
+    """
+    def __init__(self, path: str = settings.TMDB_CATALOG_PATH):
+        self.path = path
+
+    @property
+    def available(self) -> bool:
+        """Whether the catalog is enabled and has been created by a sync job."""
+        return settings.TMDB_CATALOG_ENABLED and os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and path; WAL lets API readers proceed while a sync job writes
+        connections = getattr(_connections, "by_path", None)
+        if connections is None:
+            connections = _connections.by_path = {}
+        conn = connections.get(self.path)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            connections[self.path] = conn
+        return conn
+
+    @staticmethod
+    def _list_item(row: sqlite3.Row) -> Dict[str, Any]:
+        """Convert a movie row to the shape TMDB list endpoints return."""
+        return {
+            "id": row["id"],
+            "title": row["title"],
+            "original_language": row["original_language"],
+            "release_date": row["release_date"] or "",
+            "popularity": row["popularity"],
+            "vote_average": row["vote_average"],
+            "vote_count": row["vote_count"],
+            "adult": bool(row["adult"]),
+            "poster_path": row["poster_path"],
+            "overview": row["overview"] or "",
+            "genre_ids": json.loads(row["genre_ids"] or "[]"),
+        }
+
+    # --- Reads ---
+
+    async def get_movie_details(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        """Get full movie details (as returned by /movie/{id}) if the catalog has them."""
+        def fetch():
+            row = self._connect().execute("SELECT details FROM movies WHERE id = ?", (movie_id,)).fetchone()
+            return json.loads(row["details"]) if row and row["details"] else None
+        return await run_in_threadpool(fetch)
+
+    async def get_movies_details_bulk(self, movie_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Get full movie details for many IDs in one query, keyed by ID (IDs without details are skipped)."""
+        ids = [int(movie_id) for movie_id in movie_ids]
+        def fetch():
+            if not ids:
+                return {}
+            placeholders = ",".join("?" for _ in ids)
+            rows = self._connect().execute(
+                f"SELECT id, details FROM movies WHERE id IN ({placeholders}) AND details IS NOT NULL", ids
+            ).fetchall()
+            return {row["id"]: json.loads(row["details"]) for row in rows}
+        return await run_in_threadpool(fetch)
+
+    async def get_movies_by_genre(self, genre_id: int, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get the most popular catalog movies in a genre."""
+        def fetch():
+            rows = self._connect().execute(
+                f"SELECT {LIST_COLUMNS} FROM movies m JOIN movie_genres g ON g.movie_id = m.id "
+                "WHERE g.genre_id = ? AND m.adult = 0 AND m.details IS NOT NULL "
+                "ORDER BY m.popularity DESC LIMIT ? OFFSET ?",
+                (genre_id, limit, offset)
+            ).fetchall()
+            return [self._list_item(row) for row in rows]
+        return await run_in_threadpool(fetch)
+
+    async def get_movies_by_ids(self, movie_ids: Iterable[int], with_details: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get list-shaped entries for the given movie IDs (missing IDs are skipped). with_details also skips
+        adult titles and bare export rows, which have no overview, genres or rating yet.
+        """
+        ids = [int(movie_id) for movie_id in movie_ids]
+        condition = "adult = 0 AND details IS NOT NULL" if with_details else "title IS NOT NULL"
+        def fetch():
+            if not ids:
+                return []
+            placeholders = ",".join("?" for _ in ids)
+            rows = self._connect().execute(
+                f"SELECT {LIST_COLUMNS} FROM movies WHERE id IN ({placeholders}) AND {condition}", ids
+            ).fetchall()
+            by_id = {row["id"]: self._list_item(row) for row in rows}
+            return [by_id[movie_id] for movie_id in ids if movie_id in by_id]
+        return await run_in_threadpool(fetch)
+
+    async def get_movie_documents(self) -> List[Dict[str, Any]]:
+        """Text and genre/keyword data for every movie with an overview, for building the similarity index."""
+        def fetch():
+            rows = self._connect().execute(
+                "SELECT id, title, overview, genre_ids, details FROM movies WHERE overview IS NOT NULL AND overview != ''"
+            ).fetchall()
+            docs = []
+            for row in rows:
+                keywords = []
+                if row["details"]:
+                    details = json.loads(row["details"])
+                    keywords = [k["name"] for k in (details.get("keywords") or {}).get("keywords", []) if k.get("name")]
+                docs.append({
+                    "id": row["id"],
+                    "title": row["title"],
+                    "overview": row["overview"],
+                    "genre_ids": json.loads(row["genre_ids"] or "[]"),
+                    "keywords": keywords,
+                })
+            return docs
+        return await run_in_threadpool(fetch)
+
+    async def search_people(self, name: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find people whose normalized name matches exactly, most popular first."""
+        normalized = normalize_name(name)
+        def fetch():
+            rows = self._connect().execute(
+                "SELECT id, name, popularity, known_for_department, profile_path FROM people "
+                "WHERE normalized_name = ? ORDER BY popularity DESC LIMIT ?",
+                (normalized, limit)
+            ).fetchall()
+            return [dict(row) for row in rows]
+        return await run_in_threadpool(fetch)
+
+    async def get_tv_details(self, tv_id: int) -> Optional[Dict[str, Any]]:
+        """Get full TV show details (as returned by /tv/{id}) if the catalog has them."""
+        def fetch():
+            row = self._connect().execute("SELECT details FROM tv_shows WHERE id = ?", (tv_id,)).fetchone()
+            return json.loads(row["details"]) if row and row["details"] else None
+        return await run_in_threadpool(fetch)
+
+    async def list_ids_without_details(self, media_type: str, limit: int) -> List[int]:
+        """Most popular titles known only from the daily export (details not fetched yet)."""
+        query = {
+            "movie": "SELECT id FROM movies WHERE details IS NULL AND adult = 0 ORDER BY popularity DESC LIMIT ?",
+            "tv": "SELECT id FROM tv_shows WHERE details IS NULL ORDER BY popularity DESC LIMIT ?",
+        }[media_type]
+        def fetch():
+            return [row["id"] for row in self._connect().execute(query, (limit,)).fetchall()]
+        return await run_in_threadpool(fetch)
+
+    async def filter_existing_ids(self, media_type: str, media_ids: Iterable[int]) -> List[int]:
+        """The given IDs that the catalog mirrors, in their original order, checked in one query."""
+        ids = [int(media_id) for media_id in media_ids]
+        table = "movies" if media_type == "movie" else "tv_shows"
+        def fetch():
+            if not ids:
+                return []
+            # One JSON parameter instead of a placeholder per ID, so long change lists stay under SQLite's variable limit
+            rows = self._connect().execute(
+                f"SELECT id FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+            ).fetchall()
+            existing = {row["id"] for row in rows}
+            return [media_id for media_id in ids if media_id in existing]
+        return await run_in_threadpool(fetch)
+
+    async def get_sync_state(self, key: str) -> Optional[str]:
+        def fetch():
+            row = self._connect().execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+            return row["value"] if row else None
+        return await run_in_threadpool(fetch)
+
+    # --- Writes ---
+
+    async def set_sync_state(self, key: str, value: str) -> None:
+        def write():
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+        await run_in_threadpool(write)
+
+    async def upsert_genres(self, media_type: str, genres: List[Dict[str, Any]]) -> None:
+        def write():
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO genres (id, media_type, name) VALUES (?, ?, ?)",
+                    [(genre["id"], media_type, genre["name"]) for genre in genres]
+                )
+        await run_in_threadpool(write)
+
+    async def upsert_export_rows(self, media_type: str, rows: List[Dict[str, Any]]) -> None:
+        """Insert ID/popularity rows from a TMDB daily export without touching fetched details."""
+        now = datetime.utcnow().isoformat()
+        def write():
+            conn = self._connect()
+            with conn:
+                if media_type == "movie":
+                    conn.executemany(
+                        "INSERT INTO movies (id, title, adult, popularity, updated_at) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET popularity = excluded.popularity",
+                        [(r["id"], r.get("original_title"), int(bool(r.get("adult"))), r.get("popularity", 0), now) for r in rows]
+                    )
+                elif media_type == "tv":
+                    conn.executemany(
+                        "INSERT INTO tv_shows (id, name, popularity, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET popularity = excluded.popularity",
+                        [(r["id"], r.get("original_name"), r.get("popularity", 0), now) for r in rows]
+                    )
+                elif media_type == "person":
+                    conn.executemany(
+                        "INSERT INTO people (id, name, normalized_name, popularity, updated_at) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+                        "normalized_name = excluded.normalized_name, popularity = excluded.popularity",
+                        [(r["id"], r.get("name"), normalize_name(r.get("name", "")), r.get("popularity", 0), now) for r in rows]
+                    )
+        await run_in_threadpool(write)
+
+    async def upsert_movie(self, details: Dict[str, Any]) -> None:
+        """Store full movie details (ideally fetched with append_to_response=credits) plus its genres and credits."""
+        now = datetime.utcnow().isoformat()
+        movie_id = details["id"]
+        genre_ids = [genre["id"] for genre in details.get("genres", [])]
+        credits = details.get("credits") or {}
+        def write():
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO movies (id, title, original_language, release_date, popularity, "
+                    "vote_average, vote_count, adult, poster_path, overview, genre_ids, details, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        movie_id, details.get("title"), details.get("original_language"), details.get("release_date"),
+                        details.get("popularity", 0), details.get("vote_average", 0), details.get("vote_count", 0),
+                        int(bool(details.get("adult"))), details.get("poster_path"), details.get("overview"),
+                        json.dumps(genre_ids), json.dumps(details), now
+                    )
+                )
+                conn.execute("DELETE FROM movie_genres WHERE movie_id = ?", (movie_id,))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO movie_genres (movie_id, genre_id) VALUES (?, ?)",
+                    [(movie_id, genre_id) for genre_id in genre_ids]
+                )
+                if not credits:
+                    return
+                conn.execute("DELETE FROM credits WHERE movie_id = ?", (movie_id,))
+                people = credits.get("cast", []) + credits.get("crew", [])
+                conn.executemany(
+                    "INSERT INTO people (id, name, normalized_name, popularity, known_for_department, profile_path, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+                    "normalized_name = excluded.normalized_name, "
+                    "popularity = MAX(people.popularity, excluded.popularity), "
+                    "known_for_department = COALESCE(excluded.known_for_department, people.known_for_department), "
+                    "profile_path = COALESCE(excluded.profile_path, people.profile_path)",
+                    [
+                        (p["id"], p.get("name"), normalize_name(p.get("name", "")), p.get("popularity", 0),
+                         p.get("known_for_department"), p.get("profile_path"), now)
+                        for p in people
+                    ]
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO credits (movie_id, person_id, credit_type, job, character, ord) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(movie_id, c["id"], "cast", "Actor", c.get("character"), c.get("order")) for c in credits.get("cast", [])]
+                    + [(movie_id, c["id"], "crew", c.get("job") or "", None, None) for c in credits.get("crew", [])]
+                )
+        await run_in_threadpool(write)
+
+    async def upsert_tv_show(self, details: Dict[str, Any]) -> None:
+        now = datetime.utcnow().isoformat()
+        def write():
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tv_shows (id, name, original_language, first_air_date, popularity, "
+                    "vote_average, poster_path, overview, genre_ids, details, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        details["id"], details.get("name"), details.get("original_language"), details.get("first_air_date"),
+                        details.get("popularity", 0), details.get("vote_average", 0), details.get("poster_path"),
+                        details.get("overview"), json.dumps([g["id"] for g in details.get("genres", [])]),
+                        json.dumps(details), now
+                    )
+                )
+        await run_in_threadpool(write)
+
+    async def delete_title(self, media_type: str, media_id: int) -> None:
+        """Remove a title that TMDB no longer serves (deleted or flagged adult)."""
+        def write():
+            conn = self._connect()
+            with conn:
+                if media_type == "movie":
+                    conn.execute("DELETE FROM movies WHERE id = ?", (media_id,))
+                    conn.execute("DELETE FROM movie_genres WHERE movie_id = ?", (media_id,))
+                    conn.execute("DELETE FROM credits WHERE movie_id = ?", (media_id,))
+                else:
+                    conn.execute("DELETE FROM tv_shows WHERE id = ?", (media_id,))
+        await run_in_threadpool(write)
@@ -1,4 +1,6 @@
+import asyncio
 from typing import List, Dict, Any, Optional
+from app.core.deadline import without_deadline
 from app.core.firestore import get_firestore_client, run_in_threadpool
 from app.schemas.movie import Review, ReviewCreate, ReviewUpdate
 from app.schemas.user import ReviewStatus
@@ -6,11 +8,44 @@ from app.crud.collection_crud import CollectionCRUD
 from datetime import datetime
 import uuid
 
+# Taste statistics updates still running, by user; each one waits for the user's previous update
+_taste_stats_updates: Dict[str, asyncio.Task] = {}
+
 class ReviewCRUD:
     def __init__(self):
         self.db = get_firestore_client()
         self.collection = self.db.collection('reviews')
         self.collection_crud = CollectionCRUD()
+        self._taste_stats = None
+
+    async def _update_taste_stats(self, user_id: str, old_review: Optional[dict], new_review: Optional[dict]) -> None:
+        """Keep the user's statistical taste profile in step with their reviews; never fails the review write."""
+        try:
+            if self._taste_stats is None:
+                from app.services.taste_stats import TasteStatsService  # Imports ReviewCRUD itself
+                self._taste_stats = TasteStatsService()
+            await self._taste_stats.review_changed(user_id, old_review, new_review)
+        except Exception as e:
+            print(f"Error updating taste statistics for {user_id}: {e}")
+
+    def _schedule_taste_stats(self, user_id: str, old_review: Optional[dict], new_review: Optional[dict]) -> None:
+        """Update the taste statistics in the background so the review write returns without waiting on TMDB."""
+        previous = _taste_stats_updates.get(user_id)
+
+        async def run():
+            if previous is not None:
+                # Retracting a review must not overtake the update that applied it
+                await asyncio.wait([previous])
+            await self._update_taste_stats(user_id, old_review, new_review)
+
+        # Not bound by the request's deadline, which the update may outlive
+        task = asyncio.create_task(run(), context=without_deadline())
+        _taste_stats_updates[user_id] = task
+
+        def forget(done: asyncio.Task) -> None:
+            if _taste_stats_updates.get(user_id) is done:
+                del _taste_stats_updates[user_id]
+        task.add_done_callback(forget)
 
     async def create_review(self, user_id: str, review_data: ReviewCreate) -> dict:
         """Create a new review with optional collection associations."""
@@ -42,7 +77,8 @@ class ReviewCRUD:
                 collection = await self.collection_crud.get_collection_by_id(collection_id)
                 if collection and collection["user_id"] == user_id:
                     await self.collection_crud.add_review_to_collection(review_id, collection_id)
-        
+
+        self._schedule_taste_stats(user_id, None, review.dict())
         return review.dict()
 
     async def get_reviews_by_user(self, user_id: str, viewer_id: Optional[str] = None) -> list:
@@ -97,7 +133,9 @@ class ReviewCRUD:
             await run_in_threadpool(lambda: self.collection.document(review_id).update(update_dict))
             
             # Return updated review
-            return await self.get_review(review_id)
+            updated_review = await self.get_review(review_id)
+            self._schedule_taste_stats(user_id, {**existing_review, "review_id": review_id}, updated_review)
+            return updated_review
         except Exception:
             return None
 
@@ -114,6 +152,7 @@ class ReviewCRUD:
                 return False
             
             await run_in_threadpool(lambda: self.collection.document(review_id).delete())
+            self._schedule_taste_stats(user_id, {**existing_review, "review_id": review_id}, None)
             return True
         except Exception:
             return False
@@ -163,6 +202,26 @@ class ReviewCRUD:
         
         return await run_in_threadpool(fetch)
 
+    async def get_all_movie_ratings(self) -> List[Dict[str, Any]]:
+        """(user_id, media_id, rating, updated_at) of every rated, watched movie review, for collaborative filtering."""
+        def fetch():
+            docs = self.collection.where("media_type", "==", "movie").select(
+                ["user_id", "media_id", "rating", "status", "updated_at"]
+            ).stream()
+            ratings = []
+            for doc in docs:
+                review = doc.to_dict()
+                if review.get("status", "watched") != "watched" or not review.get("rating"):
+                    continue
+                ratings.append({
+                    "user_id": review.get("user_id"),
+                    "media_id": review.get("media_id"),
+                    "rating": float(review["rating"]),
+                    "updated_at": review.get("updated_at"),
+                })
+            return ratings
+        return await run_in_threadpool(fetch)
+
     async def get_reviews_by_movie_and_authors(self, movie_id: int, author_ids: List[str]) -> List[Dict[str, Any]]:
         def fetch():
             docs = self.collection.where("movie_id", "==", movie_id).where("user_id", "in", author_ids).stream()
@@ -1,4 +1,5 @@
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
+from google.cloud import firestore
 from app.core.firestore import get_firestore_client, run_in_threadpool
 from datetime import datetime
 
@@ -8,9 +9,28 @@ class TasteProfileCRUD:
         self.taste_profiles_col = self.db.collection("tasteProfiles")
 
     async def save_taste_profile(self, user_id: str, data: Dict[str, Any]) -> None:
+        """Replace the given top-level fields; others (e.g. the review statistics) are kept."""
         data = dict(data)
         data["lastUpdatedAt"] = datetime.utcnow().isoformat()
-        await run_in_threadpool(lambda: self.taste_profiles_col.document(user_id).set(data))
+        await run_in_threadpool(lambda: self.taste_profiles_col.document(user_id).set(data, merge=list(data)))
+
+    async def update_taste_profile(self, user_id: str, build: Callable[[Optional[Dict[str, Any]]], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Read-modify-write in a transaction: build(current profile or None) returns the top-level fields to replace.
+        build may run more than once if the document changes concurrently. Returns the resulting profile.
+        """
+        ref = self.taste_profiles_col.document(user_id)
+
+        @firestore.transactional
+        def write(transaction):
+            snapshot = ref.get(transaction=transaction)
+            current = snapshot.to_dict() if snapshot.exists else None
+            fields = dict(build(current))
+            fields["lastUpdatedAt"] = datetime.utcnow().isoformat()
+            transaction.set(ref, fields, merge=list(fields))
+            return {**(current or {}), **fields}
+
+        return await run_in_threadpool(lambda: write(self.db.transaction()))
 
     async def get_taste_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get taste profile for a user."""
@@ -19,6 +39,18 @@ class TasteProfileCRUD:
             return doc.to_dict()
         return None
 
+    async def get_all_taste_profiles(self) -> List[Dict[str, Any]]:
+        """Get every stored taste profile."""
+        def fetch_profiles():
+            profiles = []
+            for doc in self.taste_profiles_col.stream():
+                profile = doc.to_dict()
+                profile.setdefault("user_id", doc.id)
+                profiles.append(profile)
+            return profiles
+
+        return await run_in_threadpool(fetch_profiles)
+
     async def delete_taste_profile(self, user_id: str) -> bool:
         """Delete taste profile for a user."""
         try:
@@ -0,0 +1,234 @@
+"""
+Local stand-in for an Azure OpenAI chat-completions deployment, for benchmarking the recommendation
+pipeline without paid, rate-limited calls.
+
+Replies are schema-valid JSON for the app's prompts (personal/group recommendations, single and batched
+taste profiles, moodboards), chosen deterministically from the prompt so identical prompts get identical
+answers. Replies longer than max_tokens are cut off mid-JSON with finish_reason "length", like a real
+deployment. Streaming (SSE, with a final usage event) is supported. Generation time scales with the reply
+length (--ms-per-token), a deployment tokens-per-minute limit can be enforced with real 429s, and the
+fault profile adds latency, 5xx and 429 injection (see faults.py). Prompt prefixes are cached the way
+Azure does it (1024+ token prompts, 128-token steps) and reported as usage.prompt_tokens_details.cached_tokens.
+
+    python -m app.devtools.fake_azure_openai --port 8802 --ms-per-token 15 --tokens-per-minute 120000 \\
+        --latency lognormal --latency-ms 400 --error-rate 0.01
+
+Point the app at it with AZURE_ENDPOINT=http://localhost:8802 (any AZURE_OPENAI_KEY and deployment name).
+"""
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import hashlib
+import argparse
+from typing import Any, Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.devtools.faults import FaultProfile, install_faults
+from app.devtools.fake_tmdb import MOVIE_GENRES, WORDS
+
+MOODS = ["uplifting", "dark", "thought-provoking", "cozy", "suspenseful", "romantic", "nostalgic", "adrenaline"]
+STREAM_CHUNK_CHARS = 16
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def _json_after(label: str, text: str) -> Any:
+    """The JSON array that follows `label` in a prompt (e.g. "Candidates: [...]")."""
+    start = text.find(label)
+    if start < 0:
+        return []
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text[start + len(label):].lstrip())
+        return value
+    except ValueError:
+        return []
+
+def _genres_in(text: str, rng: random.Random) -> List[str]:
+    found = [name for name in MOVIE_GENRES.values() if name.casefold() in text.casefold()]
+    return found[:3] or rng.sample(sorted(MOVIE_GENRES.values()), 3)
+
+def _taste_profile(text: str, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "favorite_genres": _genres_in(text, rng),
+        "favorite_actors": [],
+        "favorite_directors": [],
+        "mood_preferences": rng.sample(MOODS, 2),
+        "preferred_era": rng.choice(["modern", "classic", "mixed"]),
+        "preferred_language": rng.choice(["english", "foreign", "mixed"]),
+        "analysis_confidence": round(rng.uniform(0.6, 0.95), 2),
+    }
+
+def _ranked_candidates(text: str, rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    # Better-rated candidates tend to come first, with some noise
+    candidates = [c for c in _json_after("Candidates:", text) if isinstance(c, dict) and "i" in c]
+    candidates.sort(key=lambda c: -(float(c.get("r") or 5) + rng.uniform(-1.5, 1.5)))
+    return candidates[:count]
+
+def fake_reply(messages: List[Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+    """A plausible JSON answer to one of the app's prompts, recognized by its system message."""
+    system = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    user = " ".join(m.get("content") or "" for m in messages if m.get("role") == "user")
+
+    if "group movie recommendation" in system:
+        members = [m.get("u") for m in _json_after("Members:", user) if isinstance(m, dict)] or [1]
+        upper = re.search(r"Pick (\d+)(?:-(\d+))? candidates", user)
+        count = int(upper.group(2) or upper.group(1)) if upper else 10
+        return {"r": [
+            {"i": c["i"], "s": round(rng.uniform(0.6, 0.95), 2), "why": [f"Fits the group's taste for {rng.choice(WORDS)} stories"],
+             "u": sorted(rng.sample(members, rng.randint(1, len(members))))}
+            for c in _ranked_candidates(user, rng, count)
+        ]}
+    if "movie recommendation" in system:
+        count = re.search(r"Pick the (\d+)", user)
+        return {"r": [
+            {"i": c["i"], "s": round(rng.uniform(0.6, 0.95), 2), "why": f"Matches your taste for {rng.choice(WORDS)} stories"}
+            for c in _ranked_candidates(user, rng, int(count.group(1)) if count else 20)
+        ]}
+    if "EVERY user" in system:
+        sections = re.split(r"^### (U\d+)\s*$", user, flags=re.MULTILINE)[1:]
+        return {"profiles": [
+            {"u": label, **_taste_profile(body, rng)} for label, body in zip(sections[::2], sections[1::2])
+        ]}
+    if "taste" in system:
+        return _taste_profile(user, rng)
+    if "moodboard" in system:
+        colors = ["#%06x" % rng.randrange(0x1000000) for _ in range(5)]
+        tracks = [{"title": f"{rng.choice(WORDS).capitalize()} Theme", "artist": "Synthetic Orchestra", "genre": "score",
+                   "mood": rng.choice(MOODS)} for _ in range(3)]
+        # Covers both moodboard prompt shapes used by the app
+        return {
+            "images": [f"https://image.tmdb.org/t/p/w500/synthetic/{rng.randrange(10000)}.jpg" for _ in range(3)],
+            "music": tracks,
+            "colors": colors,
+            "color_palette": {"primary": colors[0], "secondary": colors[1], "accent": colors[2]},
+            "mood_keywords": rng.sample(MOODS, 3),
+            "music_suggestions": tracks,
+            "visual_elements": rng.sample(WORDS, 4),
+            "atmosphere_description": " ".join(rng.sample(WORDS, 12)).capitalize() + ".",
+        }
+    return {"result": "ok"}
+
+class PromptPrefixCache:
+    """Provider-side prompt caching: a prompt of 1024+ tokens reuses the longest prefix seen before, in 128-token steps."""
+    MIN_TOKENS = 1024
+    STEP_TOKENS = 128
+
+    def __init__(self, max_entries: int = 200000):
+        self.max_entries = max_entries
+        self.prefixes = set()
+
+    def cached_tokens(self, prompt_text: str) -> int:
+        """Tokens of this prompt that hit the cache; its own prefixes are cached for later prompts."""
+        if estimate_tokens(prompt_text) < self.MIN_TOKENS:
+            return 0
+        if len(self.prefixes) > self.max_entries:
+            self.prefixes.clear()
+        digest = hashlib.sha1()
+        cached, position, hit = 0, 0, True
+        for end in range(self.MIN_TOKENS * 4, len(prompt_text) + 1, self.STEP_TOKENS * 4):
+            digest.update(prompt_text[position:end].encode("utf-8"))
+            position = end
+            key = digest.copy().digest()
+            if hit and key in self.prefixes:
+                cached = end // 4
+            else:
+                hit = False
+                self.prefixes.add(key)
+        return cached
+
+class TokenWindow:
+    """Deployment tokens-per-minute limit over fixed one-minute windows, like Azure's TPM quota."""
+    def __init__(self, tokens_per_minute: int):
+        self.tokens_per_minute = tokens_per_minute
+        self.window = 0
+        self.used = 0
+
+    def reserve(self, tokens: int) -> float:
+        """0 when the tokens fit in this window, otherwise seconds until the next one."""
+        if self.tokens_per_minute <= 0:
+            return 0.0
+        now = time.time()
+        if int(now // 60) != self.window:
+            self.window, self.used = int(now // 60), 0
+        if self.used and self.used + tokens > self.tokens_per_minute:
+            return 60 - now % 60
+        self.used += tokens
+        return 0.0
+
+def create_app(ms_per_token: float = 0.0, tokens_per_minute: int = 0, faults: Optional[FaultProfile] = None,
+               prompt_cache: bool = True) -> FastAPI:
+    app = FastAPI(title="Fake Azure OpenAI")
+    install_faults(app, faults or FaultProfile())
+    tpm = TokenWindow(tokens_per_minute)
+    prefix_cache = PromptPrefixCache() if prompt_cache else None
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def chat_completions(deployment: str, request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        prompt_text = json.dumps(messages, ensure_ascii=False)
+        # Same prompt, same answer (like a temperature-0 model), so cache behaviour is measurable
+        rng = random.Random(hashlib.sha1(prompt_text.encode("utf-8")).hexdigest())
+        content = json.dumps(fake_reply(messages, rng), ensure_ascii=False)
+        finish_reason = "stop"
+        max_tokens = int(body.get("max_tokens") or 0)
+        if max_tokens and estimate_tokens(content) > max_tokens:
+            content, finish_reason = content[:max_tokens * 4], "length"
+        usage = {"prompt_tokens": estimate_tokens(prompt_text), "completion_tokens": estimate_tokens(content)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        wait = tpm.reserve(usage["prompt_tokens"] + int(body.get("max_tokens") or usage["completion_tokens"]))
+        if wait:
+            return JSONResponse(
+                {"error": {"code": "429", "message": "Requests to the deployment have exceeded the token rate limit."}},
+                status_code=429, headers={"Retry-After": str(int(wait) + 1)}
+            )
+
+        usage["prompt_tokens_details"] = {"cached_tokens": prefix_cache.cached_tokens(prompt_text) if prefix_cache else 0}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        if not body.get("stream"):
+            await asyncio.sleep(usage["completion_tokens"] * ms_per_token / 1000)
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": deployment,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": finish_reason}],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+
+        async def events():
+            def event(payload: Dict[str, Any]) -> str:
+                return f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': deployment, **payload})}\n\n"
+            for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                chunk = content[start:start + STREAM_CHUNK_CHARS]
+                await asyncio.sleep(estimate_tokens(chunk) * ms_per_token / 1000)
+                yield event({"choices": [{"index": 0, "delta": {"content": chunk}, "finish_reason": None}]})
+            yield event({"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            if include_usage:
+                yield event({"choices": [], "usage": usage})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Azure OpenAI chat completions with fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8802)
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="Generation time per completion token")
+    parser.add_argument("--tokens-per-minute", type=int, default=0, help="Deployment TPM limit answered with 429s; 0 disables")
+    parser.add_argument("--no-prompt-cache", action="store_true", help="Never report cached prompt tokens")
+    FaultProfile.add_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+    app = create_app(args.ms_per_token, args.tokens_per_minute, FaultProfile.from_args(args), not args.no_prompt_cache)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
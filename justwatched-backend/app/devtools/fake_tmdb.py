@@ -0,0 +1,305 @@
+"""
+Local stand-in for the TMDB API, for benchmarking and load-testing without the real (rate-limited) service.
+
+Responses come from, in order: recorded fixtures, the real API when recording (the response is saved as a
+fixture), then a deterministic synthetic catalog. Every request passes through the fault profile (latency,
+5xx and 429 injection; see faults.py).
+
+    # Record real responses while exercising the app, then replay them offline
+    python -m app.devtools.fake_tmdb --port 8801 --fixtures data/tmdb_fixtures --record --api-key $TMDB_API_KEY
+    python -m app.devtools.fake_tmdb --port 8801 --fixtures data/tmdb_fixtures --synthetic 0
+    # Synthetic catalog only, with lognormal latency and 2% throttling
+    python -m app.devtools.fake_tmdb --port 8801 --synthetic 10000 --latency lognormal --latency-ms 80 --rate-limit-rate 0.02
+
+Point the app at it with TMDB_BASE_URL=http://localhost:8801; the synthetic catalog also serves daily ID
+exports for the catalog bootstrap with TMDB_EXPORTS_BASE_URL=http://localhost:8801/p/exports.
+"""
+import os
+import gzip
+import re
+import json
+import random
+import itertools
+import hashlib
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from app.devtools.faults import FaultProfile, install_faults
+
+TMDB_API_URL = "https://api.themoviedb.org/3"
+PAGE_SIZE = 20
+NOT_FOUND = {"success": False, "status_code": 34, "status_message": "The resource you requested could not be found."}
+
+MOVIE_GENRES = {
+    28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy", 80: "Crime", 99: "Documentary", 18: "Drama",
+    10751: "Family", 14: "Fantasy", 36: "History", 27: "Horror", 10402: "Music", 9648: "Mystery", 10749: "Romance",
+    878: "Science Fiction", 10770: "TV Movie", 53: "Thriller", 10752: "War", 37: "Western",
+}
+LANGUAGES = ["en"] * 7 + ["fr", "ko", "ja", "es", "de", "it", "hi"]
+WORDS = (
+    "shadow river night city last storm empire silent heart road broken golden winter summer lost secret "
+    "dark light kingdom dream fire stone glass iron wolf star ocean garden memory echo signal frontier "
+    "midnight harbor crown ghost machine paradise desert thunder velvet mirror island hunter promise"
+).split()
+FIRST_NAMES = "Ava Ben Chloe Daniel Elena Felix Grace Hugo Iris Jonas Kira Liam Maya Noah Olga Pablo Rosa Sami Tara Victor".split()
+LAST_NAMES = "Adler Brooks Castillo Dorsey Eriksen Fontaine Garber Hale Ivanova Jensen Kato Laurent Moreau Novak Ortiz Park Quinn Rossi Sato Varga".split()
+
+def fixture_key(path: str, params: Dict[str, Any]) -> str:
+    """Fixture identity of a request: its path and query, minus credentials."""
+    query = sorted((k, str(v)) for k, v in params.items() if k != "api_key")
+    return hashlib.sha1(json.dumps([path, query]).encode("utf-8")).hexdigest()[:20]
+
+class FixtureStore:
+    """Recorded responses as one JSON file per request, grouped in directories by path."""
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _file(self, path: str, params: Dict[str, Any]) -> str:
+        folder = re.sub(r"[^A-Za-z0-9]+", "_", path.strip("/")) or "root"
+        return os.path.join(self.directory, folder, f"{fixture_key(path, params)}.json")
+
+    def get(self, path: str, params: Dict[str, Any]) -> Optional[Tuple[int, Any]]:
+        try:
+            with open(self._file(path, params), encoding="utf-8") as f:
+                fixture = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return fixture["status"], fixture["body"]
+
+    def put(self, path: str, params: Dict[str, Any], status: int, body: Any) -> None:
+        file = self._file(path, params)
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        params = {k: v for k, v in params.items() if k != "api_key"}
+        with open(file, "w", encoding="utf-8") as f:
+            json.dump({"path": path, "params": params, "status": status, "body": body}, f, ensure_ascii=False)
+
+def _page(items: List[Dict[str, Any]], page: Any) -> Dict[str, Any]:
+    page = max(1, int(page or 1))
+    return {
+        "page": page,
+        "results": items[(page - 1) * PAGE_SIZE:page * PAGE_SIZE],
+        "total_pages": max(1, -(-len(items) // PAGE_SIZE)),
+        "total_results": len(items),
+    }
+
+class SyntheticCatalog:
+    """Deterministic fake movies and people: the same size and seed always give the same catalog."""
+    def __init__(self, size: int = 5000, seed: int = 0):
+        self.seed = seed
+        self.people = [self._make_person(i) for i in range(1, max(50, size // 4) + 1)]
+        self._pools = {}
+        for department in ("Acting", "Directing"):
+            pool = [p for p in self.people if p["known_for_department"] == department]
+            self._pools[department] = (pool, list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(pool)))))
+        self.movies = [self._make_movie(i) for i in range(1, size + 1)]
+        self.by_id = {movie["id"]: movie for movie in self.movies}
+        self.popular = sorted(self.movies, key=lambda m: -m["popularity"])
+        self.credits_by_person: Dict[int, List[Dict[str, Any]]] = {}
+        for movie in self.popular:
+            people = movie["credits"]["cast"] + movie["credits"]["crew"]
+            for person_id in {person["id"] for person in people}:
+                self.credits_by_person.setdefault(person_id, []).append(movie)
+
+    def _make_person(self, person_id: int) -> Dict[str, Any]:
+        rng = random.Random(f"person:{self.seed}:{person_id}")
+        return {
+            "id": person_id,
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {person_id}",
+            "known_for_department": "Directing" if rng.random() < 0.15 else "Acting",
+            "popularity": round(rng.lognormvariate(1.5, 1.0), 3),
+            "profile_path": None,
+            "adult": False,
+        }
+
+    def _pick_people(self, rng: random.Random, count: int, department: str) -> List[Dict[str, Any]]:
+        # Zipf-weighted picks give a few prolific people and a long tail
+        pool, cum_weights = self._pools[department]
+        picked = {p["id"]: p for p in rng.choices(pool, cum_weights=cum_weights, k=count * 2)}
+        return list(picked.values())[:count]
+
+    def _make_movie(self, movie_id: int) -> Dict[str, Any]:
+        rng = random.Random(f"movie:{self.seed}:{movie_id}")
+        title = " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 3)))
+        year = min(2025, int(2026 - rng.expovariate(1 / 15)))
+        genre_ids = rng.sample(sorted(MOVIE_GENRES), rng.randint(1, 3))
+        cast = self._pick_people(rng, 8, "Acting")
+        directors = self._pick_people(rng, 1, "Directing")
+        return {
+            "id": movie_id,
+            "title": title,
+            "original_title": title,
+            "original_language": rng.choice(LANGUAGES),
+            "overview": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 40))).capitalize() + ".",
+            "release_date": f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "genre_ids": genre_ids,
+            "popularity": round(rng.lognormvariate(2.5, 1.2), 3),
+            "vote_average": round(min(9.5, max(2.0, rng.gauss(6.4, 1.1))), 1),
+            "vote_count": int(rng.lognormvariate(5, 1.8)),
+            "poster_path": f"/synthetic/{movie_id}.jpg",
+            "backdrop_path": None,
+            "adult": False,
+            "video": False,
+            "runtime": rng.randint(80, 170),
+            "credits": {
+                "cast": [{"id": p["id"], "name": p["name"], "character": rng.choice(WORDS).capitalize(), "order": i}
+                         for i, p in enumerate(cast)],
+                "crew": [{"id": p["id"], "name": p["name"], "job": "Director", "department": "Directing"} for p in directors],
+            },
+            "keywords": {"keywords": [{"id": WORDS.index(w), "name": w} for w in rng.sample(WORDS, rng.randint(3, 6))]},
+        }
+
+    @staticmethod
+    def list_item(movie: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in movie.items() if k not in ("credits", "keywords", "runtime")}
+
+    def details(self, movie: Dict[str, Any], append: str = "") -> Dict[str, Any]:
+        parts = set(filter(None, (append or "").split(",")))
+        details = {k: v for k, v in self.list_item(movie).items() if k != "genre_ids"}
+        details["genres"] = [{"id": g, "name": MOVIE_GENRES[g]} for g in movie["genre_ids"]]
+        details["runtime"] = movie["runtime"]
+        for part in parts & {"credits", "keywords"}:
+            details[part] = movie[part]
+        return details
+
+    def discover(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        movies = self.popular
+        for key, field in (("with_genres", "genre_ids"), ("with_cast", "cast"), ("with_crew", "crew")):
+            if not params.get(key):
+                continue
+            # Comma means AND, pipe means OR, as in the real API
+            groups = [{int(v) for v in part.split("|") if v.strip().isdigit()} for part in str(params[key]).split(",")]
+            if field == "genre_ids":
+                movies = [m for m in movies if all(group & set(m["genre_ids"]) for group in groups)]
+            else:
+                movies = [m for m in movies if all(group & {p["id"] for p in m["credits"][field]} for group in groups)]
+        if params.get("with_original_language"):
+            movies = [m for m in movies if m["original_language"] == params["with_original_language"]]
+        if params.get("vote_count.gte"):
+            movies = [m for m in movies if m["vote_count"] >= float(params["vote_count.gte"])]
+        if str(params.get("sort_by", "")).startswith("vote_average"):
+            movies = sorted(movies, key=lambda m: -m["vote_average"])
+        return _page([self.list_item(m) for m in movies], params.get("page"))
+
+    def trending(self, window: str, page: Any) -> Dict[str, Any]:
+        # Popularity with a per-window shuffle, so "day" and "week" differ but stay stable
+        rng = random.Random(f"trending:{self.seed}:{window}")
+        weights = {m["id"]: m["popularity"] * rng.uniform(0.5, 1.5) for m in self.popular[:500]}
+        movies = sorted(self.popular[:500], key=lambda m: -weights[m["id"]])
+        return _page([self.list_item(m) for m in movies], page)
+
+    def search_movies(self, query: str, page: Any) -> Dict[str, Any]:
+        words = query.casefold().split()
+        movies = [m for m in self.popular if all(w in m["title"].casefold() for w in words)]
+        return _page([{**self.list_item(m), "media_type": "movie"} for m in movies], page)
+
+    def search_people(self, query: str, page: Any) -> Dict[str, Any]:
+        words = query.casefold().split()
+        people = sorted((p for p in self.people if all(w in p["name"].casefold() for w in words)), key=lambda p: -p["popularity"])
+        results = [
+            {**p, "known_for": [self.list_item(m) for m in self.credits_by_person.get(p["id"], [])[:3]]}
+            for p in people
+        ]
+        return _page(results, page)
+
+    def export(self, name: str) -> Optional[bytes]:
+        """Gzipped daily ID export (one JSON object per line) for movie_ids, tv_series_ids or person_ids."""
+        if name.startswith("person_ids"):
+            rows = [{"id": p["id"], "name": p["name"], "popularity": p["popularity"], "adult": False} for p in self.people]
+        elif name.startswith(("movie_ids", "tv_series_ids")):
+            key = "original_title" if name.startswith("movie") else "original_name"
+            rows = [{"id": m["id"], key: m["title"], "popularity": m["popularity"], "adult": False, "video": False} for m in self.movies]
+        else:
+            return None
+        return gzip.compress("".join(json.dumps(row) + "\n" for row in rows).encode("utf-8"))
+
+    def handle(self, path: str, params: Dict[str, Any]) -> Tuple[int, Any]:
+        """(status, body) for a TMDB API path, or a 404 for anything the catalog doesn't model."""
+        parts = path.strip("/").split("/")
+        if parts[0] in ("movie", "tv") and len(parts) == 2 and parts[1].isdigit():
+            movie = self.by_id.get(int(parts[1]))
+            if movie is None:
+                return 404, NOT_FOUND
+            details = self.details(movie, params.get("append_to_response", ""))
+            if parts[0] == "tv":
+                details = {**details, "name": details.pop("title"), "first_air_date": details.pop("release_date")}
+            return 200, details
+        if parts == ["movie", "popular"]:
+            return 200, _page([self.list_item(m) for m in self.popular], params.get("page"))
+        if parts[:2] == ["trending", "movie"] and len(parts) == 3:
+            return 200, self.trending(parts[2], params.get("page"))
+        if parts == ["discover", "movie"]:
+            return 200, self.discover(params)
+        if parts == ["search", "movie"]:
+            return 200, self.search_movies(params.get("query", ""), params.get("page"))
+        if parts == ["search", "person"]:
+            return 200, self.search_people(params.get("query", ""), params.get("page"))
+        if parts == ["search", "multi"]:
+            movies = self.search_movies(params.get("query", ""), params.get("page"))
+            people = [{**p, "media_type": "person"} for p in self.search_people(params.get("query", ""), 1)["results"][:5]]
+            return 200, {**movies, "results": movies["results"] + people}
+        if len(parts) == 3 and parts[0] == "genre" and parts[2] == "list":
+            return 200, {"genres": [{"id": g, "name": name} for g, name in MOVIE_GENRES.items()]}
+        if len(parts) == 2 and parts[1] == "changes":
+            return 200, {"results": [], "page": 1, "total_pages": 1, "total_results": 0}
+        if parts == ["configuration"]:
+            return 200, {"images": {"secure_base_url": "https://image.tmdb.org/t/p/", "poster_sizes": ["w185", "w500", "original"]}}
+        return 404, NOT_FOUND
+
+def create_app(fixtures: Optional[str] = None, record: bool = False, upstream: str = TMDB_API_URL,
+               api_key: Optional[str] = None, catalog: Optional[SyntheticCatalog] = None,
+               faults: Optional[FaultProfile] = None) -> FastAPI:
+    """Fake TMDB app: fixtures first, then the real API when recording, then the synthetic catalog."""
+    app = FastAPI(title="Fake TMDB")
+    store = FixtureStore(fixtures) if fixtures else None
+    install_faults(app, faults or FaultProfile())
+
+    @app.get("/p/exports/{name}")
+    async def export(name: str):
+        data = catalog.export(name) if catalog is not None else None
+        if data is None:
+            return JSONResponse(NOT_FOUND, status_code=404)
+        return Response(data, media_type="application/gzip")
+
+    @app.get("/{path:path}")
+    async def serve(path: str, request: Request):
+        path = "/" + path
+        params = dict(request.query_params)
+        hit = store.get(path, params) if store else None
+        if hit is None and record:
+            async with httpx.AsyncClient(base_url=upstream, timeout=30) as client:
+                response = await client.get(path, params={**params, "api_key": api_key or params.get("api_key", "")})
+            if response.status_code in (200, 404):
+                hit = (response.status_code, response.json())
+                if store:
+                    store.put(path, params, *hit)
+            else:
+                return JSONResponse(response.json(), status_code=response.status_code)
+        if hit is None and catalog is not None:
+            hit = catalog.handle(path, params)
+        status, body = hit or (404, NOT_FOUND)
+        return JSONResponse(body, status_code=status)
+
+    return app
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake TMDB API with record/replay and fault injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8801)
+    parser.add_argument("--fixtures", help="Directory of recorded responses (replayed, and written when recording)")
+    parser.add_argument("--record", action="store_true", help="Fetch fixture misses from the real API and save them")
+    parser.add_argument("--upstream", default=TMDB_API_URL)
+    parser.add_argument("--api-key", default=os.getenv("TMDB_API_KEY"))
+    parser.add_argument("--synthetic", type=int, default=5000, help="Synthetic catalog size; 0 disables it")
+    parser.add_argument("--catalog-seed", type=int, default=0)
+    FaultProfile.add_arguments(parser)
+    args = parser.parse_args()
+
+    import uvicorn
+    catalog = SyntheticCatalog(args.synthetic, args.catalog_seed) if args.synthetic > 0 else None
+    app = create_app(args.fixtures, args.record, args.upstream, args.api_key, catalog, FaultProfile.from_args(args))
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
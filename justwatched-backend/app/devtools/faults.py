@@ -0,0 +1,104 @@
+import asyncio
+import random
+import argparse
+from typing import Any, Dict, Optional, Tuple
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+ERROR_STATUSES = (500, 502, 503)
+
+class FaultProfile:
+    """
+    Latency and failures injected into every request a fake upstream serves:
+    latency drawn from a distribution around latency_ms, a share of 5xx errors and a share of 429s.
+    """
+    def __init__(self, latency: str = "fixed", latency_ms: float = 0.0, latency_sigma: float = 0.5,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, retry_after: float = 1.0, seed: Optional[int] = None):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency}")
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+    def sample_latency(self) -> float:
+        """Seconds to delay one response; latency_ms is the mean (the median for lognormal)."""
+        mean = self.latency_ms / 1000
+        if mean <= 0:
+            return 0.0
+        if self.latency == "uniform":
+            return self.random.uniform(0, 2 * mean)
+        if self.latency == "exponential":
+            return self.random.expovariate(1 / mean)
+        if self.latency == "lognormal":
+            return self.random.lognormvariate(0, self.latency_sigma) * mean
+        return mean
+
+    def sample_fault(self) -> Optional[Tuple[int, Dict[str, str]]]:
+        """(status, headers) of an injected failure, or None to serve the request normally."""
+        roll = self.random.random()
+        if roll < self.rate_limit_rate:
+            return 429, {"Retry-After": f"{self.retry_after:g}"}
+        if roll < self.rate_limit_rate + self.error_rate:
+            return self.random.choice(ERROR_STATUSES), {}
+        return None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency, "latency_ms": self.latency_ms, "latency_sigma": self.latency_sigma,
+            "error_rate": self.error_rate, "rate_limit_rate": self.rate_limit_rate, "retry_after": self.retry_after,
+        }
+
+    def update(self, changes: Dict[str, Any]) -> None:
+        for key, value in changes.items():
+            if key in self.as_dict():
+                setattr(self, key, value if key == "latency" else float(value))
+
+    @staticmethod
+    def add_arguments(parser: argparse.ArgumentParser) -> None:
+        group = parser.add_argument_group("fault injection")
+        group.add_argument("--latency", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+        group.add_argument("--latency-ms", type=float, default=0.0, help="Mean latency (median for lognormal)")
+        group.add_argument("--latency-sigma", type=float, default=0.5, help="Shape of the lognormal distribution")
+        group.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 5xx")
+        group.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with a 429")
+        group.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+        group.add_argument("--seed", type=int, default=None)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "FaultProfile":
+        return cls(args.latency, args.latency_ms, args.latency_sigma, args.error_rate, args.rate_limit_rate, args.retry_after, args.seed)
+
+def install_faults(app: FastAPI, profile: FaultProfile) -> None:
+    """
+    Apply the profile to every request, and expose it at GET/PUT /_faults so a load test can
+    change latency or error rates mid-run without restarting the server.
+    """
+    app.state.faults = profile
+    app.state.served = {"requests": 0, "rate_limited": 0, "errors": 0}
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path == "/_faults":
+            return await call_next(request)
+        app.state.served["requests"] += 1
+        await asyncio.sleep(profile.sample_latency())
+        fault = profile.sample_fault()
+        if fault:
+            status, headers = fault
+            app.state.served["rate_limited" if status == 429 else "errors"] += 1
+            return JSONResponse({"error": {"code": str(status), "message": "Injected fault"}}, status_code=status, headers=headers)
+        return await call_next(request)
+
+    @app.get("/_faults")
+    async def get_faults():
+        return {"profile": profile.as_dict(), "served": app.state.served}
+
+    @app.put("/_faults")
+    async def put_faults(request: Request):
+        profile.update(await request.json())
+        return {"profile": profile.as_dict()}
@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from app.api.v1.api import api_router
 from app.api.v1.endpoints import websocket
 from app.core.config import settings
+from app.core.http_clients import get_tmdb_client, close_http_clients
 from app.middleware.token_middleware import TokenMiddleware
+from app.middleware.deadline_middleware import DeadlineMiddleware
+from app.agents.llm_metrics import render_metrics
 import os
 
 # Application Insights setup for production
@@ -19,9 +23,17 @@ if os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING"):
         connection_string=os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")
     ))
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the shared upstream HTTP clients for the lifetime of the app."""
+    get_tmdb_client()
+    yield
+    await close_http_clients()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Add Application Insights middleware if connection string is available
@@ -31,6 +43,9 @@ if os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING"):
 # Add token middleware for automatic token refresh
 app.add_middleware(TokenMiddleware)
 
+# Add request deadline middleware (outermost, so the budget covers the whole request)
+app.add_middleware(DeadlineMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 # Mount WebSocket routes directly on the main app
@@ -59,6 +74,12 @@ async def healthcheck():
             "environment": os.getenv("ENVIRONMENT", "development")
         }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (LLM latency, tokens, cost, retries and parse paths)."""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 @app.get("/")
 async def root():
     """Root endpoint."""
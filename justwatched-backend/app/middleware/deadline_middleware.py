@@ -0,0 +1,55 @@
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, deadline_scope
+
+class DeadlineMiddleware:
+    """Middleware giving every HTTP request a time budget that downstream TMDB, LLM and Firestore calls honor."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope, receive)
+        budget = self._budget(request)
+        response_started = False
+
+        async def send_tracking(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        with deadline_scope(budget):
+            try:
+                await self.app(scope, receive, send_tracking)
+            except DeadlineExceeded as e:
+                if response_started:
+                    raise
+                print(f"{request.method} {request.url.path} ran out of time ({budget}s): {e}")
+                response = JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+                await response(scope, receive, send)
+
+    @staticmethod
+    def _route_budget(path: str) -> float:
+        matches = [prefix for prefix in settings.REQUEST_DEADLINE_ROUTES if path.startswith(prefix)]
+        if not matches:
+            return settings.REQUEST_DEADLINE_SECONDS
+        return settings.REQUEST_DEADLINE_ROUTES[max(matches, key=len)]
+
+    def _budget(self, request: Request) -> Optional[float]:
+        """Seconds allowed for this request: the client's header if valid, else the route's configured budget."""
+        header = request.headers.get(settings.REQUEST_DEADLINE_HEADER)
+        if header:
+            try:
+                requested = float(header)
+                if requested > 0:
+                    return min(requested, settings.REQUEST_DEADLINE_MAX_SECONDS)
+            except ValueError:
+                pass
+        return self._route_budget(request.url.path) or None
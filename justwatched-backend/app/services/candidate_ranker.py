@@ -0,0 +1,140 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from app.core.config import settings
+from app.services.genre_registry import genre_registry
+
+# A movie matching this much favorite-genre weight gets the full genre score
+GENRE_SATURATION = 1.5
+
+def _int_id(value: Any) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+def _year(movie: Dict[str, Any]) -> float:
+    date = movie.get("release_date") or movie.get("first_air_date") or ""
+    return float(date[:4]) if date[:4].isdigit() else math.nan
+
+class CandidateArrays:
+    """Column-oriented view of candidate movies (TMDB list results) for vectorized scoring."""
+    def __init__(self, movies: List[Dict[str, Any]]):
+        n = len(movies)
+        self.movies = movies
+        self.ids = np.fromiter((_int_id(m.get("id", m.get("tmdb_id"))) for m in movies), dtype=np.int64, count=n)
+        self.rating = np.fromiter((float(m.get("vote_average") or 0) for m in movies), dtype=np.float32, count=n)
+        # Results without a vote count are treated as moderately reliable rather than unrated
+        self.votes = np.fromiter(
+            (float(m.get("vote_count", settings.RANKER_MIN_VOTES) or 0) for m in movies), dtype=np.float32, count=n
+        )
+        self.popularity = np.fromiter((float(m.get("popularity") or 0) for m in movies), dtype=np.float32, count=n)
+        self.year = np.fromiter((_year(m) for m in movies), dtype=np.float32, count=n)
+        self.english = np.fromiter(((m.get("original_language") or "en") == "en" for m in movies), dtype=bool, count=n)
+
+        # One column per genre ID present in the candidates
+        genre_lists = [[_int_id(g) for g in m.get("genre_ids") or []] for m in movies]
+        self.genre_columns = {g: i for i, g in enumerate(sorted({g for genres in genre_lists for g in genres}))}
+        self.genres = np.zeros((n, len(self.genre_columns)), dtype=np.float32)
+        rows = np.repeat(np.arange(n), [len(genres) for genres in genre_lists])
+        cols = np.fromiter((self.genre_columns[g] for genres in genre_lists for g in genres), dtype=np.int64, count=len(rows))
+        self.genres[rows, cols] = 1.0
+
+    def genre_weights(self, profile: Dict[str, Any]) -> np.ndarray:
+        """Per-column weight of the profile's favorite genres; earlier favorites weigh more."""
+        weights = np.zeros(len(self.genre_columns), dtype=np.float32)
+        favorites = profile.get("favorite_genres") or []
+        for rank, name in enumerate(favorites):
+            column = self.genre_columns.get(genre_registry.resolve(name)) if name else None
+            if column is not None:
+                weights[column] = max(weights[column], 1.0 - 0.5 * rank / max(1, len(favorites)))
+        return weights
+
+def _recency_scores(years: np.ndarray, era: Optional[str]) -> np.ndarray:
+    if era == "modern":
+        scores = np.clip((years - 1970) / 40, 0, 1)
+    elif era == "classic":
+        scores = np.clip((2010 - years) / 40, 0, 1)
+    else:
+        scores = np.full(years.shape, 0.5, dtype=np.float32)
+    return np.where(np.isnan(years), 0.5, scores)
+
+def _language_scores(english: np.ndarray, language: Optional[str]) -> np.ndarray:
+    if language == "english":
+        return english.astype(np.float32)
+    if language == "foreign":
+        return (~english).astype(np.float32)
+    return np.full(english.shape, 0.5, dtype=np.float32)
+
+def score_candidates(arrays: CandidateArrays, profiles: List[Dict[str, Any]]) -> np.ndarray:
+    """Weighted heuristic score per candidate; taste components are averaged over the given profiles."""
+    n = len(arrays.movies)
+    rated = arrays.rating[arrays.votes > 0]
+    mean_rating = float(rated.mean()) if rated.size else 6.0
+    m = settings.RANKER_MIN_VOTES
+    # Bayesian average pulls sparsely voted ratings toward the candidate mean
+    rating = (arrays.votes * arrays.rating + m * mean_rating) / (arrays.votes + m) / 10
+    popularity = np.log1p(arrays.popularity)
+    popularity = popularity / popularity.max() if n and popularity.max() > 0 else popularity
+
+    genre = np.zeros(n, dtype=np.float32)
+    recency = np.zeros(n, dtype=np.float32)
+    language = np.zeros(n, dtype=np.float32)
+    for profile in profiles or [{}]:
+        genre += np.minimum(1.0, arrays.genres @ arrays.genre_weights(profile) / GENRE_SATURATION)
+        recency += _recency_scores(arrays.year, profile.get("preferred_era"))
+        language += _language_scores(arrays.english, profile.get("preferred_language"))
+    members = max(1, len(profiles))
+
+    return (
+        settings.RANKER_WEIGHT_GENRE * genre / members
+        + settings.RANKER_WEIGHT_RATING * rating
+        + settings.RANKER_WEIGHT_POPULARITY * popularity
+        + settings.RANKER_WEIGHT_RECENCY * recency / members
+        + settings.RANKER_WEIGHT_LANGUAGE * language / members
+    )
+
+def rank_candidates(movies: List[Dict[str, Any]], profiles: List[Dict[str, Any]], watched_ids: Iterable[Any] = (), top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Best-first top-K of the candidates for the given taste profile(s), excluding watched and duplicate IDs.
+    Returned movies are copies with a "prerank_score" field.
+    """
+    if not movies:
+        return []
+    arrays = CandidateArrays(movies)
+    scores = score_candidates(arrays, profiles).astype(np.float64)
+
+    # Drop watched titles and repeated IDs (first occurrence wins)
+    keep = np.zeros(len(movies), dtype=bool)
+    keep[np.unique(arrays.ids, return_index=True)[1]] = True
+    keep &= arrays.ids >= 0
+    watched = np.fromiter((_int_id(w) for w in watched_ids), dtype=np.int64)
+    if watched.size:
+        keep &= ~np.isin(arrays.ids, watched)
+    scores[~keep] = -np.inf
+
+    k = min(top_k or len(movies), int(keep.sum()))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [{**movies[i], "prerank_score": round(float(scores[i]), 4)} for i in top]
+
+def heuristic_recommendations(ranked: List[Dict[str, Any]], limit: Optional[int] = None) -> Dict[str, Any]:
+    """Recommendations straight from the pre-ranker, for when the LLM is unavailable."""
+    recommendations = [
+        {
+            "tmdb_id": movie.get("tmdb_id", movie.get("id")),
+            "title": movie.get("title"),
+            "poster_path": movie.get("poster_path"),
+            "confidence_score": movie.get("prerank_score", 0),
+            "reasoning": "Picked by genre match, rating and popularity"
+        }
+        for movie in ranked[:limit]
+    ]
+    return {
+        "recommendations": recommendations,
+        "generated_at": datetime.utcnow().isoformat(),
+        "generation_method": "heuristic_ranker"
+    }
@@ -0,0 +1,194 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from app.core.config import settings
+
+def ratings_fingerprint(ratings: List[Dict[str, Any]]) -> str:
+    """Stable hash of the rating data, so an unchanged dataset can skip retraining."""
+    digest = hashlib.sha1()
+    for user_id, media_id, rating in sorted((str(r["user_id"]), str(r["media_id"]), r["rating"]) for r in ratings):
+        digest.update(f"{user_id}|{media_id}|{rating}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def build_rating_matrix(ratings: List[Dict[str, Any]]) -> Tuple[np.ndarray, sparse.csr_matrix]:
+    """
+    Sparse user x item matrix of mean-centered ratings (adjusted cosine), plus the item (movie) IDs per column.
+    Items with fewer than ITEM_CF_MIN_ITEM_RATINGS raters are left out.
+    """
+    latest: Dict[Tuple[str, int], Tuple[Any, float]] = {}
+    for r in ratings:
+        media_id = str(r.get("media_id", ""))
+        if not r.get("user_id") or not media_id.isdigit():
+            continue
+        key = (r["user_id"], int(media_id))
+        # A user with several reviews of the same movie counts once, with their latest rating
+        if key not in latest or str(r.get("updated_at") or "") >= str(latest[key][0] or ""):
+            latest[key] = (r.get("updated_at"), float(r["rating"]))
+
+    item_counts: Dict[int, int] = {}
+    for _, item in latest:
+        item_counts[item] = item_counts.get(item, 0) + 1
+    item_ids = np.asarray(sorted(i for i, c in item_counts.items() if c >= settings.ITEM_CF_MIN_ITEM_RATINGS), dtype=np.int64)
+    columns = {int(item): col for col, item in enumerate(item_ids)}
+    users: Dict[str, int] = {}
+    rows, cols, vals = [], [], []
+    for (user_id, item), (_, rating) in latest.items():
+        col = columns.get(item)
+        if col is None:
+            continue
+        rows.append(users.setdefault(user_id, len(users)))
+        cols.append(col)
+        vals.append(rating)
+
+    matrix = sparse.csr_matrix((np.asarray(vals, dtype=np.float32), (rows, cols)), shape=(len(users), len(item_ids)))
+    counts = np.diff(matrix.indptr)
+    means = np.asarray(matrix.sum(axis=1)).ravel() / np.maximum(counts, 1)
+    matrix.data -= np.repeat(means, counts).astype(np.float32)
+    return item_ids, matrix
+
+# Matrices shared with pool workers through the initializer, so each worker receives them once
+_worker_state: Dict[str, Any] = {}
+
+def _init_worker(normalized: sparse.csr_matrix, presence: sparse.csr_matrix) -> None:
+    _worker_state["normalized"] = normalized
+    _worker_state["normalized_t"] = normalized.T.tocsr()
+    _worker_state["presence"] = presence
+    _worker_state["presence_t"] = presence.T.tocsr()
+
+def _neighbours_for_range(bounds: Tuple[int, int]) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Top-N neighbours for items [start, end): cosine over centered ratings, shrunk by co-rater count."""
+    start, end = bounds
+    top_n = settings.ITEM_CF_NEIGHBOURS
+    similarity = (_worker_state["normalized_t"][start:end] @ _worker_state["normalized"]).tocsr()
+    common = (_worker_state["presence_t"][start:end] @ _worker_state["presence"]).tocsr()
+
+    # Shrinkage factor n / (n + lambda) per pair; pairs with too few co-raters get none
+    common.data = np.where(
+        common.data >= settings.ITEM_CF_MIN_COMMON_USERS, common.data / (common.data + settings.ITEM_CF_SHRINKAGE), 0
+    ).astype(np.float32)
+    common.eliminate_zeros()
+    shrunk = similarity.multiply(common).tocsr()
+
+    neighbours = np.full((end - start, top_n), -1, dtype=np.int32)
+    scores = np.zeros((end - start, top_n), dtype=np.float32)
+    for row in range(end - start):
+        cols = shrunk.indices[shrunk.indptr[row]:shrunk.indptr[row + 1]]
+        vals = shrunk.data[shrunk.indptr[row]:shrunk.indptr[row + 1]]
+        keep = (vals > 0) & (cols != start + row)
+        cols, vals = cols[keep], vals[keep]
+        if not len(cols):
+            continue
+        k = min(top_n, len(cols))
+        top = np.argpartition(-vals, k - 1)[:k]
+        top = top[np.argsort(-vals[top])]
+        neighbours[row, :k] = cols[top]
+        scores[row, :k] = vals[top]
+    return start, neighbours, scores
+
+def compute_item_neighbours(matrix: sparse.csr_matrix, workers: int = settings.ITEM_CF_WORKERS) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-N similar items per item, computed in item ranges across a process pool."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1
+    normalized = matrix.multiply(1 / norms).astype(np.float32).tocsr()
+    presence = matrix.copy()
+    presence.data = np.ones_like(presence.data)
+
+    n_items = matrix.shape[1]
+    chunk = settings.ITEM_CF_CHUNK_SIZE
+    ranges = [(start, min(start + chunk, n_items)) for start in range(0, n_items, chunk)]
+    neighbours = np.full((n_items, settings.ITEM_CF_NEIGHBOURS), -1, dtype=np.int32)
+    scores = np.zeros((n_items, settings.ITEM_CF_NEIGHBOURS), dtype=np.float32)
+
+    results = None
+    if workers > 1 and len(ranges) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(normalized, presence)) as pool:
+                results = list(pool.map(_neighbours_for_range, ranges))
+        except (AssertionError, OSError, RuntimeError) as e:
+            # e.g. daemonic Celery prefork children may not start their own processes
+            print(f"Process pool unavailable ({e}), computing item neighbours in-process")
+    if results is None:
+        _init_worker(normalized, presence)
+        results = [_neighbours_for_range(bounds) for bounds in ranges]
+        _worker_state.clear()
+
+    for start, chunk_neighbours, chunk_scores in results:
+        neighbours[start:start + len(chunk_neighbours)] = chunk_neighbours
+        scores[start:start + len(chunk_scores)] = chunk_scores
+    return neighbours, scores
+
+def save_item_neighbours(path: str, item_ids: np.ndarray, neighbours: np.ndarray, scores: np.ndarray, fingerprint: str) -> None:
+    """Write the neighbour table atomically (float16 scores keep it compact)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp_path, item_ids=item_ids, neighbours=neighbours, scores=scores.astype(np.float16), fingerprint=np.asarray(fingerprint)
+    )
+    os.replace(tmp_path, path)
+
+class ItemNeighbourIndex:
+    """
+    "Users who liked X also liked Y" lookups over the item-item table written by the nightly training task.
+    The file is re-read when it changes on disk.
+    """
+    def __init__(self, path: str = settings.ITEM_CF_INDEX_PATH):
+        self.path = path
+        self._item_ids: Optional[np.ndarray] = None
+        self._neighbours: Optional[np.ndarray] = None
+        self._scores: Optional[np.ndarray] = None
+        self._rows: Dict[int, int] = {}
+        self._mtime = None
+        self.fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return self._neighbours is not None
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with np.load(self.path) as data:
+                        self._item_ids = data["item_ids"]
+                        self._neighbours = data["neighbours"]
+                        self._scores = data["scores"].astype(np.float32)
+                        self.fingerprint = str(data["fingerprint"])
+                    self._rows = {int(item): row for row, item in enumerate(self._item_ids)}
+                    self._mtime = mtime
+                    print(f"Loaded item neighbours for {len(self._item_ids)} movies")
+        return self._neighbours is not None
+
+    @property
+    def available(self) -> bool:
+        return settings.ITEM_CF_ENABLED and self._ensure_loaded()
+
+    def also_liked(self, movie_ids: Iterable[int], limit: int = 20, weights: Optional[Iterable[float]] = None) -> List[Tuple[int, float]]:
+        """(movie_id, score) liked by the same users as the given movies, best first, excluding the seeds."""
+        if not self.available:
+            return []
+        movie_ids = [int(m) for m in movie_ids]
+        weights = list(weights) if weights is not None else [1.0] * len(movie_ids)
+        seeds = [(self._rows[m], w) for m, w in zip(movie_ids, weights) if m in self._rows]
+        if not seeds:
+            return []
+        rows = np.asarray([row for row, _ in seeds])
+        neighbours = self._neighbours[rows].ravel()
+        scores = (self._scores[rows] * np.asarray([w for _, w in seeds], dtype=np.float32)[:, None]).ravel()
+        valid = (neighbours >= 0) & ~np.isin(neighbours, rows)
+        totals = np.bincount(neighbours[valid], weights=scores[valid], minlength=len(self._item_ids))
+        k = min(limit, int((totals > 0).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-totals, k - 1)[:k]
+        top = top[np.argsort(-totals[top])]
+        return [(int(self._item_ids[i]), round(float(totals[i]), 4)) for i in top]
+
+# Shared by every TMDBService instance in the process
+item_neighbours = ItemNeighbourIndex()
@@ -0,0 +1,169 @@
+import re
+import json
+import time
+import difflib
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.core.redis_client import redis_client, run_redis
+
+REDIS_KEY = "tmdb:genres"
+MEDIA_TYPES = ("movie", "tv")
+
+# Official TMDB genre lists, used until (or if) the live lists can't be loaded
+DEFAULT_GENRES = {
+    "movie": {
+        28: "Action", 12: "Adventure", 16: "Animation", 35: "Comedy", 80: "Crime",
+        99: "Documentary", 18: "Drama", 10751: "Family", 14: "Fantasy", 36: "History",
+        27: "Horror", 10402: "Music", 9648: "Mystery", 10749: "Romance", 878: "Science Fiction",
+        10770: "TV Movie", 53: "Thriller", 10752: "War", 37: "Western",
+    },
+    "tv": {
+        10759: "Action & Adventure", 16: "Animation", 35: "Comedy", 80: "Crime", 99: "Documentary",
+        18: "Drama", 10751: "Family", 10762: "Kids", 9648: "Mystery", 10763: "News",
+        10764: "Reality", 10765: "Sci-Fi & Fantasy", 10766: "Soap", 10767: "Talk",
+        10768: "War & Politics", 37: "Western",
+    },
+}
+
+# Common (often LLM-produced) names mapped to an official genre name, per media type
+GENRE_SYNONYMS = {
+    "movie": {
+        "sci fi": "science fiction", "scifi": "science fiction", "sf": "science fiction",
+        "space": "science fiction", "cyberpunk": "science fiction", "dystopian": "science fiction",
+        "animated": "animation", "anime": "animation", "cartoon": "animation",
+        "documentaries": "documentary", "doc": "documentary", "docuseries": "documentary",
+        "suspense": "thriller", "psychological": "thriller", "heist": "crime", "noir": "crime",
+        "gangster": "crime", "detective": "mystery", "whodunit": "mystery",
+        "romantic": "romance", "romcom": "romance", "rom com": "romance", "love story": "romance",
+        "funny": "comedy", "feel good": "comedy", "uplifting": "comedy", "satire": "comedy", "parody": "comedy",
+        "kdrama": "drama", "korean drama": "drama", "korean": "drama", "melodrama": "drama", "coming of age": "drama",
+        "historical": "history", "period": "history", "biopic": "history", "biography": "history",
+        "musical": "music", "musicals": "music", "concert": "music",
+        "superhero": "action", "martial arts": "action", "spy": "action",
+        "slasher": "horror", "supernatural": "horror", "zombie": "horror", "scary": "horror",
+        "fairy tale": "fantasy", "magic": "fantasy", "kids": "family", "children": "family",
+        "cowboy": "western", "military": "war",
+    },
+    "tv": {
+        "action": "action and adventure", "adventure": "action and adventure",
+        "science fiction": "sci fi and fantasy", "sci fi": "sci fi and fantasy", "scifi": "sci fi and fantasy",
+        "fantasy": "sci fi and fantasy", "animated": "animation", "anime": "animation",
+        "kdrama": "drama", "korean drama": "drama", "soap opera": "soap", "reality tv": "reality",
+        "talk show": "talk", "war": "war and politics", "politics": "war and politics",
+        "romance": "drama", "thriller": "mystery", "suspense": "mystery", "children": "kids",
+        "funny": "comedy", "sitcom": "comedy", "documentaries": "documentary",
+    },
+}
+
+# Words that carry no genre meaning ("horror movies" -> "horror")
+_FILLER_WORDS = {"movie", "movies", "film", "films", "genre", "genres", "show", "shows", "series", "tv"}
+
+def normalize_genre_name(name: str) -> str:
+    """Lowercase, strip diacritics/punctuation and filler words ("Sci-Fi Movies" -> "sci fi")."""
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(ch for ch in name if not unicodedata.combining(ch)).casefold()
+    name = name.replace("&", " and ")
+    words = re.sub(r"[^a-z0-9]+", " ", name).split()
+    kept = [word for word in words if word not in _FILLER_WORDS]
+    return " ".join(kept or words)
+
+class GenreRegistry:
+    """
+    TMDB genre lists (movie and TV) loaded once per process and shared through Redis,
+    with name -> ID resolution (exact, synonym, contained name, then fuzzy) and ID -> name lookups.
+    """
+    def __init__(self, redis=redis_client):
+        self.redis = redis
+        self._genres: Dict[str, Dict[int, str]] = {}
+        self._index: Dict[str, Dict[str, int]] = {}
+        self._next_load_at = 0.0
+        self._set_genres({media_type: dict(genres) for media_type, genres in DEFAULT_GENRES.items()})
+
+    def _set_genres(self, genres: Dict[str, Dict[int, str]]) -> None:
+        index = {}
+        for media_type in MEDIA_TYPES:
+            names = {normalize_genre_name(name): genre_id for genre_id, name in genres[media_type].items()}
+            for synonym, target in GENRE_SYNONYMS[media_type].items():
+                target_id = names.get(normalize_genre_name(target))
+                if target_id is not None:
+                    names.setdefault(normalize_genre_name(synonym), target_id)
+            index[media_type] = names
+        self._genres, self._index = genres, index
+
+    async def ensure_loaded(self, tmdb_service) -> None:
+        """Load the live genre lists (Redis first, then TMDB) if they are missing or expired."""
+        if time.time() < self._next_load_at:
+            return
+        try:
+            genres = await run_redis(self._load_from_redis)
+            if genres is None:
+                genres = {}
+                for media_type in MEDIA_TYPES:
+                    genre_list = await tmdb_service.get_genre_list(media_type)
+                    # Live names win; defaults fill any gaps in a partial response
+                    genres[media_type] = {**DEFAULT_GENRES[media_type], **{genre["id"]: genre["name"] for genre in genre_list}}
+                await run_redis(self._save_to_redis, genres)
+            self._set_genres(genres)
+            self._next_load_at = time.time() + settings.GENRE_REGISTRY_TTL
+        except Exception as e:
+            # Keep the lists we have (defaults at worst) and try again a bit later
+            print(f"Error loading TMDB genre lists: {e}")
+            self._next_load_at = time.time() + settings.GENRE_REGISTRY_RETRY_INTERVAL
+
+    def _load_from_redis(self) -> Optional[Dict[str, Dict[int, str]]]:
+        try:
+            raw = self.redis.get(REDIS_KEY)
+        except Exception:
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return {media_type: {int(k): v for k, v in data[media_type].items()} for media_type in MEDIA_TYPES}
+
+    def _save_to_redis(self, genres: Dict[str, Dict[int, str]]) -> None:
+        try:
+            self.redis.setex(REDIS_KEY, settings.GENRE_REGISTRY_TTL, json.dumps(genres))
+        except Exception:
+            pass
+
+    def resolve(self, name: str, media_type: str = "movie") -> Optional[int]:
+        """Resolve a free-form genre name to a TMDB genre ID, or None if nothing matches well enough."""
+        index = self._index.get(media_type, self._index["movie"])
+        normalized = normalize_genre_name(name)
+        if not normalized:
+            return None
+        if normalized in index:
+            return index[normalized]
+
+        # Composite names ("psychological thriller", "dark comedy"): longest known name contained in it
+        padded = f" {normalized} "
+        contained = [known for known in index if f" {known} " in padded]
+        if contained:
+            return index[max(contained, key=len)]
+
+        close = difflib.get_close_matches(normalized, index.keys(), n=1, cutoff=settings.GENRE_FUZZY_CUTOFF)
+        return index[close[0]] if close else None
+
+    def genre_ids(self, media_type: str = "movie") -> List[int]:
+        return list(self._genres.get(media_type, {}))
+
+    def name_for(self, genre_id: int, media_type: str = "movie") -> Optional[str]:
+        try:
+            genre_id = int(genre_id)
+        except (TypeError, ValueError):
+            return None
+        name = self._genres.get(media_type, {}).get(genre_id)
+        if name is None:
+            # Some IDs only exist in the other list
+            other = "tv" if media_type == "movie" else "movie"
+            name = self._genres.get(other, {}).get(genre_id)
+        return name
+
+    def names_for(self, genre_ids: Iterable[int], media_type: str = "movie") -> List[str]:
+        """Map genre IDs to names for candidate payloads (unknown IDs are dropped)."""
+        names = (self.name_for(genre_id, media_type) for genre_id in genre_ids or [])
+        return [name for name in names if name]
+
+# Shared by every TMDBService instance in the process
+genre_registry = GenreRegistry()
@@ -0,0 +1,69 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.core.redis_client import redis_client, run_redis
+from app.celery_worker import celery_app
+
+REDIS_KEY_PREFIX = "tmdb:lists:"
+REFRESH_LOCK_PREFIX = "tmdb:lists:refreshing:"
+
+class MovieListStore:
+    """
+    Precomputed trending/popular/genre lists in Redis, filled by the precompute_movie_lists beat task.
+    Reads are stale-while-revalidate: past the soft TTL the stored copy is still served
+    while one background refresh is queued.
+    """
+    def __init__(self, redis=redis_client):
+        self.redis = redis
+
+    @staticmethod
+    def make_key(kind: str, params: Dict[str, Any]) -> str:
+        parts = [f"{k}={params[k]}" for k in sorted(params) if params[k] is not None]
+        return REDIS_KEY_PREFIX + ":".join([kind] + parts)
+
+    def get(self, kind: str, params: Dict[str, Any]) -> Optional[List[dict]]:
+        """Get a stored list, queueing a refresh if it is past its soft TTL. None if it was never computed."""
+        key = self.make_key(kind, params)
+        try:
+            raw = self.redis.get(key)
+        except Exception:
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        if entry["soft_expires_at"] <= time.time():
+            self._schedule_refresh(key, kind, params)
+        return entry["results"]
+
+    async def aget(self, kind: str, params: Dict[str, Any]) -> Optional[List[dict]]:
+        """get() for async callers; the Redis round trips and any refresh send run off the event loop."""
+        return await run_redis(self.get, kind, params)
+
+    def set(self, kind: str, params: Dict[str, Any], results: List[dict]) -> None:
+        now = time.time()
+        entry = {
+            "results": results,
+            "refreshed_at": now,
+            "soft_expires_at": now + settings.MOVIE_LISTS_SOFT_TTL,
+        }
+        try:
+            self.redis.setex(self.make_key(kind, params), settings.MOVIE_LISTS_HARD_TTL, json.dumps(entry))
+        except Exception as e:
+            print(f"Error storing precomputed {kind} list: {e}")
+
+    async def aset(self, kind: str, params: Dict[str, Any], results: List[dict]) -> None:
+        """set() for async callers; the Redis write runs off the event loop."""
+        await run_redis(self.set, kind, params, results)
+
+    def _schedule_refresh(self, key: str, kind: str, params: Dict[str, Any]) -> None:
+        # One refresh per list at a time, across all API and worker processes
+        try:
+            if not self.redis.set(REFRESH_LOCK_PREFIX + key, 1, nx=True, ex=settings.MOVIE_LISTS_REFRESH_LOCK_TTL):
+                return
+            celery_app.send_task("tasks.refresh_movie_list", args=[kind, params])
+        except Exception as e:
+            print(f"Error scheduling refresh of {key}: {e}")
+
+# Shared by every TMDBService instance in the process
+movie_lists = MovieListStore()
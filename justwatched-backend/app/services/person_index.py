@@ -0,0 +1,96 @@
+import json
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.redis_client import redis_client, run_redis
+from app.crud.catalog_crud import normalize_name
+
+REDIS_KEY = "tmdb:person_index"
+
+def pick_person(name: str, people: List[Dict[str, Any]], department: Optional[str] = None) -> Tuple[Optional[dict], float]:
+    """
+    Choose the most likely person for a name from search results and score the match (0-1).
+    Exact normalized name matches beat partial ones; a matching department and a clear popularity lead add confidence.
+    """
+    if not people:
+        return None, 0.0
+    normalized = normalize_name(name)
+    exact = [person for person in people if normalize_name(person.get("name", "")) == normalized]
+    pool = exact or people
+    confidence = 1.0 if exact else 0.5
+
+    if department:
+        in_department = [person for person in pool if person.get("known_for_department") == department]
+        if in_department:
+            pool = in_department
+        else:
+            confidence -= 0.2
+
+    ranked = sorted(pool, key=lambda person: person.get("popularity") or 0, reverse=True)
+    best = ranked[0]
+    if len(ranked) > 1 and (ranked[1].get("popularity") or 0) > 0.5 * (best.get("popularity") or 0):
+        confidence -= 0.2  # Two similarly popular people share the name
+    return best, round(max(confidence, 0.1), 2)
+
+class PersonIndex:
+    """
+    Persistent person-name -> TMDB person ID index in a Redis hash, with a small in-process copy.
+    Low-confidence matches and misses expire so they get re-resolved later; confident matches are kept.
+    Redis is only reached on a local miss or a write, and then off the event loop.
+    """
+    def __init__(self, redis=redis_client):
+        self.redis = redis
+        self._local: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_field(name: str, department: Optional[str] = None) -> str:
+        return f"{(department or 'any').lower()}|{normalize_name(name)}"
+
+    @staticmethod
+    def _is_current(entry: Dict[str, Any]) -> bool:
+        if entry["id"] is not None and entry["confidence"] >= settings.PERSON_INDEX_MIN_CONFIDENCE:
+            return True
+        return entry["checked_at"] + settings.PERSON_INDEX_RECHECK_AFTER > time.time()
+
+    async def lookup(self, name: str, department: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get the indexed entry for a name ({"id": None} for a known miss), or None if it needs resolving."""
+        field = self.make_field(name, department)
+        with self._lock:
+            entry = self._local.get(field)
+        if entry is None:
+            try:
+                raw = await run_redis(self.redis.hget, REDIS_KEY, field)
+            except Exception:
+                raw = None
+            if raw is None:
+                return None
+            entry = json.loads(raw)
+            self._remember(field, entry)
+        return entry if self._is_current(entry) else None
+
+    async def record(self, name: str, department: Optional[str], person: Optional[dict], confidence: float, source: str) -> Dict[str, Any]:
+        entry = {
+            "id": person["id"] if person else None,
+            "name": person.get("name") if person else name,
+            "confidence": confidence,
+            "source": source,
+            "checked_at": time.time(),
+        }
+        field = self.make_field(name, department)
+        self._remember(field, entry)
+        try:
+            await run_redis(self.redis.hset, REDIS_KEY, field, json.dumps(entry))
+        except Exception as e:
+            print(f"Error saving person index entry for {name}: {e}")
+        return entry
+
+    def _remember(self, field: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            if len(self._local) >= settings.PERSON_INDEX_LOCAL_MAX_ENTRIES:
+                self._local.clear()
+            self._local[field] = entry
+
+# Shared by every TMDBService instance in the process
+person_index = PersonIndex()
@@ -2,10 +2,15 @@ from app.crud.room_crud import RoomCRUD
 from app.crud.taste_profile_crud import TasteProfileCRUD
 from app.crud.review_crud import ReviewCRUD
 from app.websocket_manager import manager
+from app.core.config import settings
 from app.agents.azure_openai_agent import AzureOpenAIAgent
+from app.agents.prompt_compaction import build_group_prompt
 from app.services.tmdb_service import TMDBService
+from app.services.genre_registry import genre_registry
+from app.services.candidate_ranker import rank_candidates
+from app.services.taste_stats import TasteStatsService
+from app.celery_worker import celery_app
 from typing import List, Dict, Any, Optional
-import json
 
 class RoomService:
     def __init__(self):
@@ -14,6 +19,7 @@ class RoomService:
         self.review_crud = ReviewCRUD()
         self.ai_agent = AzureOpenAIAgent()
         self.tmdb_service = TMDBService()
+        self.taste_stats = TasteStatsService()
 
     async def create_room(self, room_data: dict, owner_id: str) -> dict:
         """Create a new room with the owner as the first participant."""
@@ -60,101 +66,21 @@ class RoomService:
         return taste_profiles
 
     async def ensure_taste_profile_for_user(self, user_id: str) -> dict:
-        """Ensure a user has a taste profile by analyzing their reviews if needed."""
+        """Ensure a user has a taste profile, building it from their review statistics (no LLM wait) if needed."""
         # Check if user already has a taste profile
         existing_profile = await self.taste_profile_crud.get_taste_profile(user_id)
         if existing_profile and existing_profile.get("favorite_genres"):
             return existing_profile
-        
-        # Get user's reviews for analysis
+
         reviews = await self.review_crud.get_reviews_by_user(user_id)
-        
-        if not reviews:
-            # Create basic profile for users with no reviews
-            basic_profile = {
-                "user_id": user_id,
-                "favorite_genres": [],
-                "favorite_actors": [],
-                "favorite_directors": [],
-                "mood_preferences": [],
-                "analysis_confidence": 0.0
-            }
-            await self.taste_profile_crud.save_taste_profile(user_id, basic_profile)
-            return basic_profile
-        
-        # Convert reviews to format expected by AI endpoint
-        reviews_for_analysis = []
-        for review in reviews:
-            # Get movie details from TMDB for better analysis
+        profile = await self.taste_stats.rebuild(user_id, reviews)
+        if reviews:
+            # LLM enrichment (moods and the like) happens in the background; the room doesn't wait for it
             try:
-                movie_details = await self.tmdb_service.get_movie_details(review.get("media_id"))
-                reviews_for_analysis.append({
-                    "movie_id": review.get("media_id"),
-                    "title": review.get("media_title", movie_details.get("title", "Unknown")),
-                    "rating": review.get("rating", 5),
-                    "review_text": review.get("review_text", ""),
-                    "genres": [genre["name"] for genre in movie_details.get("genres", [])],
-                    "actors": [cast["name"] for cast in movie_details.get("credits", {}).get("cast", [])[:5]],
-                    "directors": [crew["name"] for crew in movie_details.get("credits", {}).get("crew", []) 
-                                if crew.get("job") == "Director"][:3],
-                    "watched_date": review.get("created_at", "")
-                })
+                celery_app.send_task("tasks.generate_taste_profile", args=[user_id])
             except Exception as e:
-                print(f"Error getting movie details for {review.get('media_id')}: {e}")
-                # Use basic review data if TMDB fails
-                reviews_for_analysis.append({
-                    "movie_id": review.get("media_id"),
-                    "title": review.get("media_title", "Unknown"),
-                    "rating": review.get("rating", 5),
-                    "review_text": review.get("review_text", ""),
-                    "genres": [],
-                    "actors": [],
-                    "directors": [],
-                    "watched_date": review.get("created_at", "")
-                })
-        
-        # Use AI to analyze taste profile
-        try:
-            messages = [
-                {"role": "system", "content": (
-                    "You are a movie taste profile analyzer.\n"
-                    "Given a list of user reviews (with genres, actors, directors, ratings, and review text),\n"
-                    "analyze and return a strict JSON taste_profile object with these keys: user_id, favorite_genres, favorite_actors, favorite_directors, mood_preferences.\n"
-                    "Each value should be a list of strings, except user_id.\n"
-                    "Strictly output only JSON, no extra text."
-                )},
-                {"role": "user", "content": f"Reviews: {json.dumps(reviews_for_analysis)}"}
-            ]
-            
-            taste_profile = self.ai_agent.chat(messages)
-            
-            # Ensure proper format
-            analyzed_profile = {
-                "user_id": user_id,
-                "favorite_genres": taste_profile.get("favorite_genres", []),
-                "favorite_actors": taste_profile.get("favorite_actors", []),
-                "favorite_directors": taste_profile.get("favorite_directors", []),
-                "mood_preferences": taste_profile.get("mood_preferences", []),
-                "analysis_confidence": 0.8
-            }
-            
-            # Save the analyzed profile
-            await self.taste_profile_crud.save_taste_profile(user_id, analyzed_profile)
-            return analyzed_profile
-            
-        except Exception as e:
-            print(f"Error analyzing taste profile for {user_id}: {e}")
-            # Fallback to basic profile
-            basic_profile = {
-                "user_id": user_id,
-                "favorite_genres": [],
-                "favorite_actors": [],
-                "favorite_directors": [],
-                "mood_preferences": [],
-                "analysis_confidence": 0.0
-            }
-            await self.taste_profile_crud.save_taste_profile(user_id, basic_profile)
-            return basic_profile
+                print(f"Error queueing taste profile enrichment for {user_id}: {e}")
+        return profile
 
     async def process_room_recommendations(self, room_id: str) -> dict:
         """Process group recommendations for a room using the correct AI flow."""
@@ -213,50 +139,25 @@ class RoomService:
                 candidate_data = []
                 seen_movie_ids = set()
                 
-                for movie in candidate_movies[:25]:
+                for movie in rank_candidates(candidate_movies, taste_profiles, top_k=settings.RANKER_TOP_K_GROUP):
                     if movie["id"] not in seen_movie_ids:
                         candidate_data.append({
                             "tmdb_id": movie["id"],
                             "title": movie["title"],
                             "overview": movie.get("overview", ""),
                             "genre_ids": movie.get("genre_ids", []),
+                            "genres": genre_registry.names_for(movie.get("genre_ids", [])),
                             "release_date": movie.get("release_date", ""),
                             "poster_path": movie.get("poster_path"),
-                            "vote_average": movie.get("vote_average", 0)
+                            "vote_average": movie.get("vote_average", 0),
+                            "prerank_score": movie.get("prerank_score")
                         })
                         seen_movie_ids.add(movie["id"])
                 
-                # Generate AI-powered group recommendations
-                messages = [
-                    {"role": "system", "content": (
-                        "You are a group movie recommendation expert. You will receive a list of real movies from TMDB "
-                        "and multiple user taste profiles. Your task is to select 7-10 movies from the provided list "
-                        "that would appeal to the group.\n\n"
-                        "IMPORTANT RULES:\n"
-                        "1. Only use movies from the provided candidate list.\n"
-                        "2. Each movie can appear ONLY ONCE in your recommendations.\n"
-                        "3. Do not duplicate any movie titles or IDs.\n"
-                        "4. Select 7-10 unique movies.\n\n"
-                        "Return a JSON object with this exact structure:\n"
-                        "{\n"
-                        '  "recommendations": [\n'
-                        '    {\n'
-                        '      "tmdb_id": "movie_id_from_list",\n'
-                        '      "title": "movie_title_from_list",\n'
-                        '      "poster_path": "poster_path_from_list",\n'
-                        '      "group_score": 0.85,\n'
-                        '      "reasons": ["reason1", "reason2"],\n'
-                        '      "participants_who_liked": ["user_id1", "user_id2"]\n'
-                        '    }\n'
-                        '  ],\n'
-                        '  "generated_at": "timestamp"\n'
-                        "}\n\n"
-                        "CRITICAL: Ensure no duplicate tmdb_id values in the recommendations array."
-                    )},
-                    {"role": "user", "content": f"Group Taste Profiles: {json.dumps(taste_profiles, ensure_ascii=False)}\n\nCandidate Movies: {json.dumps(candidate_data, ensure_ascii=False)}"}
-                ]
-                
-                result = self.ai_agent.chat(messages, temperature=0.6, max_tokens=6000)
+                # Generate AI-powered group recommendations from a compact, token-budgeted prompt
+                prompt = build_group_prompt(taste_profiles, candidate_data)
+                result = await self.ai_agent.achat(prompt.messages, temperature=0.6, max_tokens=settings.LLM_RECOMMENDATION_MAX_TOKENS, task_type="group_recommendations", priority="interactive")
+                result = prompt.expand(result)
                 
                 print(f"AI response type: {type(result)}")
                 print(f"AI response: {result}")
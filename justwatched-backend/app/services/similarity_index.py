@@ -0,0 +1,166 @@
+import os
+import re
+import zlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+from app.core.config import settings
+
+TOKEN_RE = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have he her his in into is it its of on or she that the their them "
+    "they this to was when where which while who whom will with after before about over under one two his her out "
+    "up down only own so than too very can just their what there been were".split()
+)
+# Extra weight for structured terms relative to overview words
+FIELD_WEIGHTS = {"genre": 2.0, "keyword": 1.5, "title": 1.0, "text": 1.0}
+
+def _feature(term: str) -> int:
+    # crc32 rather than hash(): feature ids must be identical in every process that loads the index
+    return zlib.crc32(term.encode("utf-8")) % settings.SIMILARITY_HASH_FEATURES
+
+def document_terms(doc: Dict[str, Any]) -> Dict[int, float]:
+    """Hashed term counts for one movie: overview/title unigrams and bigrams, plus genre and keyword terms."""
+    counts: Dict[int, float] = {}
+
+    def add(term: str, weight: float) -> None:
+        feature = _feature(term)
+        counts[feature] = counts.get(feature, 0.0) + weight
+
+    for field, text in (("text", doc.get("overview")), ("title", doc.get("title"))):
+        words = [w for w in TOKEN_RE.findall((text or "").casefold()) if w not in STOPWORDS]
+        for i, word in enumerate(words):
+            add(word, FIELD_WEIGHTS[field])
+            if i:
+                add(f"{words[i - 1]} {word}", FIELD_WEIGHTS[field])
+    for genre_id in doc.get("genre_ids") or []:
+        add(f"genre:{genre_id}", FIELD_WEIGHTS["genre"])
+    for keyword in doc.get("keywords") or []:
+        add(f"kw:{str(keyword).casefold()}", FIELD_WEIGHTS["keyword"])
+    return counts
+
+def build_similarity_matrix(docs: List[Dict[str, Any]]) -> Tuple[np.ndarray, sparse.csr_matrix, np.ndarray]:
+    """TF-IDF (sublinear TF, smoothed IDF) over hashed terms, rows L2-normalized so a dot product is cosine similarity."""
+    rows, cols, vals, ids = [], [], [], []
+    for doc in docs:
+        terms = document_terms(doc)
+        if not terms:
+            continue
+        row = len(ids)
+        ids.append(int(doc["id"]))
+        rows.extend([row] * len(terms))
+        cols.extend(terms.keys())
+        vals.extend(terms.values())
+    n_features = settings.SIMILARITY_HASH_FEATURES
+    tf = sparse.csr_matrix(
+        (np.asarray(vals, dtype=np.float32), (np.asarray(rows), np.asarray(cols))),
+        shape=(len(ids), n_features), dtype=np.float32
+    )
+    tf.data = 1 + np.log(tf.data)
+    df = np.bincount(tf.indices, minlength=n_features)
+    idf = (np.log((1 + len(ids)) / (1 + df)) + 1).astype(np.float32)
+    matrix = tf.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix = sparse.diags(1 / norms).dot(matrix).astype(np.float32).tocsr()
+    return np.asarray(ids, dtype=np.int64), matrix, idf
+
+def save_similarity_index(path: str, ids: np.ndarray, matrix: sparse.csr_matrix) -> None:
+    """Write the index atomically so readers never load a half-written file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, ids=ids, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr, shape=np.asarray(matrix.shape))
+    os.replace(tmp_path, path)
+
+def top_rated_movie_ids(reviews: List[Dict[str, Any]], limit: int) -> List[int]:
+    """Movie IDs of a user's highest-rated reviews, for seeding similar-movie candidates."""
+    rated = [
+        r for r in reviews
+        if r.get("media_type", "movie") == "movie" and str(r.get("media_id", "")).isdigit()
+        and (r.get("rating") or 0) >= settings.SIMILARITY_SEED_MIN_RATING
+    ]
+    rated.sort(key=lambda r: r.get("rating") or 0, reverse=True)
+    return [int(r["media_id"]) for r in rated[:limit]]
+
+class SimilarityIndex:
+    """
+    Content-based nearest neighbours over the catalog, loaded from the file written by the offline build task.
+    The file is re-read when it changes on disk; a query only touches the posting lists of its own terms.
+    """
+    def __init__(self, path: str = settings.SIMILARITY_INDEX_PATH):
+        self.path = path
+        self._ids: Optional[np.ndarray] = None
+        self._matrix: Optional[sparse.csr_matrix] = None
+        self._postings: Optional[sparse.csr_matrix] = None  # Transposed (feature x movie) for inverted-index lookups
+        self._rows: Dict[int, int] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self) -> bool:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return self._matrix is not None
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    with np.load(self.path) as data:
+                        shape = tuple(int(x) for x in data["shape"])
+                        self._matrix = sparse.csr_matrix((data["data"], data["indices"], data["indptr"]), shape=shape)
+                        self._postings = self._matrix.T.tocsr()
+                        self._ids = data["ids"]
+                    self._rows = {int(movie_id): row for row, movie_id in enumerate(self._ids)}
+                    self._mtime = mtime
+                    print(f"Loaded similarity index with {len(self._ids)} movies")
+        return self._matrix is not None
+
+    @property
+    def available(self) -> bool:
+        return settings.SIMILARITY_INDEX_ENABLED and self._ensure_loaded()
+
+    def contains(self, movie_id: int) -> bool:
+        return self.available and int(movie_id) in self._rows
+
+    def _top(self, query: sparse.csr_matrix, exclude: Iterable[int], limit: int) -> List[Tuple[int, float]]:
+        # Only the posting lists of the query's own terms are touched
+        query = query.tocsr()
+        scores = np.asarray(self._postings[query.indices].T @ query.data).ravel()
+        for row in exclude:
+            scores[row] = -1.0
+        k = min(limit, int((scores > 0).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self._ids[i]), round(float(scores[i]), 4)) for i in top]
+
+    def similar(self, movie_id: int, limit: int = 20) -> List[Tuple[int, float]]:
+        """(movie_id, cosine similarity) of the movies closest to the given one, best first."""
+        if not self.available:
+            return []
+        row = self._rows.get(int(movie_id))
+        if row is None:
+            return []
+        return self._top(self._matrix[row], [row], limit)
+
+    def similar_to_many(self, movie_ids: Iterable[int], limit: int = 20, weights: Optional[Iterable[float]] = None) -> List[Tuple[int, float]]:
+        """Neighbours of the (weighted) centroid of several movies, excluding the seeds themselves."""
+        if not self.available:
+            return []
+        movie_ids = list(movie_ids)
+        weights = list(weights) if weights is not None else [1.0] * len(movie_ids)
+        pairs = [(self._rows[int(m)], w) for m, w in zip(movie_ids, weights) if int(m) in self._rows]
+        if not pairs:
+            return []
+        rows = [row for row, _ in pairs]
+        centroid = sparse.csr_matrix(np.asarray([w for _, w in pairs], dtype=np.float32)) @ self._matrix[rows]
+        norm = np.sqrt(centroid.multiply(centroid).sum())
+        if norm > 0:
+            centroid = centroid / norm
+        return self._top(centroid, rows, limit)
+
+# Shared by every TMDBService instance in the process
+similarity_index = SimilarityIndex()
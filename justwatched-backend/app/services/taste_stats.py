@@ -0,0 +1,212 @@
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from app.core.config import settings
+from app.crud.review_crud import ReviewCRUD
+from app.crud.taste_profile_crud import TasteProfileCRUD
+from app.services.tmdb_service import TMDBService
+
+HISTOGRAMS = ("genres", "actors", "directors", "eras", "languages")
+# Decades before this count toward a "classic" era preference
+CLASSIC_BEFORE = 1980
+# One side needs this much more weight than the other for a clear era/language preference
+PREFERENCE_MARGIN = 2.0
+# Profile fields derived from the statistics (see derive_profile)
+STATISTICAL_FIELDS = (
+    "favorite_genres", "favorite_actors", "favorite_directors", "preferred_era", "preferred_language", "analysis_confidence"
+)
+
+def _epoch(value: Any) -> float:
+    if isinstance(value, datetime):
+        return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+    if isinstance(value, str):
+        try:
+            return _epoch(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError:
+            pass
+    return time.time()
+
+def _decay(seconds: float) -> float:
+    return 0.5 ** (max(0.0, seconds) / (settings.TASTE_STATS_HALF_LIFE_DAYS * 86400))
+
+def review_weight(review: Dict[str, Any]) -> float:
+    """Signed weight of one review: ratings above the neutral point count for its movie's features, below against."""
+    if review.get("media_type", "movie") != "movie" or not str(review.get("media_id", "")).isdigit():
+        return 0.0
+    if review.get("status", "watched") == "watchlist":
+        return settings.TASTE_STATS_WATCHLIST_WEIGHT
+    rating = review.get("rating")
+    if not rating:
+        return settings.TASTE_STATS_UNRATED_WEIGHT
+    neutral = settings.TASTE_STATS_NEUTRAL_RATING
+    return round((float(rating) - neutral) / (5 - neutral), 4)
+
+def movie_features(details: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Histogram keys one movie contributes to: genres, top-billed actors, directors, decade and language."""
+    credits = details.get("credits") or {}
+    date = details.get("release_date") or ""
+    return {
+        "genres": [g["name"] for g in details.get("genres", []) if g.get("name")],
+        "actors": [c["name"] for c in credits.get("cast", [])[:settings.TASTE_STATS_ACTORS_PER_MOVIE] if c.get("name")],
+        "directors": [c["name"] for c in credits.get("crew", []) if c.get("job") == "Director" and c.get("name")][:3],
+        "eras": [f"{date[:3]}0s"] if date[:4].isdigit() else [],
+        "languages": [details["original_language"]] if details.get("original_language") else [],
+    }
+
+def empty_stats() -> Dict[str, Any]:
+    return {"as_of": time.time(), "histograms": {name: {} for name in HISTOGRAMS}, "applied": {}}
+
+def _shift(stats: Dict[str, Any], now: float) -> None:
+    """Decay every histogram to `now`; scores are always stored as of stats["as_of"]."""
+    factor = _decay(now - stats["as_of"])
+    for histogram in stats["histograms"].values():
+        for key in histogram:
+            histogram[key] *= factor
+    stats["as_of"] = now
+
+def _add(stats: Dict[str, Any], features: Dict[str, List[str]], amount: float, existing_only: bool = False) -> None:
+    for name, keys in features.items():
+        histogram = stats["histograms"].setdefault(name, {})
+        for key in keys:
+            if existing_only and key not in histogram:
+                continue
+            histogram[key] = histogram.get(key, 0.0) + amount
+
+def _prune(stats: Dict[str, Any]) -> None:
+    for name, histogram in stats["histograms"].items():
+        kept = sorted(((k, v) for k, v in histogram.items() if abs(v) >= 0.01), key=lambda kv: -abs(kv[1]))
+        stats["histograms"][name] = {k: round(v, 4) for k, v in kept[:settings.TASTE_STATS_MAX_FEATURES]}
+
+def apply_review(stats: Dict[str, Any], review: Dict[str, Any], features: Dict[str, List[str]], now: float, at: Optional[float] = None) -> None:
+    """Add one review's contribution (decayed from its write time) and remember it so it can be retracted."""
+    weight = review_weight(review)
+    if not weight or not features:
+        return
+    at = min(at if at is not None else _epoch(review.get("updated_at")), now)
+    _add(stats, features, weight * _decay(now - at))
+    stats["applied"][review["review_id"]] = {"w": weight, "at": at, "m": str(review["media_id"])}
+
+def retract_review(stats: Dict[str, Any], review_id: str, features: Dict[str, List[str]], now: float) -> None:
+    """
+    Remove what a previously applied review contributed, as decayed to now. Keys pruned since then are
+    left out, so retracting doesn't bring them back as stubs of the opposite sign.
+    """
+    entry = stats["applied"].pop(review_id, None)
+    if entry and features:
+        _add(stats, features, -entry["w"] * _decay(now - entry["at"]), existing_only=True)
+
+def _top(histogram: Dict[str, float], limit: int) -> List[str]:
+    return [k for k, v in sorted(histogram.items(), key=lambda kv: -kv[1]) if v > 0][:limit]
+
+def _preference(first: float, second: float, labels: tuple) -> str:
+    if first > 0 and first >= PREFERENCE_MARGIN * max(second, 0):
+        return labels[0]
+    if second > 0 and second >= PREFERENCE_MARGIN * max(first, 0):
+        return labels[1]
+    return "mixed"
+
+def derive_profile(stats: Dict[str, Any]) -> Dict[str, Any]:
+    """Taste profile fields read off the histograms, in the same shape the LLM analysis produces."""
+    histograms = stats["histograms"]
+    limit = settings.TASTE_STATS_FAVORITES
+    eras = histograms.get("eras", {})
+    classic = sum(v for k, v in eras.items() if k[:4].isdigit() and int(k[:4]) < CLASSIC_BEFORE)
+    modern = sum(v for k, v in eras.items() if k[:4].isdigit() and int(k[:4]) >= CLASSIC_BEFORE)
+    languages = histograms.get("languages", {})
+    english = languages.get("en", 0.0)
+    foreign = sum(v for k, v in languages.items() if k != "en")
+    reviews = len(stats["applied"])
+    return {
+        "favorite_genres": _top(histograms.get("genres", {}), limit),
+        "favorite_actors": _top(histograms.get("actors", {}), limit),
+        "favorite_directors": _top(histograms.get("directors", {}), limit),
+        "preferred_era": _preference(modern, classic, ("modern", "classic")),
+        "preferred_language": _preference(english, foreign, ("english", "foreign")),
+        "analysis_confidence": round(reviews / (reviews + 10), 2),
+    }
+
+class TasteStatsService:
+    """
+    Deterministic taste profiles: decayed, rating-weighted genre/actor/director/era/language histograms
+    updated incrementally on every review write, so readers never need an LLM to know a user's favorites.
+    """
+    def __init__(self):
+        self.taste_profile_crud = TasteProfileCRUD()
+        self.tmdb_service = TMDBService()
+
+    async def _features_by_movie(self, media_ids: Iterable[Any]) -> Dict[str, Dict[str, List[str]]]:
+        details_by_id = await self.tmdb_service.get_movies_details_bulk(media_ids, append=["credits"])
+        return {str(movie_id): movie_features(details) for movie_id, details in details_by_id.items()}
+
+    def _profile_update(self, user_id: str, existing: Optional[Dict[str, Any]], stats: Dict[str, Any]) -> Dict[str, Any]:
+        _prune(stats)
+        fields = {"user_id": user_id, "stats": stats}
+        derived = derive_profile(stats)
+        # A thin history shouldn't replace favorites an LLM already inferred from the same reviews
+        if (existing or {}).get("profile_source") == "llm" and len(stats["applied"]) < settings.TASTE_STATS_MIN_REVIEWS:
+            fields["analysis_confidence"] = max(derived["analysis_confidence"], existing.get("analysis_confidence") or 0)
+        else:
+            fields.update(derived, profile_source="statistical")
+        return fields
+
+    async def enrich(self, user_id: str, llm_profile: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store an LLM-generated profile as enrichment: its moods and other extras are always kept, but its favorites
+        and era/language only where the review statistics are still too thin to be trusted.
+        """
+        def build(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            fields = {**llm_profile, "user_id": user_id, "enriched_at": datetime.utcnow().isoformat()}
+            stats = (current or {}).get("stats")
+            if stats and len(stats.get("applied", {})) >= settings.TASTE_STATS_MIN_REVIEWS:
+                for key in STATISTICAL_FIELDS:
+                    fields.pop(key, None)
+            else:
+                fields["profile_source"] = "llm"
+            return fields
+
+        return await self.taste_profile_crud.update_taste_profile(user_id, build)
+
+    async def rebuild(self, user_id: str, reviews: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Recompute the statistics from all of a user's reviews and return the stored profile."""
+        if reviews is None:
+            reviews = await ReviewCRUD().get_reviews_by_user(user_id)
+        reviews = [r for r in reviews if r.get("review_id") and review_weight(r)]
+        features = await self._features_by_movie(r["media_id"] for r in reviews)
+        now = time.time()
+
+        def build(existing: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            stats = empty_stats()
+            stats["as_of"] = now
+            for review in reviews:
+                apply_review(stats, review, features.get(str(review["media_id"]), {}), now)
+            return self._profile_update(user_id, existing, stats)
+
+        return await self.taste_profile_crud.update_taste_profile(user_id, build)
+
+    async def review_changed(self, user_id: str, old_review: Optional[Dict[str, Any]], new_review: Optional[Dict[str, Any]]) -> None:
+        """Fold one review write into the stored statistics: old_review is retracted, new_review applied."""
+        if old_review and new_review and review_weight(old_review) == review_weight(new_review) \
+                and str(old_review.get("media_id")) == str(new_review.get("media_id")):
+            return  # e.g. only the review text changed
+
+        existing = await self.taste_profile_crud.get_taste_profile(user_id)
+        if not (existing or {}).get("stats"):
+            # First statistical update for this user: backfill from the full review history
+            await self.rebuild(user_id)
+            return
+
+        media_ids = {str(review.get("media_id")) for review in (old_review, new_review) if review and review_weight(review)}
+        features = await self._features_by_movie(media_ids)
+        now = time.time()
+
+        def build(current: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            stats = (current or {}).get("stats") or empty_stats()
+            _shift(stats, now)
+            if old_review:
+                entry = stats["applied"].get(old_review["review_id"])
+                retract_review(stats, old_review["review_id"], features.get(entry["m"] if entry else "", {}), now)
+            if new_review:
+                apply_review(stats, new_review, features.get(str(new_review.get("media_id")), {}), now, at=now)
+            return self._profile_update(user_id, current, stats)
+
+        await self.taste_profile_crud.update_taste_profile(user_id, build)
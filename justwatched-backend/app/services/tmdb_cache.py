@@ -0,0 +1,142 @@
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.redis_client import redis_client, run_redis
+
+REDIS_KEY_PREFIX = "tmdb:cache:"
+
+# TTL (seconds) per endpoint family; families not listed here are never cached
+FAMILY_TTLS = {
+    "details": settings.TMDB_CACHE_TTL_DETAILS,
+    "lists": settings.TMDB_CACHE_TTL_LISTS,
+    "discover": settings.TMDB_CACHE_TTL_DISCOVER,
+    "search": settings.TMDB_CACHE_TTL_SEARCH,
+    "person": settings.TMDB_CACHE_TTL_PERSON,
+}
+
+class TMDBResponseCache:
+    """
+    Two-tier cache for TMDB responses: a bounded in-process LRU in front of Redis.
+    Entries are kept past their TTL (for STALE_GRACE seconds) so they can be revalidated with ETags.
+    Redis is only reached on a local miss, and then off the event loop.
+    """
+    def __init__(self, max_entries: int = settings.TMDB_CACHE_MAX_ENTRIES, redis=redis_client):
+        self.max_entries = max_entries
+        self.redis = redis
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "negative_hits": 0,
+            "revalidated": 0,
+            "stale_served": 0,
+            "evictions": 0,
+            "redis_errors": 0,
+        }
+
+    @staticmethod
+    def make_key(path: str, params: Optional[dict] = None) -> str:
+        """Build a cache key from the endpoint path and its (non-secret) query params."""
+        params = {k: v for k, v in (params or {}).items() if k != "api_key"}
+        raw = json.dumps([path, params], sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_fresh(entry: Dict[str, Any]) -> bool:
+        return entry.get("expires_at", 0) > time.time()
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _set_local(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _read_redis(self, key: str) -> Optional[bytes]:
+        try:
+            return self.redis.get(REDIS_KEY_PREFIX + key)
+        except Exception:
+            self._count("redis_errors")
+            return None
+
+    def _write_redis(self, key: str, entry: Dict[str, Any], ttl: int) -> None:
+        try:
+            self.redis.setex(REDIS_KEY_PREFIX + key, ttl + settings.TMDB_CACHE_STALE_GRACE, json.dumps(entry))
+        except Exception:
+            self._count("redis_errors")
+
+    async def get(self, key: str, record_stats: bool = True) -> Optional[Dict[str, Any]]:
+        """Get a cached entry (possibly stale), checking the local tier before Redis."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            if record_stats:
+                self._count("local_hits" if self.is_fresh(entry) else "stale")
+            return entry
+
+        raw = await run_redis(self._read_redis, key)
+        if raw is None:
+            if record_stats:
+                self._count("misses")
+            return None
+
+        entry = json.loads(raw)
+        self._set_local(key, entry)
+        if record_stats:
+            self._count("redis_hits" if self.is_fresh(entry) else "stale")
+        return entry
+
+    async def set(self, key: str, status: int, body: Optional[str], etag: Optional[str], ttl: int) -> Dict[str, Any]:
+        """Store a response body (raw JSON text) or a negative (404) result in both tiers."""
+        entry = {
+            "status": status,
+            "body": body,
+            "etag": etag,
+            "expires_at": time.time() + ttl,
+        }
+        self._set_local(key, entry)
+        await run_redis(self._write_redis, key, entry, ttl)
+        return entry
+
+    async def touch(self, key: str, entry: Dict[str, Any], ttl: int) -> Dict[str, Any]:
+        """Extend a stale entry after a 304 Not Modified revalidation."""
+        self._count("revalidated")
+        return await self.set(key, entry["status"], entry.get("body"), entry.get("etag"), ttl)
+
+    def record_negative_hit(self) -> None:
+        self._count("negative_hits")
+
+    def record_stale_served(self) -> None:
+        """Count a stale entry served because TMDB was failing or the circuit was open."""
+        self._count("stale_served")
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters for this process, for tuning cache sizes and TTLs."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["local_entries"] = len(self._entries)
+        stats["max_entries"] = self.max_entries
+        lookups = stats["local_hits"] + stats["redis_hits"] + stats["stale"] + stats["misses"]
+        stats["hit_rate"] = round((stats["local_hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+# Shared by every TMDBService instance in the process
+tmdb_cache = TMDBResponseCache()
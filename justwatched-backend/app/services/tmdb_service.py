@@ -1,153 +1,444 @@
+import json
+import asyncio
 import httpx
+from typing import Dict, Iterable, List, Optional
 from app.core.config import settings
+from app.core.deadline import DeadlineExceeded, check_deadline, deadline_allows, run_within_deadline, within_deadline
+from app.core.http_clients import get_tmdb_client
+from app.core.resilience import TokenBucket, CircuitBreaker, RetryBudget, RateLimitTimeout, CircuitOpenError
+from app.core.single_flight import SingleFlight
+from app.crud.catalog_crud import CatalogCRUD
+from app.services.genre_registry import genre_registry
+from app.services.movie_lists import movie_lists
+from app.services.person_index import person_index, pick_person
+from app.services.similarity_index import similarity_index
+from app.services.collaborative_filtering import item_neighbours
+from app.services.tmdb_cache import tmdb_cache, FAMILY_TTLS
 
 # TMDB API constants
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_BASE_URL = settings.TMDB_BASE_URL.rstrip('/')
+
+tmdb_flight = SingleFlight("tmdb", lock_ttl=settings.TMDB_SINGLE_FLIGHT_LOCK_TTL)
+tmdb_rate_limiter = TokenBucket("tmdb", rate=settings.TMDB_RATE_LIMIT_PER_SECOND, capacity=settings.TMDB_RATE_LIMIT_BURST)
+tmdb_breaker = CircuitBreaker(
+    "tmdb",
+    failure_threshold=settings.TMDB_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=settings.TMDB_BREAKER_RECOVERY_TIMEOUT
+)
 
 def get_tmdb_search_endpoint(search_type: str = 'movie') -> str:
-    """Get the appropriate TMDB search endpoint based on search type."""
+    """Get the appropriate TMDB search endpoint path based on search type."""
     if search_type == 'movie':
-        return f"{TMDB_BASE_URL}/search/movie"
+        return "/search/movie"
     elif search_type == 'tv':
-        return f"{TMDB_BASE_URL}/search/tv"
+        return "/search/tv"
     elif search_type == 'person':
-        return f"{TMDB_BASE_URL}/search/person"
+        return "/search/person"
     else:
-        return f"{TMDB_BASE_URL}/search/movie"
+        return "/search/movie"
 
 class TMDBService:
     def __init__(self):
         self.api_key = settings.TMDB_API_KEY
+        self.cache = tmdb_cache
+        self.catalog = CatalogCRUD()
+
+    async def _get(self, path: str, params: Optional[dict] = None, family: Optional[str] = None) -> dict:
+        """GET a TMDB endpoint through the shared pooled client, cached per endpoint family."""
+        request_params = dict(params or {})
+        ttl = FAMILY_TTLS.get(family) if settings.TMDB_CACHE_ENABLED else None
+        key = self.cache.make_key(path, request_params)
+
+        entry = await self.cache.get(key) if ttl else None
+        if entry and self.cache.is_fresh(entry):
+            if entry["status"] == 404:
+                self.cache.record_negative_hit()
+            return self._from_cache_entry(path, entry)
+
+        # Concurrent identical misses share one upstream request
+        entry = await tmdb_flight.do(
+            key,
+            lambda: self._fetch_entry(path, request_params, key, ttl, entry),
+            distributed=settings.SINGLE_FLIGHT_DISTRIBUTED
+        )
+        return self._from_cache_entry(path, entry)
+
+    async def _fetch_entry(self, path: str, params: dict, key: str, ttl: Optional[int], stale: Optional[dict]) -> dict:
+        """Fetch from TMDB (revalidating a stale entry if we have one) and return a cache entry."""
+        if ttl:
+            # Another process may have filled the cache while we waited for the flight
+            current = await self.cache.get(key, record_stats=False)
+            if current and self.cache.is_fresh(current):
+                return current
+
+        if not tmdb_breaker.allow():
+            if stale:
+                self.cache.record_stale_served()
+                return stale
+            raise CircuitOpenError(f"TMDB circuit open, skipping {path}")
+
+        headers = {}
+        if stale and stale.get("etag") and stale["status"] == 200:
+            headers["If-None-Match"] = stale["etag"]
+
+        request_params = dict(params)
+        request_params['api_key'] = self.api_key
+        try:
+            resp = await self._send(path, request_params, headers)
+            if not (ttl and resp.status_code in (304, 404)):
+                resp.raise_for_status()
+        except (httpx.HTTPError, RateLimitTimeout, CircuitOpenError, DeadlineExceeded) as e:
+            if stale:
+                # TMDB is failing, throttling us or too slow for this request; an expired answer beats no answer
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else type(e).__name__
+                print(f"TMDB request for {path} failed ({status}), serving stale cache entry")
+                self.cache.record_stale_served()
+                return stale
+            raise
+
+        if resp.status_code == 304 and stale:
+            return await self.cache.touch(key, stale, ttl)
+        if resp.status_code == 404:
+            return await self.cache.set(key, 404, None, None, settings.TMDB_CACHE_TTL_NEGATIVE)
+        if ttl:
+            return await self.cache.set(key, resp.status_code, resp.text, resp.headers.get("etag"), ttl)
+        return {"status": resp.status_code, "body": resp.text, "etag": None, "expires_at": 0}
+
+    async def _send(self, path: str, params: dict, headers: dict) -> httpx.Response:
+        """Rate-limited GET that retries 429s, 5xx and transport errors within a per-request retry budget."""
+        budget = RetryBudget(
+            max_retries=settings.TMDB_MAX_RETRIES,
+            base_delay=settings.TMDB_RETRY_BASE_DELAY,
+            max_delay=settings.TMDB_RETRY_MAX_DELAY,
+            max_delay_total=settings.TMDB_RETRY_BUDGET_SECONDS,
+        )
+        while True:
+            check_deadline(f"TMDB {path}")
+            await tmdb_rate_limiter.acquire(within_deadline(settings.TMDB_RATE_LIMIT_MAX_WAIT))
+            error, retry_after = None, None
+            try:
+                # Running out of request time is not TMDB's fault, so it doesn't count against the breaker
+                resp = await run_within_deadline(get_tmdb_client().get(path, params=params, headers=headers), f"TMDB {path}")
+            except httpx.TransportError as e:
+                error = e
+            else:
+                if resp.status_code != 429 and resp.status_code < 500:
+                    tmdb_breaker.record_success()
+                    return resp
+                retry_after = resp.headers.get("retry-after")
+            tmdb_breaker.record_failure()
+
+            delay = budget.next_delay(retry_after)
+            if delay is None or not deadline_allows(delay) or not tmdb_breaker.allow():
+                if error is not None:
+                    raise error
+                return resp
+            await asyncio.sleep(delay)
+
+    def _from_cache_entry(self, path: str, entry: dict) -> dict:
+        """Return a cached body, re-raising the original error for negative (404) entries."""
+        if entry["status"] == 404:
+            request = httpx.Request("GET", f"{TMDB_BASE_URL}{path}")
+            httpx.Response(404, request=request).raise_for_status()
+        return json.loads(entry["body"])
 
     async def search_movies(self, query: str, search_type: str = 'movie', page: int = 1, **kwargs):
         """Search movies with flexible parameters to handle AI assistant calls."""
         # Ignore unexpected parameters like watched_movie_ids
-        url = get_tmdb_search_endpoint(search_type)
-        params = {'api_key': self.api_key, 'query': query, 'page': page}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        return resp.json()
-
-    async def get_movie_details(self, movie_id: int):
-        url = f"{TMDB_BASE_URL}/movie/{movie_id}"
-        params = {'api_key': self.api_key}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        return resp.json()
+        path = get_tmdb_search_endpoint(search_type)
+        return await self._get(path, {'query': query, 'page': page}, family="search")
+
+    async def search_multi(self, query: str, include_adult: bool = False, page: int = 1):
+        """Search across movies, TV shows and people in a single request."""
+        params = {'query': query, 'include_adult': include_adult, 'page': page}
+        return await self._get("/search/multi", params, family="search")
+
+    async def get_movie_details(self, movie_id: int, append: Optional[List[str]] = None, use_catalog: bool = True):
+        """Get movie details, served from the local catalog when it has them (including any appended parts)."""
+        append = sorted(set(append or []))
+        if use_catalog:
+            details = await self._catalog_lookup(self.catalog.get_movie_details, movie_id)
+            if details and all(part in details for part in append):
+                return details
+        params = {'append_to_response': ",".join(append)} if append else None
+        return await self._get(f"/movie/{movie_id}", params, family="details")
+
+    async def get_movies_details_bulk(self, movie_ids: Iterable, append: Optional[List[str]] = None) -> Dict[int, dict]:
+        """
+        Get details for many movies, keyed by ID. IDs are deduped, served from the catalog
+        and response cache where possible, and the rest fetched concurrently. Failed lookups are left out.
+        """
+        append = sorted(set(append or []))
+        ids = list(dict.fromkeys(int(movie_id) for movie_id in movie_ids if str(movie_id).isdigit()))
+
+        details_by_id = {}
+        catalog_details = await self._catalog_lookup(self.catalog.get_movies_details_bulk, ids) or {}
+        for movie_id, details in catalog_details.items():
+            if all(part in details for part in append):
+                details_by_id[movie_id] = details
+
+        missing_ids = [movie_id for movie_id in ids if movie_id not in details_by_id]
+        semaphore = asyncio.Semaphore(settings.TMDB_BULK_DETAILS_CONCURRENCY)
+
+        async def fetch(movie_id: int) -> dict:
+            async with semaphore:
+                return await self.get_movie_details(movie_id, append=append, use_catalog=False)
+
+        results = await asyncio.gather(*[fetch(movie_id) for movie_id in missing_ids], return_exceptions=True)
+        for movie_id, result in zip(missing_ids, results):
+            if isinstance(result, BaseException):
+                print(f"Error getting movie details for {movie_id}: {result!r}")
+                continue
+            details_by_id[movie_id] = result
+        return details_by_id
+
+    async def get_tv_details(self, tv_id: int, use_catalog: bool = True):
+        if use_catalog:
+            details = await self._catalog_lookup(self.catalog.get_tv_details, tv_id)
+            if details:
+                return details
+        return await self._get(f"/tv/{tv_id}", family="details")
+
+    async def get_genre_list(self, media_type: str = 'movie'):
+        """Get the official TMDB genre list for movies or TV."""
+        data = await self._get(f"/genre/{media_type}/list", family="details")
+        return data.get("genres", [])
+
+    async def get_changes(self, media_type: str = 'movie', start_date: Optional[str] = None,
+                          end_date: Optional[str] = None, page: int = 1):
+        """Get IDs changed in a date window from the TMDB changes feed (never cached)."""
+        params = {'page': page}
+        if start_date:
+            params['start_date'] = start_date
+        if end_date:
+            params['end_date'] = end_date
+        return await self._get(f"/{media_type}/changes", params)
+
+    async def fetch_title_details(self, media_type: str, media_id: int):
+        """Fetch movie/TV details with credits and keywords straight from the API, bypassing catalog and cache (for catalog sync)."""
+        return await self._get(f"/{media_type}/{media_id}", {'append_to_response': 'credits,keywords'})
+
+    async def _catalog_lookup(self, fetch, *args):
+        """Read from the local catalog, treating a missing/broken catalog as a miss."""
+        if not self.catalog.available:
+            return None
+        try:
+            return await fetch(*(int(arg) if isinstance(arg, str) and arg.isdigit() else arg for arg in args))
+        except Exception as e:
+            print(f"Catalog lookup failed: {e}")
+            return None
+
+    async def get_configuration(self):
+        """Get the TMDB API configuration (used as a connectivity check)."""
+        return await self._get("/configuration")
 
     async def discover_movies(self, **params):
         """Discover movies with various filters."""
-        url = f"{TMDB_BASE_URL}/discover/movie"
-        params['api_key'] = self.api_key
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        return resp.json()
-
-    async def get_trending_movies(self, time_window: str = 'week', limit: int = 20):
-        """Get trending movies."""
-        url = f"{TMDB_BASE_URL}/trending/movie/{time_window}"
-        params = {'api_key': self.api_key}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+        return await self._get("/discover/movie", params, family="discover")
+
+    async def get_trending_movies(self, time_window: str = 'week', limit: int = 20,
+                                  language: Optional[str] = None, use_precomputed: bool = True):
+        """Get trending movies, served from the precomputed list when there is one and it is long enough."""
+        # Stored lists hold MOVIE_LISTS_SIZE movies, whatever limit the request that filled them asked for
+        if use_precomputed and limit <= settings.MOVIE_LISTS_SIZE:
+            list_params = {'time_window': time_window, 'language': language}
+            movies = await movie_lists.aget("trending", list_params)
+            if movies is None:
+                movies = await self.get_trending_movies(
+                    time_window, limit=settings.MOVIE_LISTS_SIZE, language=language, use_precomputed=False
+                )
+                await movie_lists.aset("trending", list_params, movies)
+            return movies[:limit]
+        params = {'language': language} if language else None
+        data = await self._get(f"/trending/movie/{time_window}", params, family="lists")
         return data.get("results", [])[:limit]
 
-    async def get_popular_movies(self, page: int = 1, limit: int = 20):
-        """Get popular movies."""
-        url = f"{TMDB_BASE_URL}/movie/popular"
-        params = {'api_key': self.api_key, 'page': page}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+    async def get_popular_movies(self, page: int = 1, limit: int = 20, language: Optional[str] = None,
+                                 region: Optional[str] = None, use_precomputed: bool = True):
+        """Get popular movies, served from the precomputed list (first page) when there is one and it is long enough."""
+        if use_precomputed and page == 1 and limit <= settings.MOVIE_LISTS_SIZE:
+            list_params = {'language': language, 'region': region}
+            movies = await movie_lists.aget("popular", list_params)
+            if movies is None:
+                movies = await self.get_popular_movies(
+                    limit=settings.MOVIE_LISTS_SIZE, language=language, region=region, use_precomputed=False
+                )
+                await movie_lists.aset("popular", list_params, movies)
+            return movies[:limit]
+        params = {'page': page}
+        params.update({k: v for k, v in (('language', language), ('region', region)) if v})
+        data = await self._get("/movie/popular", params, family="lists")
         return data.get("results", [])[:limit]
 
-    async def get_movies_by_genre(self, genre_id: str, page: int = 1, limit: int = 20):
-        """Get movies by genre ID."""
-        url = f"{TMDB_BASE_URL}/discover/movie"
+    async def get_movies_by_genre(self, genre_id: str, page: int = 1, limit: int = 20, language: Optional[str] = None,
+                                  region: Optional[str] = None, use_precomputed: bool = True):
+        """Get movies by genre ID: precomputed list first, then the local catalog, then TMDB discover."""
+        if use_precomputed and page == 1 and limit <= settings.MOVIE_LISTS_SIZE:
+            list_params = {'genre_id': str(genre_id), 'language': language, 'region': region}
+            movies = await movie_lists.aget("genre", list_params)
+            if movies is None:
+                movies = await self.get_movies_by_genre(
+                    genre_id, limit=settings.MOVIE_LISTS_SIZE, language=language, region=region,
+                    use_precomputed=False
+                )
+                await movie_lists.aset("genre", list_params, movies)
+            return movies[:limit]
+
+        movies = None
+        if not language and not region:
+            # The catalog holds default-locale data only
+            movies = await self._catalog_lookup(self.catalog.get_movies_by_genre, genre_id, limit, (page - 1) * limit)
+            if movies and len(movies) >= min(limit, settings.TMDB_CATALOG_MIN_GENRE_RESULTS):
+                return movies
         params = {
-            'api_key': self.api_key,
             'with_genres': genre_id,
             'sort_by': 'popularity.desc',
             'page': page,
             'include_adult': False
         }
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+        params.update({k: v for k, v in (('language', language), ('region', region)) if v})
+        try:
+            data = await self._get("/discover/movie", params, family="discover")
+        except (httpx.HTTPError, RateLimitTimeout, CircuitOpenError):
+            # A partial local answer is better than none while TMDB is unavailable
+            if movies:
+                return movies
+            raise
         return data.get("results", [])[:limit]
 
     async def get_movies_by_actor(self, actor_id: int, page: int = 1, limit: int = 20):
         """Get movies by actor ID."""
-        url = f"{TMDB_BASE_URL}/discover/movie"
         params = {
-            'api_key': self.api_key,
             'with_cast': actor_id,
             'sort_by': 'popularity.desc',
             'page': page,
             'include_adult': False
         }
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+        data = await self._get("/discover/movie", params, family="discover")
         return data.get("results", [])[:limit]
 
-    async def search_person(self, query: str, page: int = 1):
-        """Search for a person (actor/director)."""
-        url = f"{TMDB_BASE_URL}/search/person"
-        params = {'api_key': self.api_key, 'query': query, 'page': page}
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, params=params)
-        resp.raise_for_status()
-        return resp.json()
-
-    async def get_genre_id(self, genre_name: str) -> str:
-        """Get TMDB genre ID from genre name."""
-        # Common genre mappings
-        genre_map = {
-            "action": "28", "adventure": "12", "animation": "16", "comedy": "35",
-            "crime": "80", "documentary": "99", "drama": "18", "family": "10751",
-            "fantasy": "14", "history": "36", "horror": "27", "music": "10402",
-            "mystery": "9648", "romance": "10749", "science fiction": "878",
-            "tv movie": "10770", "thriller": "53", "war": "10752", "western": "37",
-            # Korean content
-            "kdrama": "18", "korean drama": "18", "korean": "18",
-            # Additional genres
-            "feel-good": "35", "feel good": "35", "uplifting": "35"
+    async def get_movies_by_director(self, director_id: int, page: int = 1, limit: int = 20):
+        """Get movies by director (crew member) ID."""
+        params = {
+            'with_crew': director_id,
+            'sort_by': 'popularity.desc',
+            'page': page,
+            'include_adult': False
         }
-        return genre_map.get(genre_name.lower(), "18")  # Default to drama
+        data = await self._get("/discover/movie", params, family="discover")
+        return data.get("results", [])[:limit]
 
-    async def search_candidate_movies(self, taste_profile: dict, limit: int = 50) -> list:
-        """Search for candidate movies based on taste profile."""
-        candidates = []
-        
-        # Search by favorite genres
+    async def search_person(self, query: str, page: int = 1):
+        """Search for a person (actor/director), answering exact name matches from the local catalog."""
+        if page == 1:
+            people = await self._catalog_lookup(self.catalog.search_people, query)
+            if people:
+                return {"page": 1, "results": people, "total_pages": 1, "total_results": len(people)}
+        return await self._get("/search/person", {'query': query, 'page': page}, family="person")
+
+    async def resolve_person_id(self, name: str, department: Optional[str] = None) -> Optional[int]:
+        """
+        Resolve a person's name to a TMDB ID through the person index, falling back to the
+        local catalog and then /search/person. department ("Acting", "Directing") breaks ties between namesakes.
+        """
+        entry = await person_index.lookup(name, department)
+        if entry is not None:
+            return entry["id"]
+
+        people = await self._catalog_lookup(self.catalog.search_people, name)
+        source = "catalog"
+        if not people:
+            data = await self._get("/search/person", {'query': name, 'page': 1}, family="person")
+            people = data.get("results", [])
+            source = "tmdb"
+        person, confidence = pick_person(name, people, department)
+        await person_index.record(name, department, person, confidence, source)
+        return person["id"] if person else None
+
+    async def get_similar_movies(self, movie_id: int, limit: int = 20) -> Optional[List[dict]]:
+        """Content-similar movies from the local similarity index, or None if the movie isn't indexed."""
+        if not similarity_index.contains(movie_id):
+            return None
+        neighbours = similarity_index.similar(movie_id, limit)
+        movies = await self._catalog_lookup(self.catalog.get_movies_by_ids, [movie_id for movie_id, _ in neighbours]) or []
+        scores = dict(neighbours)
+        return [{**movie, "similarity": scores[movie["id"]]} for movie in movies]
+
+    async def get_genre_id(self, genre_name: str, media_type: str = 'movie') -> Optional[str]:
+        """Get TMDB genre ID from a free-form genre name, or None if it isn't a recognizable genre."""
+        await genre_registry.ensure_loaded(self)
+        genre_id = genre_registry.resolve(genre_name, media_type)
+        return str(genre_id) if genre_id is not None else None
+
+    async def search_candidate_movies(self, taste_profile: dict, limit: int = 50, seed_movie_ids: Optional[List[int]] = None) -> list:
+        """
+        Search for candidate movies based on taste profile, querying all sources concurrently.
+        seed_movie_ids (e.g. the user's top-rated movies) add content-similar titles from the local similarity index
+        and titles liked by the same users from the item-item neighbour table.
+        """
+        semaphore = asyncio.Semaphore(settings.TMDB_CANDIDATE_CONCURRENCY)
+
+        async def from_genre(genre_id: str) -> list:
+            async with semaphore:
+                return await self.get_movies_by_genre(genre_id, limit=10)
+
+        async def from_person(name: str, department: str, get_movies) -> list:
+            # First find the person's ID (usually from the person index), then their movies
+            async with semaphore:
+                person_id = await self.resolve_person_id(name, department)
+            if person_id is None:
+                return []
+            async with semaphore:
+                return await get_movies(person_id, limit=10)
+
+        async def from_similar(movie_ids: List[int]) -> list:
+            neighbours = similarity_index.similar_to_many(movie_ids, limit=20)
+            return await self._catalog_lookup(self.catalog.get_movies_by_ids, [movie_id for movie_id, _ in neighbours]) or []
+
+        async def from_also_liked(movie_ids: List[int]) -> list:
+            neighbour_ids = [movie_id for movie_id, _ in item_neighbours.also_liked(movie_ids, limit=20)]
+            movies = await self._catalog_lookup(self.catalog.get_movies_by_ids, neighbour_ids, True) or []
+            # Rated titles can fall outside the catalog mirror or have no details yet; those come from TMDB instead
+            found = {movie["id"] for movie in movies}
+            missing = [movie_id for movie_id in neighbour_ids if movie_id not in found]
+            if missing:
+                async with semaphore:
+                    details = await self.get_movies_details_bulk(missing)
+                movies += [
+                    {**d, "genre_ids": [g["id"] for g in d.get("genres", [])]} for d in details.values() if not d.get("adult")
+                ]
+            return movies
+
+        sources = []
+        if seed_movie_ids and similarity_index.available:
+            sources.append(("similar movies", from_similar(seed_movie_ids)))
+        if seed_movie_ids and item_neighbours.available:
+            sources.append(("also liked", from_also_liked(seed_movie_ids)))
+        genre_ids = []
         for genre in taste_profile.get("favorite_genres", [])[:3]:  # Limit to top 3 genres
-            try:
-                genre_id = await self.get_genre_id(genre)
-                movies = await self.get_movies_by_genre(genre_id, limit=10)
-                candidates.extend(movies)
-            except Exception as e:
-                print(f"Error searching for genre {genre}: {e}")
-        
-        # Search by favorite actors
+            genre_id = await self.get_genre_id(genre)
+            if genre_id is None:
+                print(f"Skipping unrecognized genre '{genre}'")
+            elif genre_id not in genre_ids:
+                genre_ids.append(genre_id)
+        for genre_id in genre_ids:
+            sources.append((f"genre {genre_id}", from_genre(genre_id)))
         for actor in taste_profile.get("favorite_actors", [])[:2]:  # Limit to top 2 actors
-            try:
-                # First find actor ID
-                actor_search = await self.search_person(actor)
-                if actor_search.get("results"):
-                    actor_id = actor_search["results"][0]["id"]
-                    # Then find movies by actor
-                    movies = await self.get_movies_by_actor(actor_id, limit=10)
-                    candidates.extend(movies)
-            except Exception as e:
-                print(f"Error searching for actor {actor}: {e}")
+            sources.append((f"actor {actor}", from_person(actor, "Acting", self.get_movies_by_actor)))
+        for director in taste_profile.get("favorite_directors", [])[:2]:  # Limit to top 2 directors
+            sources.append((f"director {director}", from_person(director, "Directing", self.get_movies_by_director)))
+
+        # Failed or timed-out sources (including those cut off by the request deadline) are skipped
+        results = await asyncio.gather(
+            *[asyncio.wait_for(source, within_deadline(settings.TMDB_CANDIDATE_SOURCE_TIMEOUT)) for _, source in sources],
+            return_exceptions=True
+        )
+        candidates = []
+        for (label, _), result in zip(sources, results):
+            if isinstance(result, BaseException):
+                print(f"Error searching for {label}: {result!r}")
+                continue
+            candidates.extend(result)
         
         # Remove duplicates and limit results
         seen_ids = set()
@@ -157,4 +448,4 @@ class TMDBService:
                 seen_ids.add(movie["id"])
                 unique_candidates.append(movie)
         
-        return unique_candidates 
\ No newline at end of file
+        return unique_candidates
@@ -0,0 +1,188 @@
+import os
+import glob
+import gzip
+import json
+import asyncio
+import tempfile
+import httpx
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+from app.celery_worker import celery_app, get_worker_loop
+from app.core.config import settings
+from app.core.http_clients import get_tmdb_client
+from app.crud.catalog_crud import CatalogCRUD
+from app.services.tmdb_service import TMDBService
+
+# TMDB daily export file prefix per catalog media type
+EXPORTS = {
+    "movie": "movie_ids",
+    "tv": "tv_series_ids",
+    "person": "person_ids",
+}
+EXPORT_BATCH_SIZE = 5000
+MAX_CHANGES_WINDOW_DAYS = 14  # TMDB limit for /changes start/end range
+EXPORT_DOWNLOAD_TIMEOUT = 120
+
+@celery_app.task(name="tasks.bootstrap_tmdb_catalog")
+def bootstrap_tmdb_catalog():
+    """Load genres and the daily ID exports into the local catalog, then fetch details for the most popular titles."""
+    try:
+        loop = get_worker_loop()
+        summary = loop.run_until_complete(_bootstrap_catalog())
+        print(f"TMDB catalog bootstrap completed: {summary}")
+        return summary
+    except Exception as e:
+        print(f"Error bootstrapping TMDB catalog: {e}")
+        return None
+
+@celery_app.task(name="tasks.sync_tmdb_catalog")
+def sync_tmdb_catalog():
+    """Refresh catalog titles that TMDB reports as changed since the last sync."""
+    try:
+        loop = get_worker_loop()
+        summary = loop.run_until_complete(_sync_catalog())
+        print(f"TMDB catalog sync completed: {summary}")
+        return summary
+    except Exception as e:
+        print(f"Error syncing TMDB catalog: {e}")
+        return None
+
+async def _bootstrap_catalog() -> dict:
+    catalog = CatalogCRUD()
+    tmdb_service = TMDBService()
+    summary = {}
+
+    for media_type in ("movie", "tv"):
+        genres = await tmdb_service.get_genre_list(media_type)
+        await catalog.upsert_genres(media_type, genres)
+
+    for media_type in EXPORTS:
+        count = 0
+        batch = []
+        path, downloaded = await _locate_export(EXPORTS[media_type])
+        if not path:
+            print(f"No {EXPORTS[media_type]} export available")
+        for row in _iter_export_rows(path, downloaded):
+            if media_type == "person" and row.get("popularity", 0) < settings.TMDB_CATALOG_PERSON_MIN_POPULARITY:
+                continue
+            batch.append(row)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                await catalog.upsert_export_rows(media_type, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            await catalog.upsert_export_rows(media_type, batch)
+            count += len(batch)
+        summary[f"{media_type}_export_rows"] = count
+
+    movie_ids = await catalog.list_ids_without_details("movie", settings.TMDB_CATALOG_BOOTSTRAP_MOVIES)
+    tv_ids = await catalog.list_ids_without_details("tv", settings.TMDB_CATALOG_BOOTSTRAP_TV)
+    summary["movie"] = await _refresh_titles(catalog, tmdb_service, "movie", movie_ids)
+    summary["tv"] = await _refresh_titles(catalog, tmdb_service, "tv", tv_ids)
+    await catalog.set_sync_state("bootstrapped_at", datetime.utcnow().isoformat())
+    return summary
+
+async def _sync_catalog() -> dict:
+    catalog = CatalogCRUD()
+    tmdb_service = TMDBService()
+    today = datetime.utcnow().date()
+    summary = {}
+
+    for media_type in ("movie", "tv"):
+        state_key = f"{media_type}_changes_synced_through"
+        last_synced = await catalog.get_sync_state(state_key)
+        earliest = today - timedelta(days=MAX_CHANGES_WINDOW_DAYS - 1)
+        start_date = max(datetime.fromisoformat(last_synced).date(), earliest) if last_synced else today - timedelta(days=1)
+
+        changed_ids = await _get_changed_ids(tmdb_service, media_type, start_date.isoformat(), today.isoformat())
+        # Only titles we already mirror are refreshed; new titles arrive through the daily export bootstrap
+        mirrored_ids = await catalog.filter_existing_ids(media_type, changed_ids)
+        summary[media_type] = await _refresh_titles(catalog, tmdb_service, media_type, mirrored_ids)
+        summary[media_type]["changed"] = len(changed_ids)
+        await catalog.set_sync_state(state_key, today.isoformat())
+
+    return summary
+
+async def _get_changed_ids(tmdb_service: TMDBService, media_type: str, start_date: str, end_date: str) -> List[int]:
+    """Collect changed IDs from the changes feed, or from TMDB_CHANGES_FEED_FILE when set."""
+    if settings.TMDB_CHANGES_FEED_FILE:
+        # Local stand-in: {"movie": {"results": [{"id": 550, "adult": false}, ...]}, "tv": {...}}
+        with open(settings.TMDB_CHANGES_FEED_FILE, "r", encoding="utf-8") as f:
+            feed = json.load(f)
+        return [item["id"] for item in feed.get(media_type, {}).get("results", []) if not item.get("adult")]
+
+    changed_ids = []
+    page, total_pages = 1, 1
+    while page <= total_pages:
+        data = await tmdb_service.get_changes(media_type, start_date=start_date, end_date=end_date, page=page)
+        changed_ids.extend(item["id"] for item in data.get("results", []) if not item.get("adult"))
+        total_pages = data.get("total_pages", 1)
+        page += 1
+    return changed_ids
+
+async def _refresh_titles(catalog: CatalogCRUD, tmdb_service: TMDBService, media_type: str, media_ids: List[int]) -> dict:
+    """Fetch fresh details (with credits) for the given titles and write them to the catalog."""
+    semaphore = asyncio.Semaphore(settings.TMDB_CATALOG_SYNC_CONCURRENCY)
+    counts = {"updated": 0, "removed": 0, "failed": 0}
+
+    async def refresh(media_id: int):
+        async with semaphore:
+            try:
+                details = await tmdb_service.fetch_title_details(media_type, media_id)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    await catalog.delete_title(media_type, media_id)
+                    counts["removed"] += 1
+                else:
+                    counts["failed"] += 1
+                return
+            except Exception as e:
+                print(f"Error refreshing {media_type} {media_id}: {e}")
+                counts["failed"] += 1
+                return
+        if details.get("adult"):
+            await catalog.delete_title(media_type, media_id)
+            counts["removed"] += 1
+        elif media_type == "movie":
+            await catalog.upsert_movie(details)
+            counts["updated"] += 1
+        else:
+            await catalog.upsert_tv_show(details)
+            counts["updated"] += 1
+
+    await asyncio.gather(*[refresh(media_id) for media_id in media_ids])
+    return counts
+
+def _iter_export_rows(path: Optional[str], downloaded: bool) -> Iterator[dict]:
+    """Yield rows from a daily export file (one JSON object per line, gzipped); a downloaded file is removed after."""
+    if not path:
+        return
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if downloaded:
+            os.remove(path)
+
+async def _locate_export(export_name: str) -> Tuple[Optional[str], bool]:
+    """Find the export in TMDB_EXPORTS_DIR, or download today's (falling back to yesterday's) file."""
+    if settings.TMDB_EXPORTS_DIR:
+        files = glob.glob(os.path.join(settings.TMDB_EXPORTS_DIR, f"{export_name}_*.json.gz"))
+        return (max(files, key=os.path.getmtime), False) if files else (None, False)
+
+    # The pooled TMDB client; absolute export URLs bypass its API base URL
+    client = get_tmdb_client()
+    for days_back in (0, 1):
+        day = (datetime.utcnow() - timedelta(days=days_back)).strftime("%m_%d_%Y")
+        url = f"{settings.TMDB_EXPORTS_BASE_URL}/{export_name}_{day}.json.gz"
+        async with client.stream("GET", url, timeout=EXPORT_DOWNLOAD_TIMEOUT, follow_redirects=True) as resp:
+            if resp.status_code in (403, 404):
+                continue  # Today's export is published around 08:00 UTC
+            resp.raise_for_status()
+            with tempfile.NamedTemporaryFile(suffix=".json.gz", delete=False) as tmp:
+                async for chunk in resp.aiter_bytes():
+                    tmp.write(chunk)
+                return tmp.name, True
+    return None, False
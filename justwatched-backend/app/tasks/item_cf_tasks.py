@@ -0,0 +1,38 @@
+import time
+from app.celery_worker import celery_app, get_worker_loop
+from app.core.config import settings
+from app.crud.review_crud import ReviewCRUD
+from app.services.collaborative_filtering import (
+    build_rating_matrix, compute_item_neighbours, item_neighbours, ratings_fingerprint, save_item_neighbours
+)
+
+@celery_app.task(name="tasks.train_item_cf")
+def train_item_cf(force: bool = False):
+    """Retrain the item-item neighbour table from all movie ratings; skipped when the ratings have not changed."""
+    try:
+        loop = get_worker_loop()
+        started = time.monotonic()
+        ratings = loop.run_until_complete(ReviewCRUD().get_all_movie_ratings())
+        fingerprint = ratings_fingerprint(ratings)
+        item_neighbours.available  # Loads the current table, if any, to compare fingerprints
+        if not force and fingerprint == item_neighbours.fingerprint:
+            print("Ratings unchanged since the last item-item training, skipping")
+            return {"skipped": True, "ratings": len(ratings)}
+        item_ids, matrix = build_rating_matrix(ratings)
+        if not len(item_ids):
+            print("Not enough ratings for item-item training")
+            return {"skipped": True, "ratings": len(ratings)}
+        neighbours, scores = compute_item_neighbours(matrix)
+        save_item_neighbours(settings.ITEM_CF_INDEX_PATH, item_ids, neighbours, scores, fingerprint)
+        summary = {
+            "ratings": len(ratings),
+            "users": matrix.shape[0],
+            "movies": len(item_ids),
+            "pairs": int((neighbours >= 0).sum()),
+            "seconds": round(time.monotonic() - started, 1),
+        }
+        print(f"Item-item training completed: {summary}")
+        return summary
+    except Exception as e:
+        print(f"Error training item-item neighbours: {e}")
+        return None
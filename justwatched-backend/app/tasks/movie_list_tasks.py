@@ -0,0 +1,86 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+from app.celery_worker import celery_app, get_worker_loop
+from app.core.config import settings
+from app.services.genre_registry import genre_registry
+from app.services.movie_lists import movie_lists
+from app.services.tmdb_service import TMDBService
+
+PRECOMPUTE_CONCURRENCY = 4
+
+@celery_app.task(name="tasks.precompute_movie_lists")
+def precompute_movie_lists():
+    """Precompute trending, popular and per-genre lists for every configured locale."""
+    try:
+        loop = get_worker_loop()
+        summary = loop.run_until_complete(_precompute_lists())
+        print(f"Precomputed movie lists: {summary}")
+        return summary
+    except Exception as e:
+        print(f"Error precomputing movie lists: {e}")
+        return None
+
+@celery_app.task(name="tasks.refresh_movie_list")
+def refresh_movie_list(kind: str, params: Dict[str, Any]):
+    """Refresh one precomputed list that a reader found past its soft TTL."""
+    try:
+        loop = get_worker_loop()
+        return loop.run_until_complete(_refresh_list(TMDBService(), kind, params))
+    except Exception as e:
+        print(f"Error refreshing {kind} list {params}: {e}")
+        return None
+
+def _locales() -> List[Tuple[Optional[str], Optional[str]]]:
+    """(language, region) pairs to precompute: the default locale plus MOVIE_LISTS_LOCALES."""
+    locales = [(None, None)]
+    for locale in settings.MOVIE_LISTS_LOCALES:
+        _, _, region = locale.partition("-")
+        locales.append((locale, region.upper() or None))
+    return locales
+
+async def _precompute_lists() -> dict:
+    tmdb_service = TMDBService()
+    await genre_registry.ensure_loaded(tmdb_service)
+
+    specs = []
+    for language, region in _locales():
+        for time_window in ("day", "week"):
+            specs.append(("trending", {"time_window": time_window, "language": language}))
+        specs.append(("popular", {"language": language, "region": region}))
+        for genre_id in genre_registry.genre_ids("movie"):
+            specs.append(("genre", {"genre_id": str(genre_id), "language": language, "region": region}))
+
+    semaphore = asyncio.Semaphore(PRECOMPUTE_CONCURRENCY)
+
+    async def refresh(kind: str, params: Dict[str, Any]) -> int:
+        async with semaphore:
+            return await _refresh_list(tmdb_service, kind, params)
+
+    results = await asyncio.gather(*[refresh(kind, params) for kind, params in specs], return_exceptions=True)
+    failed = 0
+    for (kind, params), result in zip(specs, results):
+        if isinstance(result, BaseException):
+            print(f"Error precomputing {kind} list {params}: {result}")
+            failed += 1
+    return {"lists": len(specs) - failed, "failed": failed}
+
+async def _refresh_list(tmdb_service: TMDBService, kind: str, params: Dict[str, Any]) -> int:
+    """Fetch one list live (bypassing the precomputed copy) and store it."""
+    language, region = params.get("language"), params.get("region")
+    if kind == "trending":
+        movies = await tmdb_service.get_trending_movies(
+            params["time_window"], limit=settings.MOVIE_LISTS_SIZE, language=language, use_precomputed=False
+        )
+    elif kind == "popular":
+        movies = await tmdb_service.get_popular_movies(
+            limit=settings.MOVIE_LISTS_SIZE, language=language, region=region, use_precomputed=False
+        )
+    elif kind == "genre":
+        movies = await tmdb_service.get_movies_by_genre(
+            params["genre_id"], limit=settings.MOVIE_LISTS_SIZE, language=language, region=region,
+            use_precomputed=False
+        )
+    else:
+        raise ValueError(f"Unknown movie list kind: {kind}")
+    await movie_lists.aset(kind, params, movies)
+    return len(movies)
@@ -0,0 +1,50 @@
+import asyncio
+from app.celery_worker import celery_app, get_worker_loop
+from app.core.config import settings
+from app.crud.catalog_crud import normalize_name
+from app.crud.taste_profile_crud import TasteProfileCRUD
+from app.services.tmdb_service import TMDBService
+
+@celery_app.task(name="tasks.warm_person_index")
+def warm_person_index():
+    """Resolve every favorite actor/director in stored taste profiles into the person index."""
+    try:
+        loop = get_worker_loop()
+        summary = loop.run_until_complete(_warm_person_index())
+        print(f"Person index warm-up completed: {summary}")
+        return summary
+    except Exception as e:
+        print(f"Error warming person index: {e}")
+        return None
+
+async def _warm_person_index() -> dict:
+    taste_profile_crud = TasteProfileCRUD()
+    tmdb_service = TMDBService()
+    profiles = await taste_profile_crud.get_all_taste_profiles()
+
+    # Each distinct (name, department) pair is resolved once, however many profiles mention it
+    names = {}
+    for profile in profiles:
+        for name in profile.get("favorite_actors", []) or []:
+            names.setdefault((normalize_name(name), "Acting"), name)
+        for name in profile.get("favorite_directors", []) or []:
+            names.setdefault((normalize_name(name), "Directing"), name)
+
+    semaphore = asyncio.Semaphore(settings.PERSON_INDEX_WARMUP_CONCURRENCY)
+
+    async def resolve(name: str, department: str):
+        async with semaphore:
+            return await tmdb_service.resolve_person_id(name, department)
+
+    pairs = [(name, department) for (_, department), name in names.items() if name]
+    results = await asyncio.gather(*[resolve(name, department) for name, department in pairs], return_exceptions=True)
+    summary = {"profiles": len(profiles), "names": len(pairs), "resolved": 0, "unresolved": 0, "failed": 0}
+    for (name, department), result in zip(pairs, results):
+        if isinstance(result, BaseException):
+            print(f"Error resolving {department} '{name}': {result}")
+            summary["failed"] += 1
+        elif result is None:
+            summary["unresolved"] += 1
+        else:
+            summary["resolved"] += 1
+    return summary
@@ -2,10 +2,15 @@ import time
 import json
 import asyncio
 from datetime import datetime
-from app.celery_worker import celery_app
+from app.celery_worker import celery_app, get_worker_loop
 from app.core.config import settings
 from app.agents.azure_openai_agent import AzureOpenAIAgent
+from app.agents.prompt_compaction import build_personal_prompt, build_group_prompt, estimate_tokens, summarize_reviews
 from app.services.tmdb_service import TMDBService
+from app.services.genre_registry import genre_registry
+from app.services.candidate_ranker import rank_candidates, heuristic_recommendations
+from app.services.similarity_index import top_rated_movie_ids
+from app.services.taste_stats import TasteStatsService
 
 @celery_app.task(name="tasks.generate_taste_profile")
 def generate_taste_profile(user_id: str):
@@ -17,50 +22,119 @@ def generate_taste_profile(user_id: str):
         from app.crud.review_crud import ReviewCRUD
         review_crud = ReviewCRUD()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = get_worker_loop()
         
-        try:
-            reviews = loop.run_until_complete(review_crud.get_reviews_by_user(user_id))
-            
-            if not reviews:
-                print(f"No reviews found for user {user_id}")
-                # Create a basic taste profile for new users
-                taste_profile = {
-                    "user_id": user_id,
-                    "favorite_genres": [],
-                    "favorite_actors": [],
-                    "favorite_directors": [],
-                    "mood_preferences": [],
-                    "preferred_era": "modern",
-                    "preferred_language": "english",
-                    "analysis_confidence": 0.0,
-                    "created_at": datetime.utcnow().isoformat()
-                }
-            else:
-                # Use AI to analyze taste profile
-                taste_profile = loop.run_until_complete(
-                    agent.analyze_taste_profile(user_id, reviews)
-                )
-                taste_profile["created_at"] = datetime.utcnow().isoformat()
-            
-            # Save taste profile
+        reviews = loop.run_until_complete(review_crud.get_reviews_by_user(user_id))
+
+        if not reviews:
+            print(f"No reviews found for user {user_id}")
+            # Create a basic taste profile for new users
+            taste_profile = _default_taste_profile(user_id)
             from app.crud.taste_profile_crud import TasteProfileCRUD
             taste_crud = TasteProfileCRUD()
             loop.run_until_complete(taste_crud.save_taste_profile(user_id, taste_profile))
-            
-            print(f"Taste profile for {user_id} successfully created using AI analysis.")
-            return taste_profile
-            
-        finally:
-            loop.close()
-            
+        else:
+            # Use AI to analyze taste profile, stored as enrichment of the statistical one
+            taste_profile = loop.run_until_complete(
+                agent.analyze_taste_profile(user_id, reviews)
+            )
+            taste_profile["created_at"] = datetime.utcnow().isoformat()
+            taste_profile = loop.run_until_complete(TasteStatsService().enrich(user_id, taste_profile))
+
+        print(f"Taste profile for {user_id} successfully created using AI analysis.")
+        return taste_profile
+
     except Exception as e:
         print(f"Error generating taste profile for {user_id}: {e}")
         return None
 
+def _default_taste_profile(user_id: str) -> dict:
+    """Basic taste profile for users without reviews."""
+    return {
+        "user_id": user_id,
+        "favorite_genres": [],
+        "favorite_actors": [],
+        "favorite_directors": [],
+        "mood_preferences": [],
+        "preferred_era": "modern",
+        "preferred_language": "english",
+        "analysis_confidence": 0.0,
+        "created_at": datetime.utcnow().isoformat()
+    }
+
+@celery_app.task(name="tasks.generate_taste_profiles_batch")
+def generate_taste_profiles_batch(user_ids: list, refresh_recommendations: bool = False, priority: str = "scheduled"):
+    """Generate taste profiles for several users with one LLM call per token-budgeted batch."""
+    try:
+        loop = get_worker_loop()
+        summary = loop.run_until_complete(_generate_taste_profiles_batch(user_ids, refresh_recommendations, priority))
+        print(f"Batched taste profile generation completed: {summary}")
+        return summary
+    except Exception as e:
+        print(f"Error generating batched taste profiles for {user_ids}: {e}")
+        return None
+
+def _pack_review_batches(reviews_by_user: dict) -> list:
+    """Group users so each batch prompt stays within the batch token budget."""
+    batches, current, used = [], {}, 0
+    for user_id, reviews in reviews_by_user.items():
+        cost = estimate_tokens(summarize_reviews(reviews, settings.TASTE_PROFILE_BATCH_REVIEW_CHARS)) + 10
+        if current and used + cost > settings.TASTE_PROFILE_BATCH_TOKEN_BUDGET:
+            batches.append(current)
+            current, used = {}, 0
+        current[user_id] = reviews
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+async def _generate_taste_profiles_batch(user_ids: list, refresh_recommendations: bool, priority: str) -> dict:
+    from app.crud.review_crud import ReviewCRUD
+    from app.crud.taste_profile_crud import TasteProfileCRUD
+    agent = AzureOpenAIAgent()
+    review_crud = ReviewCRUD()
+    taste_crud = TasteProfileCRUD()
+
+    all_reviews = await asyncio.gather(*[review_crud.get_reviews_by_user(user_id) for user_id in user_ids])
+    profiles = {user_id: _default_taste_profile(user_id) for user_id, reviews in zip(user_ids, all_reviews) if not reviews}
+    reviews_by_user = {user_id: reviews for user_id, reviews in zip(user_ids, all_reviews) if reviews}
+    summary = {"users": len(user_ids), "llm_calls": 0, "batched": 0, "fallback": 0, "failed": 0}
+
+    for batch in _pack_review_batches(reviews_by_user):
+        summary["llm_calls"] += 1
+        try:
+            batch_profiles = await agent.analyze_taste_profiles_batch(batch, priority=priority)
+        except Exception as e:
+            print(f"Batched taste analysis failed for {len(batch)} users: {e}")
+            batch_profiles = {}
+        summary["batched"] += len(batch_profiles)
+        # Users the batch response missed or mangled get their own request
+        for user_id in batch:
+            if user_id in batch_profiles:
+                profiles[user_id] = batch_profiles[user_id]
+                continue
+            summary["llm_calls"] += 1
+            try:
+                profiles[user_id] = await agent.analyze_taste_profile(user_id, batch[user_id], priority=priority)
+                summary["fallback"] += 1
+            except Exception as e:
+                print(f"Error generating taste profile for {user_id}: {e}")
+                summary["failed"] += 1
+
+    taste_stats = TasteStatsService()
+    for user_id, taste_profile in profiles.items():
+        taste_profile.setdefault("created_at", datetime.utcnow().isoformat())
+        if user_id in reviews_by_user:
+            await taste_stats.enrich(user_id, taste_profile)
+        else:
+            await taste_crud.save_taste_profile(user_id, taste_profile)
+        if refresh_recommendations:
+            # Queued only after the new profile is saved, so recommendations use it
+            generate_personal_recommendations.delay(user_id, priority=priority)
+    return summary
+
 @celery_app.task(name="tasks.generate_personal_recommendations")
-def generate_personal_recommendations(user_id: str, taste_profile: dict = None):
+def generate_personal_recommendations(user_id: str, taste_profile: dict = None, priority: str = "on_demand"):
     """Generates personal recommendations for a user using AI assistants with real TMDB data."""
     try:
         agent = AzureOpenAIAgent()
@@ -71,168 +145,138 @@ def generate_personal_recommendations(user_id: str, taste_profile: dict = None):
             from app.crud.taste_profile_crud import TasteProfileCRUD
             taste_crud = TasteProfileCRUD()
             
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            loop = get_worker_loop()
             
-            try:
-                taste_profile = loop.run_until_complete(taste_crud.get_taste_profile(user_id))
-                if not taste_profile:
-                    print(f"No taste profile found for user {user_id}. Generating one first.")
-                    # Trigger taste profile generation
-                    generate_taste_profile.delay(user_id)
-                    return None
-            finally:
-                loop.close()
+            taste_profile = loop.run_until_complete(taste_crud.get_taste_profile(user_id))
+            if not taste_profile:
+                print(f"No taste profile found for user {user_id}. Building one from review statistics.")
+                taste_profile = loop.run_until_complete(TasteStatsService().rebuild(user_id))
+                # LLM enrichment runs separately; recommendations don't wait for it
+                generate_taste_profile.delay(user_id)
         
         # Get user's watched movies to filter out
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = get_worker_loop()
         
-        try:
-            from app.crud.review_crud import ReviewCRUD
-            review_crud = ReviewCRUD()
-            user_reviews = loop.run_until_complete(review_crud.get_reviews_by_user(user_id))
-            watched_movie_ids = [review.get("media_id") for review in user_reviews if review.get("media_id")]
-            
-            print(f"Generating AI recommendations for user {user_id}")
-            
-            # Get candidate movies from TMDB based on taste profile
-            candidate_movies = loop.run_until_complete(
-                tmdb_service.search_candidate_movies(taste_profile, limit=50)
+        from app.crud.review_crud import ReviewCRUD
+        review_crud = ReviewCRUD()
+        user_reviews = loop.run_until_complete(review_crud.get_reviews_by_user(user_id))
+        watched_movie_ids = [review.get("media_id") for review in user_reviews if review.get("media_id")]
+
+        print(f"Generating AI recommendations for user {user_id}")
+
+        # Get candidate movies from TMDB based on taste profile
+        seed_movie_ids = top_rated_movie_ids(user_reviews, settings.SIMILARITY_SEED_REVIEWS)
+        candidate_movies = loop.run_until_complete(
+            tmdb_service.search_candidate_movies(taste_profile, limit=50, seed_movie_ids=seed_movie_ids)
+        )
+
+        # Filter out already watched movies
+        filtered_candidates = [
+            movie for movie in candidate_movies 
+            if movie["id"] not in watched_movie_ids
+        ]
+
+        # If no candidates, use trending movies as fallback
+        if not filtered_candidates:
+            filtered_candidates = loop.run_until_complete(
+                tmdb_service.get_trending_movies(limit=20)
             )
-            
-            # Filter out already watched movies
             filtered_candidates = [
-                movie for movie in candidate_movies 
+                movie for movie in filtered_candidates 
                 if movie["id"] not in watched_movie_ids
             ]
-            
-            # If no candidates, use trending movies as fallback
-            if not filtered_candidates:
-                filtered_candidates = loop.run_until_complete(
-                    tmdb_service.get_trending_movies(limit=20)
-                )
-                filtered_candidates = [
-                    movie for movie in filtered_candidates 
-                    if movie["id"] not in watched_movie_ids
-                ]
-            
-            if not filtered_candidates:
-                print(f"No suitable movies found for user {user_id}, using minimal fallback")
-                recommendations = _create_tmdb_fallback_recommendations(user_id, tmdb_service, loop)
-            else:
-                # Prepare candidate movies for AI
-                candidate_data = []
-                seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
-                
-                for movie in filtered_candidates[:30]:  # Limit to top 30 for AI processing
-                    if movie["id"] not in seen_movie_ids:  # Only add if not already seen
-                        candidate_data.append({
-                            "tmdb_id": movie["id"],
-                            "title": movie["title"],
-                            "overview": movie.get("overview", ""),
-                            "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
-                            "release_date": movie.get("release_date", ""),
-                            "poster_path": movie.get("poster_path"),
-                            "vote_average": movie.get("vote_average", 0)
-                        })
-                        seen_movie_ids.add(movie["id"])
-                
-                # Generate AI-powered recommendations from real movie data
+
+        if not filtered_candidates:
+            print(f"No suitable movies found for user {user_id}, using minimal fallback")
+            recommendations = _create_tmdb_fallback_recommendations(user_id, tmdb_service, loop)
+        else:
+            # Prepare candidate movies for AI
+            candidate_data = []
+            seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
+            
+            # Only the best-scoring candidates go to the AI
+            for movie in rank_candidates(filtered_candidates, [taste_profile], watched_movie_ids, settings.RANKER_TOP_K):
+                if movie["id"] not in seen_movie_ids:  # Only add if not already seen
+                    candidate_data.append({
+                        "tmdb_id": movie["id"],
+                        "title": movie["title"],
+                        "overview": movie.get("overview", ""),
+                        "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
+                        "genres": genre_registry.names_for(movie.get("genre_ids", [])),
+                        "release_date": movie.get("release_date", ""),
+                        "poster_path": movie.get("poster_path"),
+                        "vote_average": movie.get("vote_average", 0),
+                        "prerank_score": movie.get("prerank_score")
+                    })
+                    seen_movie_ids.add(movie["id"])
+            
+            # Generate AI-powered recommendations from real movie data
+            try:
                 recommendations = loop.run_until_complete(
-                    _generate_ai_recommendations_from_candidates(agent, user_id, taste_profile, candidate_data)
+                    _generate_ai_recommendations_from_candidates(agent, user_id, taste_profile, candidate_data, priority)
                 )
-            
-            # Ensure recommendations have the correct structure
-            if not recommendations or not isinstance(recommendations, dict):
-                print(f"AI returned invalid recommendations for {user_id}, using fallback")
-                recommendations = _create_tmdb_fallback_recommendations(user_id, tmdb_service, loop)
-            
-            # Deduplicate recommendations by tmdb_id
-            if "recommendations" in recommendations and isinstance(recommendations["recommendations"], list):
-                seen_ids = set()
-                unique_recommendations = []
-                
-                for rec in recommendations["recommendations"]:
-                    if isinstance(rec, dict) and "tmdb_id" in rec:
-                        movie_id = str(rec["tmdb_id"])
-                        if movie_id not in seen_ids:
-                            seen_ids.add(movie_id)
-                            unique_recommendations.append(rec)
-                
-                recommendations["recommendations"] = unique_recommendations
-                print(f"Deduplicated recommendations for {user_id}: {len(unique_recommendations)} unique movies")
-            
-            # Add metadata
-            recommendations["user_id"] = user_id
-            recommendations["generated_at"] = datetime.utcnow().isoformat()
-            recommendations["generation_method"] = "ai_primary"
-            
-            # Cache recommendations in Redis
-            from app.core.redis_client import redis_client
-            redis_client.setex(
-                f"user:{user_id}:recommendations",
-                86400,  # 24 hours
-                json.dumps(recommendations)
-            )
-            
-            print(f"AI-powered personal recommendations for {user_id} successfully generated.")
-            return recommendations
-            
-        finally:
-            loop.close()
-            
+            except Exception as e:
+                print(f"AI unavailable for {user_id} ({e}), using pre-ranked candidates")
+                recommendations = None
+            if not isinstance(recommendations, dict) or recommendations.get("error") or not recommendations.get("recommendations"):
+                recommendations = heuristic_recommendations(candidate_data)
+
+        # Ensure recommendations have the correct structure
+        if not recommendations or not isinstance(recommendations, dict):
+            print(f"AI returned invalid recommendations for {user_id}, using fallback")
+            recommendations = _create_tmdb_fallback_recommendations(user_id, tmdb_service, loop)
+
+        # Deduplicate recommendations by tmdb_id
+        if "recommendations" in recommendations and isinstance(recommendations["recommendations"], list):
+            seen_ids = set()
+            unique_recommendations = []
+            
+            for rec in recommendations["recommendations"]:
+                if isinstance(rec, dict) and "tmdb_id" in rec:
+                    movie_id = str(rec["tmdb_id"])
+                    if movie_id not in seen_ids:
+                        seen_ids.add(movie_id)
+                        unique_recommendations.append(rec)
+            
+            recommendations["recommendations"] = unique_recommendations
+            print(f"Deduplicated recommendations for {user_id}: {len(unique_recommendations)} unique movies")
+
+        # Add metadata
+        recommendations["user_id"] = user_id
+        recommendations["generated_at"] = datetime.utcnow().isoformat()
+        recommendations.setdefault("generation_method", "ai_primary")
+
+        # Cache recommendations in Redis
+        from app.core.redis_client import redis_client
+        redis_client.setex(
+            f"user:{user_id}:recommendations",
+            86400,  # 24 hours
+            json.dumps(recommendations)
+        )
+
+        print(f"AI-powered personal recommendations for {user_id} successfully generated.")
+        return recommendations
+
     except Exception as e:
         print(f"Error generating personal recommendations for {user_id}: {e}")
         # Emergency fallback with TMDB data
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                tmdb_service = TMDBService()
-                fallback_recs = _create_tmdb_fallback_recommendations(user_id, tmdb_service, loop)
-                fallback_recs["generation_method"] = "emergency_fallback"
-                fallback_recs["error"] = str(e)
-                return fallback_recs
-            finally:
-                loop.close()
+            loop = get_worker_loop()
+            tmdb_service = TMDBService()
+            fallback_recs = _create_tmdb_fallback_recommendations(user_id, tmdb_service, loop)
+            fallback_recs["generation_method"] = "emergency_fallback"
+            fallback_recs["error"] = str(e)
+            return fallback_recs
         except Exception as fallback_error:
             print(f"Even fallback failed for {user_id}: {fallback_error}")
             return _create_minimal_fallback_recommendations(user_id)
 
-async def _generate_ai_recommendations_from_candidates(agent, user_id: str, taste_profile: dict, candidate_data: list) -> dict:
+async def _generate_ai_recommendations_from_candidates(agent, user_id: str, taste_profile: dict, candidate_data: list, priority: str = "on_demand") -> dict:
     """Generate AI recommendations from a list of real movie candidates."""
-    import json
-    
-    messages = [
-        {"role": "system", "content": (
-            "You are a movie recommendation expert. You will receive a list of real movies from TMDB "
-            "and a user's taste profile. Your task is to select the best 20 movies from the provided list "
-            "that match the user's preferences.\n\n"
-            "IMPORTANT RULES:\n"
-            "1. Only use movies from the provided candidate list.\n"
-            "2. Each movie can appear ONLY ONCE in your recommendations.\n"
-            "3. Do not duplicate any movie titles or IDs.\n"
-            "4. Select exactly 20 unique movies.\n\n"
-            "Return a JSON object with this exact structure:\n"
-            "{\n"
-            '  "recommendations": [\n'
-            '    {\n'
-            '      "tmdb_id": "movie_id_from_list",\n'
-            '      "title": "movie_title_from_list",\n'
-            '      "poster_path": "poster_path_from_list",\n'
-            '      "confidence_score": 0.85,\n'
-            '      "reasoning": "explanation of why this movie matches the user\'s taste"\n'
-            '    }\n'
-            '  ],\n'
-            '  "generated_at": "timestamp"\n'
-            "}\n\n"
-            "CRITICAL: Ensure no duplicate tmdb_id values in the recommendations array."
-        )},
-        {"role": "user", "content": f"User Taste Profile: {json.dumps(taste_profile, ensure_ascii=False)}\n\nCandidate Movies: {json.dumps(candidate_data, ensure_ascii=False)}"}
-    ]
-    
-    return agent.chat(messages, temperature=0.7, max_tokens=6000)
+    prompt = build_personal_prompt(taste_profile, candidate_data)
+    print(f"Recommendation prompt for {user_id}: {len(prompt.movies)} candidates, ~{prompt.estimated_tokens} tokens")
+    result = await agent.achat(prompt.messages, temperature=0.7, max_tokens=settings.LLM_RECOMMENDATION_MAX_TOKENS, task_type="recommendations", priority=priority, user_id=user_id)
+    return prompt.expand(result)
 
 def _create_tmdb_fallback_recommendations(user_id: str, tmdb_service: TMDBService, loop) -> dict:
     """Create fallback recommendations using real TMDB trending/popular movies."""
@@ -291,173 +335,138 @@ def find_group_recommendations(room_id: str, taste_profiles: list):
         agent = AzureOpenAIAgent()
         tmdb_service = TMDBService()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = get_worker_loop()
         
-        try:
-            print(f"Generating AI group recommendations for room {room_id}")
-            
-            # Aggregate group preferences
-            all_genres = set()
-            all_actors = set()
-            all_directors = set()
-            
-            for profile in taste_profiles:
-                all_genres.update(profile.get("favorite_genres", []))
-                all_actors.update(profile.get("favorite_actors", []))
-                all_directors.update(profile.get("favorite_directors", []))
-            
-            # Create aggregated taste profile
-            aggregated_profile = {
-                "favorite_genres": list(all_genres)[:5],  # Top 5 genres
-                "favorite_actors": list(all_actors)[:3],  # Top 3 actors
-                "favorite_directors": list(all_directors)[:3]  # Top 3 directors
-            }
-            
-            # Get candidate movies from TMDB based on aggregated profile
+        print(f"Generating AI group recommendations for room {room_id}")
+
+        # Aggregate group preferences
+        all_genres = set()
+        all_actors = set()
+        all_directors = set()
+
+        for profile in taste_profiles:
+            all_genres.update(profile.get("favorite_genres", []))
+            all_actors.update(profile.get("favorite_actors", []))
+            all_directors.update(profile.get("favorite_directors", []))
+
+        # Create aggregated taste profile
+        aggregated_profile = {
+            "favorite_genres": list(all_genres)[:5],  # Top 5 genres
+            "favorite_actors": list(all_actors)[:3],  # Top 3 actors
+            "favorite_directors": list(all_directors)[:3]  # Top 3 directors
+        }
+
+        # Get candidate movies from TMDB based on aggregated profile
+        candidate_movies = loop.run_until_complete(
+            tmdb_service.search_candidate_movies(aggregated_profile, limit=40)
+        )
+
+        # If no candidates, use trending movies as fallback
+        if not candidate_movies:
             candidate_movies = loop.run_until_complete(
-                tmdb_service.search_candidate_movies(aggregated_profile, limit=40)
-            )
-            
-            # If no candidates, use trending movies as fallback
-            if not candidate_movies:
-                candidate_movies = loop.run_until_complete(
-                    tmdb_service.get_trending_movies(limit=20)
-                )
-            
-            if not candidate_movies:
-                print(f"No suitable movies found for room {room_id}")
-                recommendations = {
-                    "room_id": room_id,
-                    "recommendations": [],
-                    "generated_at": datetime.utcnow().isoformat(),
-                    "generation_method": "no_candidates"
-                }
-            else:
-                # Prepare candidate movies for AI
-                candidate_data = []
-                seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
-                
-                for movie in candidate_movies[:25]:  # Limit to top 25 for AI processing
-                    if movie["id"] not in seen_movie_ids:  # Only add if not already seen
-                        candidate_data.append({
-                            "tmdb_id": movie["id"],
-                            "title": movie["title"],
-                            "overview": movie.get("overview", ""),
-                            "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
-                            "release_date": movie.get("release_date", ""),
-                            "poster_path": movie.get("poster_path"),
-                            "vote_average": movie.get("vote_average", 0)
-                        })
-                        seen_movie_ids.add(movie["id"])
-                
-                # Generate AI-powered group recommendations from real movie data
-                recommendations = loop.run_until_complete(
-                    _generate_ai_group_recommendations_from_candidates(agent, room_id, taste_profiles, candidate_data)
-                )
-            
-            # Ensure valid structure
-            if not recommendations or not isinstance(recommendations, dict):
-                print(f"AI returned invalid group recommendations for room {room_id}")
-                recommendations = {
-                    "room_id": room_id,
-                    "recommendations": [],
-                    "generated_at": datetime.utcnow().isoformat(),
-                    "generation_method": "ai_failed"
-                }
-            
-            # Deduplicate recommendations by tmdb_id
-            if "recommendations" in recommendations and isinstance(recommendations["recommendations"], list):
-                seen_ids = set()
-                unique_recommendations = []
-                
-                for rec in recommendations["recommendations"]:
-                    if isinstance(rec, dict) and "tmdb_id" in rec:
-                        movie_id = str(rec["tmdb_id"])
-                        if movie_id not in seen_ids:
-                            seen_ids.add(movie_id)
-                            unique_recommendations.append(rec)
-                
-                recommendations["recommendations"] = unique_recommendations
-                print(f"Deduplicated group recommendations for room {room_id}: {len(unique_recommendations)} unique movies")
-            
-            # Add metadata
-            recommendations["room_id"] = room_id
-            recommendations["generated_at"] = datetime.utcnow().isoformat()
-            recommendations["generation_method"] = "ai_group"
-            
-            # Save and deliver recommendations
-            from app.services.room_service import RoomService
-            room_service = RoomService()
-            loop.run_until_complete(
-                room_service.save_and_deliver_recommendations(room_id, recommendations)
+                tmdb_service.get_trending_movies(limit=20)
             )
-            
-            # Update room status
-            from app.crud.room_crud import RoomCRUD
-            room_crud = RoomCRUD()
-            loop.run_until_complete(
-                room_crud.update_room(room_id, {"status": "active"})
+
+        if not candidate_movies:
+            print(f"No suitable movies found for room {room_id}")
+            recommendations = {
+                "room_id": room_id,
+                "recommendations": [],
+                "generated_at": datetime.utcnow().isoformat(),
+                "generation_method": "no_candidates"
+            }
+        else:
+            # Prepare candidate movies for AI
+            candidate_data = []
+            seen_movie_ids = set()  # Track seen movie IDs to avoid duplicates
+            
+            for movie in rank_candidates(candidate_movies, taste_profiles, top_k=settings.RANKER_TOP_K_GROUP):
+                if movie["id"] not in seen_movie_ids:  # Only add if not already seen
+                    candidate_data.append({
+                        "tmdb_id": movie["id"],
+                        "title": movie["title"],
+                        "overview": movie.get("overview", ""),
+                        "genre_ids": movie.get("genre_ids", []),  # Keep as integer IDs
+                        "genres": genre_registry.names_for(movie.get("genre_ids", [])),
+                        "release_date": movie.get("release_date", ""),
+                        "poster_path": movie.get("poster_path"),
+                        "vote_average": movie.get("vote_average", 0),
+                        "prerank_score": movie.get("prerank_score")
+                    })
+                    seen_movie_ids.add(movie["id"])
+            
+            # Generate AI-powered group recommendations from real movie data
+            recommendations = loop.run_until_complete(
+                _generate_ai_group_recommendations_from_candidates(agent, room_id, taste_profiles, candidate_data)
             )
-            
-            print(f"AI-powered group recommendations for room {room_id} successfully generated.")
-            return recommendations
-            
-        finally:
-            loop.close()
-            
+
+        # Ensure valid structure
+        if not recommendations or not isinstance(recommendations, dict):
+            print(f"AI returned invalid group recommendations for room {room_id}")
+            recommendations = {
+                "room_id": room_id,
+                "recommendations": [],
+                "generated_at": datetime.utcnow().isoformat(),
+                "generation_method": "ai_failed"
+            }
+
+        # Deduplicate recommendations by tmdb_id
+        if "recommendations" in recommendations and isinstance(recommendations["recommendations"], list):
+            seen_ids = set()
+            unique_recommendations = []
+            
+            for rec in recommendations["recommendations"]:
+                if isinstance(rec, dict) and "tmdb_id" in rec:
+                    movie_id = str(rec["tmdb_id"])
+                    if movie_id not in seen_ids:
+                        seen_ids.add(movie_id)
+                        unique_recommendations.append(rec)
+            
+            recommendations["recommendations"] = unique_recommendations
+            print(f"Deduplicated group recommendations for room {room_id}: {len(unique_recommendations)} unique movies")
+
+        # Add metadata
+        recommendations["room_id"] = room_id
+        recommendations["generated_at"] = datetime.utcnow().isoformat()
+        recommendations["generation_method"] = "ai_group"
+
+        # Save and deliver recommendations
+        from app.services.room_service import RoomService
+        room_service = RoomService()
+        loop.run_until_complete(
+            room_service.save_and_deliver_recommendations(room_id, recommendations)
+        )
+
+        # Update room status
+        from app.crud.room_crud import RoomCRUD
+        room_crud = RoomCRUD()
+        loop.run_until_complete(
+            room_crud.update_room(room_id, {"status": "active"})
+        )
+
+        print(f"AI-powered group recommendations for room {room_id} successfully generated.")
+        return recommendations
+
     except Exception as e:
         print(f"Error generating group recommendations for room {room_id}: {e}")
         # Update room status to active even if failed
         try:
             from app.crud.room_crud import RoomCRUD
             room_crud = RoomCRUD()
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(
-                    room_crud.update_room(room_id, {"status": "active"})
-                )
-            finally:
-                loop.close()
+            loop = get_worker_loop()
+            loop.run_until_complete(
+                room_crud.update_room(room_id, {"status": "active"})
+            )
         except:
             pass
         return None
 
 async def _generate_ai_group_recommendations_from_candidates(agent, room_id: str, taste_profiles: list, candidate_data: list) -> dict:
     """Generate AI group recommendations from a list of real movie candidates."""
-    import json
-    
-    messages = [
-        {"role": "system", "content": (
-            "You are a group movie recommendation expert. You will receive a list of real movies from TMDB "
-            "and multiple user taste profiles. Your task is to select 7-10 movies from the provided list "
-            "that would appeal to the group.\n\n"
-            "IMPORTANT RULES:\n"
-            "1. Only use movies from the provided candidate list.\n"
-            "2. Each movie can appear ONLY ONCE in your recommendations.\n"
-            "3. Do not duplicate any movie titles or IDs.\n"
-            "4. Select 7-10 unique movies.\n\n"
-            "Return a JSON object with this exact structure:\n"
-            "{\n"
-            '  "recommendations": [\n'
-            '    {\n'
-            '      "tmdb_id": "movie_id_from_list",\n'
-            '      "title": "movie_title_from_list",\n'
-            '      "poster_path": "poster_path_from_list",\n'
-            '      "group_score": 0.85,\n'
-            '      "reasons": ["reason1", "reason2"],\n'
-            '      "participants_who_liked": ["user_id1", "user_id2"]\n'
-            '    }\n'
-            '  ],\n'
-            '  "generated_at": "timestamp"\n'
-            "}\n\n"
-            "CRITICAL: Ensure no duplicate tmdb_id values in the recommendations array."
-        )},
-        {"role": "user", "content": f"Group Taste Profiles: {json.dumps(taste_profiles, ensure_ascii=False)}\n\nCandidate Movies: {json.dumps(candidate_data, ensure_ascii=False)}"}
-    ]
-    
-    return agent.chat(messages, temperature=0.6, max_tokens=6000)
+    prompt = build_group_prompt(taste_profiles, candidate_data)
+    print(f"Group recommendation prompt for room {room_id}: {len(prompt.movies)} candidates, ~{prompt.estimated_tokens} tokens")
+    result = await agent.achat(prompt.messages, temperature=0.6, max_tokens=settings.LLM_RECOMMENDATION_MAX_TOKENS, task_type="group_recommendations")
+    return prompt.expand(result)
 
 @celery_app.task(name="tasks.generate_moodboard_assets")
 def generate_moodboard_assets(movie_id: int):
@@ -466,39 +475,34 @@ def generate_moodboard_assets(movie_id: int):
         agent = AzureOpenAIAgent()
         tmdb_service = TMDBService()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = get_worker_loop()
         
-        try:
-            # Get movie details first from TMDB
-            movie_details = loop.run_until_complete(tmdb_service.get_movie_details(movie_id))
-            
-            print(f"Generating AI moodboard for movie {movie_id}")
-            
-            # Generate moodboard using AI
-            moodboard = loop.run_until_complete(
-                agent.generate_moodboard(movie_id, movie_details)
-            )
-            
-            # Add metadata
-            if moodboard:
-                moodboard["movie_id"] = movie_id
-                moodboard["generated_at"] = datetime.utcnow().isoformat()
-                moodboard["generation_method"] = "ai_creative"
-            
-            # Save moodboard to database
-            from app.crud.moodboard_crud import MoodboardCRUD
-            moodboard_crud = MoodboardCRUD()
-            loop.run_until_complete(
-                moodboard_crud.save_moodboard(movie_id, moodboard)
-            )
-            
-            print(f"AI moodboard for movie {movie_id} successfully generated.")
-            return moodboard
-            
-        finally:
-            loop.close()
-            
+        # Get movie details first from TMDB
+        movie_details = loop.run_until_complete(tmdb_service.get_movie_details(movie_id))
+
+        print(f"Generating AI moodboard for movie {movie_id}")
+
+        # Generate moodboard using AI
+        moodboard = loop.run_until_complete(
+            agent.generate_moodboard(movie_id, movie_details)
+        )
+
+        # Add metadata
+        if moodboard:
+            moodboard["movie_id"] = movie_id
+            moodboard["generated_at"] = datetime.utcnow().isoformat()
+            moodboard["generation_method"] = "ai_creative"
+
+        # Save moodboard to database
+        from app.crud.moodboard_crud import MoodboardCRUD
+        moodboard_crud = MoodboardCRUD()
+        loop.run_until_complete(
+            moodboard_crud.save_moodboard(movie_id, moodboard)
+        )
+
+        print(f"AI moodboard for movie {movie_id} successfully generated.")
+        return moodboard
+
     except Exception as e:
         print(f"Error generating moodboard for movie {movie_id}: {e}")
         return None
@@ -514,72 +518,73 @@ def refresh_recommendations_for_all_users():
         user_crud = UserCRUD()
         review_crud = ReviewCRUD()
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        loop = get_worker_loop()
         
-        try:
-            # Get all users
-            users = loop.run_until_complete(user_crud.get_all_users())
-            print(f"Starting AI recommendation refresh for {len(users)} users")
-            
-            processed_count = 0
-            skipped_count = 0
+        # Get all users
+        users = loop.run_until_complete(user_crud.get_all_users())
+        print(f"Starting AI recommendation refresh for {len(users)} users")
+
+        processed_count = 0
+        skipped_count = 0
+        due_user_ids = []
+
+        for user in users:
+            user_id = user.get('user_id')
+            if not user_id:
+                continue
             
-            for user in users:
-                user_id = user.get('user_id')
-                if not user_id:
-                    continue
+            try:
+                # Check if user has reviews (for taste profile generation)
+                reviews = loop.run_until_complete(review_crud.get_reviews_by_user(user_id))
+                
+                # Check if recommendations already exist and are recent (within 12 hours)
+                cache_key = f"user:{user_id}:recommendations"
+                existing_data = redis_client.get(cache_key)
+                
+                if existing_data:
+                    # Parse existing recommendations to check timestamp
+                    try:
+                        existing_recs = json.loads(existing_data)
+                        generated_at = existing_recs.get("generated_at")
+                        if generated_at:
+                            from datetime import datetime, timezone
+                            generated_time = datetime.fromisoformat(generated_at.replace('Z', '+00:00'))
+                            current_time = datetime.now(timezone.utc)
+                            hours_diff = (current_time - generated_time).total_seconds() / 3600
+                            
+                            # Skip if recommendations are less than 12 hours old
+                            if hours_diff < 12:
+                                print(f"Skipping user {user_id} - recommendations are {hours_diff:.1f} hours old")
+                                skipped_count += 1
+                                continue
+                    except Exception:
+                        # If parsing fails, regenerate anyway
+                        pass
                 
-                try:
-                    # Check if user has reviews (for taste profile generation)
-                    reviews = loop.run_until_complete(review_crud.get_reviews_by_user(user_id))
-                    
-                    # Check if recommendations already exist and are recent (within 12 hours)
-                    cache_key = f"user:{user_id}:recommendations"
-                    existing_data = redis_client.get(cache_key)
-                    
-                    if existing_data:
-                        # Parse existing recommendations to check timestamp
-                        try:
-                            existing_recs = json.loads(existing_data)
-                            generated_at = existing_recs.get("generated_at")
-                            if generated_at:
-                                from datetime import datetime, timezone
-                                generated_time = datetime.fromisoformat(generated_at.replace('Z', '+00:00'))
-                                current_time = datetime.now(timezone.utc)
-                                hours_diff = (current_time - generated_time).total_seconds() / 3600
-                                
-                                # Skip if recommendations are less than 12 hours old
-                                if hours_diff < 12:
-                                    print(f"Skipping user {user_id} - recommendations are {hours_diff:.1f} hours old")
-                                    skipped_count += 1
-                                    continue
-                        except Exception:
-                            # If parsing fails, regenerate anyway
-                            pass
-                    
-                    # Only process users with reviews or if no recent recommendations exist
-                    if reviews:
-                        # User has reviews - regenerate taste profile and recommendations
-                        generate_taste_profile.delay(user_id)
-                        generate_personal_recommendations.delay(user_id)
-                        print(f"Queued AI recommendation refresh for user {user_id} (has {len(reviews)} reviews)")
-                    else:
-                        # User has no reviews - just generate trending fallback
-                        # This will be handled by the API endpoint when user requests recommendations
-                        print(f"Skipping user {user_id} - no reviews yet")
-                        skipped_count += 1
-                        continue
-                    
-                    processed_count += 1
-                    
-                except Exception as e:
-                    print(f"Error processing user {user_id}: {e}")
+                # Only process users with reviews or if no recent recommendations exist
+                if reviews:
+                    # User has reviews - regenerate taste profile and recommendations (batched below)
+                    due_user_ids.append(user_id)
+                    print(f"Queued AI recommendation refresh for user {user_id} (has {len(reviews)} reviews)")
+                else:
+                    # User has no reviews - just generate trending fallback
+                    # This will be handled by the API endpoint when user requests recommendations
+                    print(f"Skipping user {user_id} - no reviews yet")
+                    skipped_count += 1
                     continue
-                    
-        finally:
-            loop.close()
+                
+                processed_count += 1
+                
+            except Exception as e:
+                print(f"Error processing user {user_id}: {e}")
+                continue
+                
             
+        # Several users' taste profiles per LLM call; each batch queues its users' recommendations once saved
+        batch_size = settings.TASTE_PROFILE_BATCH_SIZE
+        for start in range(0, len(due_user_ids), batch_size):
+            generate_taste_profiles_batch.delay(due_user_ids[start:start + batch_size], refresh_recommendations=True)
+
         print(f"AI-powered recommendation refresh completed. Processed: {processed_count}, Skipped: {skipped_count}")
         
     except Exception as e:
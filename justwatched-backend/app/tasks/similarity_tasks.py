@@ -0,0 +1,25 @@
+import time
+from app.celery_worker import celery_app, get_worker_loop
+from app.core.config import settings
+from app.crud.catalog_crud import CatalogCRUD
+from app.services.similarity_index import build_similarity_matrix, save_similarity_index
+
+@celery_app.task(name="tasks.build_similarity_index")
+def build_similarity_index():
+    """Rebuild the content similarity index from the local catalog's overviews, genres and keywords."""
+    try:
+        loop = get_worker_loop()
+        catalog = CatalogCRUD()
+        if not catalog.available:
+            print("TMDB catalog not available, skipping similarity index build")
+            return None
+        started = time.monotonic()
+        docs = loop.run_until_complete(catalog.get_movie_documents())
+        ids, matrix, _ = build_similarity_matrix(docs)
+        save_similarity_index(settings.SIMILARITY_INDEX_PATH, ids, matrix)
+        summary = {"movies": len(ids), "nonzeros": int(matrix.nnz), "seconds": round(time.monotonic() - started, 1)}
+        print(f"Similarity index build completed: {summary}")
+        return summary
+    except Exception as e:
+        print(f"Error building similarity index: {e}")
+        return None
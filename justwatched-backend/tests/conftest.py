@@ -0,0 +1,20 @@
+import os
+from unittest import mock
+
+# Settings has required fields; tests never reach the real services
+for name, value in {
+    "GOOGLE_APPLICATION_CREDENTIALS": "test-firebase-key.json",
+    "FIREBASE_API_KEY": "test",
+    "TMDB_API_KEY": "test",
+    "AZURE_OPENAI_KEY": "test",
+    "AZURE_ENDPOINT": "http://127.0.0.1:9",
+    "AZURE_DEPLOYMENT_NAME": "test",
+    "CELERY_BROKER_URL": "redis://127.0.0.1:9/0",
+    "CELERY_RESULT_BACKEND": "redis://127.0.0.1:9/0",
+}.items():
+    os.environ.setdefault(name, value)
+
+import app.core.firestore as firestore  # noqa: E402
+
+# CRUD classes fetch the client on construction
+firestore.get_firestore_client = mock.MagicMock(name="get_firestore_client")
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import pytest
+from fastapi import HTTPException
+import app.api.v1.endpoints.ai as ai
+from app.agents.llm_limiter import LLMQuotaExceeded
+from app.agents.prompt_compaction import build_group_prompt, build_personal_prompt
+from app.core.resilience import RateLimitTimeout
+
+CANDIDATES = [
+    {"id": 1, "tmdb_id": 1, "title": "First", "prerank_score": 0.9},
+    {"id": 2, "tmdb_id": 2, "title": "Second", "prerank_score": 0.5},
+]
+GROUP = ai.GroupRecommendRequest(taste_profiles=[{"user_id": "a"}, {"user_id": "b"}])
+PERSONAL = ai.PersonalRecommendRequest(taste_profile={"user_id": "a"}, watched_movie_ids=[])
+
+@pytest.fixture
+def group_prompt(monkeypatch):
+    async def prepare(data):
+        return build_group_prompt(data.taste_profiles, CANDIDATES)
+    monkeypatch.setattr(ai, "prepare_group_prompt", prepare)
+
+@pytest.fixture
+def personal_prompt(monkeypatch):
+    async def prepare(data):
+        return build_personal_prompt(data.taste_profile, CANDIDATES)
+    monkeypatch.setattr(ai, "prepare_personal_prompt", prepare)
+
+def _achat_returning(result=None, error=None):
+    async def achat(*args, **kwargs):
+        if error:
+            raise error
+        return result
+    return achat
+
+@pytest.mark.parametrize("achat", [
+    _achat_returning(error=RuntimeError("upstream 500")),
+    _achat_returning({"error": "JSON parsing failed", "raw_response": "{"}),
+    _achat_returning({"r": []}),
+])
+def test_group_recommendations_fall_back_to_pre_ranker(monkeypatch, group_prompt, achat):
+    monkeypatch.setattr(ai.ai_agent, "achat", achat)
+    result = asyncio.run(ai.recommend_group(GROUP))
+    assert result["generation_method"] == "heuristic_ranker"
+    assert [rec["tmdb_id"] for rec in result["recommendations"]] == [1, 2]
+
+def test_group_recommendations_expand_model_picks(monkeypatch, group_prompt):
+    monkeypatch.setattr(ai.ai_agent, "achat", _achat_returning({"r": [{"i": 2, "s": 0.8, "why": "fun", "u": [1]}, {"i": 2, "s": 0.1}]}))
+    result = asyncio.run(ai.recommend_group(GROUP))
+    assert [rec["tmdb_id"] for rec in result["recommendations"]] == [2]
+    assert result["recommendations"][0]["participants_who_liked"] == ["a"]
+
+def test_group_recommendations_keep_quota_errors(monkeypatch, group_prompt):
+    monkeypatch.setattr(ai.ai_agent, "achat", _achat_returning(error=LLMQuotaExceeded("daily quota used")))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(ai.recommend_group(GROUP))
+    assert exc.value.status_code == 429
+
+def _stream_of(*chunks, error=None):
+    async def achat_stream(*args, **kwargs):
+        for chunk in chunks:
+            yield chunk
+        if error:
+            raise error
+    return achat_stream
+
+def _run_stream(endpoint, data):
+    async def call():
+        response = await endpoint(data, format="ndjson")
+        return response, [json.loads(line) async for line in response.body_iterator]
+    return asyncio.run(call())
+
+def test_stream_sends_picks_as_they_complete(monkeypatch, personal_prompt):
+    monkeypatch.setattr(ai.ai_agent, "achat_stream", _stream_of('{"r":[{"i":2,"s":0.9}', ',{"i":1,"s":0.4}]}'))
+    _, events = _run_stream(ai.recommend_personal_stream, PERSONAL)
+    assert [e["recommendation"]["tmdb_id"] for e in events if e["type"] == "recommendation"] == [2, 1]
+    assert events[-1]["type"] == "done" and events[-1]["count"] == 2
+
+@pytest.mark.parametrize("error, status", [(LLMQuotaExceeded("daily quota used"), 429), (RateLimitTimeout("busy"), 503)])
+def test_stream_limiter_rejections_are_status_codes(monkeypatch, personal_prompt, error, status):
+    monkeypatch.setattr(ai.ai_agent, "achat_stream", _stream_of(error=error))
+    with pytest.raises(HTTPException) as exc:
+        _run_stream(ai.recommend_personal_stream, PERSONAL)
+    assert exc.value.status_code == status
+
+@pytest.mark.parametrize("achat_stream", [
+    _stream_of(error=RuntimeError("upstream 500")),
+    _stream_of('{"r":[{"i":', error=RuntimeError("connection reset")),
+    _stream_of("not json"),
+])
+def test_stream_failing_before_first_pick_serves_pre_ranker(monkeypatch, group_prompt, achat_stream):
+    monkeypatch.setattr(ai.ai_agent, "achat_stream", achat_stream)
+    response, events = _run_stream(ai.recommend_group_stream, GROUP)
+    assert response.status_code == 200
+    assert [e["recommendation"]["tmdb_id"] for e in events if e["type"] == "recommendation"] == [1, 2]
+    assert events[-1] == {**events[-1], "type": "done", "generation_method": "heuristic_ranker"}
+
+def test_stream_failing_after_a_pick_reports_the_error(monkeypatch, personal_prompt):
+    monkeypatch.setattr(ai.ai_agent, "achat_stream", _stream_of('{"r":[{"i":2,"s":0.9},', error=RuntimeError("connection reset")))
+    _, events = _run_stream(ai.recommend_personal_stream, PERSONAL)
+    assert [e["type"] for e in events] == ["recommendation", "error"]
@@ -0,0 +1,59 @@
+from app.agents.azure_openai_agent import AzureOpenAIAgent, PARSE_FAILED
+from app.agents.llm_cache import llm_cache
+from app.agents.output_schemas import RecommendationsOutput
+
+def _completion(content, finish_reason="stop"):
+    return {"choices": [{"message": {"content": content}, "finish_reason": finish_reason}], "usage": {}}
+
+def test_off_schema_completion_falls_back_and_is_not_cached(monkeypatch):
+    stored = []
+    monkeypatch.setattr(llm_cache, "set", lambda *args: stored.append(args))
+    result = AzureOpenAIAgent()._handle_completion(_completion('{"recommendations": []}'), "key", "recommendations", True, RecommendationsOutput)
+    assert result["error"] == PARSE_FAILED
+    assert stored == []
+
+def test_truncated_completion_is_salvaged_and_cached(monkeypatch):
+    stored = []
+    monkeypatch.setattr(llm_cache, "set", lambda *args: stored.append(args))
+    content = '{"r":[{"i":1,"s":0.8,"why":"x"},{"i":2,"s":0.7,"wh'
+    result = AzureOpenAIAgent()._handle_completion(_completion(content, "length"), "key", "recommendations", True, RecommendationsOutput)
+    assert result == {"r": [{"i": 1, "s": 0.8, "why": "x"}]}
+    assert len(stored) == 1
+
+def test_rejected_json_schema_falls_back_to_json_object(monkeypatch):
+    import json
+    import httpx
+    import app.agents.azure_openai_agent as agent_module
+    from app.agents.llm_limiter import llm_limiter
+    monkeypatch.setattr(agent_module, "_structured_outputs_rejected", False)
+    monkeypatch.setattr(llm_limiter, "acquire_sync", lambda *args: None)
+    monkeypatch.setattr(llm_limiter, "release", lambda *args: None)
+    formats = []
+
+    def handler(request):
+        response_format = json.loads(request.content)["response_format"]["type"]
+        formats.append(response_format)
+        if response_format == "json_schema":
+            return httpx.Response(400, json={"error": {"message": "Invalid parameter: 'response_format' of type 'json_schema' is not supported with this model."}})
+        return httpx.Response(200, json=_completion('{"r":[{"i":1,"s":0.5,"why":"x"}]}'))
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(agent_module, "get_llm_sync_client", lambda: client)
+    agent = AzureOpenAIAgent()
+    messages = [{"role": "user", "content": "pick"}]
+    assert agent.chat(messages, task_type="recommendations", use_cache=False) == {"r": [{"i": 1, "s": 0.5, "why": "x"}]}
+    assert agent.chat(messages, task_type="recommendations", use_cache=False)["r"][0]["i"] == 1
+    # One rejected json_schema attempt, then json_object for the resend and every later call
+    assert formats == ["json_schema", "json_object", "json_object"]
+
+def test_other_bad_requests_are_not_retried(monkeypatch):
+    import httpx
+    import pytest
+    import app.agents.azure_openai_agent as agent_module
+    monkeypatch.setattr(agent_module, "_structured_outputs_rejected", False)
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(400, json={"error": {"message": "context too long"}})))
+    monkeypatch.setattr(agent_module, "get_llm_sync_client", lambda: client)
+    body = AzureOpenAIAgent()._request_body([{"role": "user", "content": "x"}], 0.5, 100, RecommendationsOutput)
+    with pytest.raises(httpx.HTTPStatusError):
+        AzureOpenAIAgent()._post_completion(body, "recommendations")
+    assert agent_module._structured_outputs_rejected is False
@@ -0,0 +1,50 @@
+from app.services.candidate_ranker import heuristic_recommendations, rank_candidates
+
+def _movie(movie_id, genre_ids=(), rating=7.0, votes=1000, popularity=10.0, date="2015-01-01", language="en"):
+    return {
+        "id": movie_id, "title": f"Movie {movie_id}", "genre_ids": list(genre_ids), "vote_average": rating,
+        "vote_count": votes, "popularity": popularity, "release_date": date, "original_language": language,
+    }
+
+def test_favorite_genres_rank_first():
+    movies = [_movie(1, [18]), _movie(2, [27]), _movie(3, [35])]
+    ranked = rank_candidates(movies, [{"favorite_genres": ["Horror Movies", "comedy"]}])
+    assert [m["id"] for m in ranked] == [2, 3, 1]
+    assert ranked[0]["prerank_score"] > ranked[1]["prerank_score"] > ranked[2]["prerank_score"]
+
+def test_watched_duplicate_and_invalid_ids_are_dropped():
+    movies = [_movie(1), _movie(2), _movie(1, rating=9.9), _movie("not-an-id"), _movie(3)]
+    ranked = rank_candidates(movies, [{}], watched_ids=["3"])
+    assert sorted(m["id"] for m in ranked) == [1, 2]
+    # First occurrence of a repeated ID wins
+    assert next(m for m in ranked if m["id"] == 1)["vote_average"] == 7.0
+
+def test_top_k_keeps_best():
+    movies = [_movie(i, rating=float(i)) for i in range(1, 8)]
+    ranked = rank_candidates(movies, [{}], top_k=3)
+    assert [m["id"] for m in ranked] == [7, 6, 5]
+    assert "prerank_score" not in movies[6]
+
+def test_sparse_votes_are_pulled_toward_the_mean():
+    movies = [_movie(1, rating=10.0, votes=2), _movie(2, rating=8.0, votes=5000), _movie(3, rating=5.0, votes=5000)]
+    assert [m["id"] for m in rank_candidates(movies, [{}])] == [2, 1, 3]
+
+def test_group_profiles_are_averaged():
+    movies = [_movie(1, [27]), _movie(2, [35]), _movie(3, [27, 35])]
+    ranked = rank_candidates(movies, [{"favorite_genres": ["horror"]}, {"favorite_genres": ["comedy"]}])
+    assert ranked[0]["id"] == 3
+
+def test_era_and_language_preferences():
+    movies = [_movie(1, date="1960-05-01", language="fr"), _movie(2, date="2020-05-01")]
+    assert rank_candidates(movies, [{"preferred_era": "classic", "preferred_language": "foreign"}])[0]["id"] == 1
+    assert rank_candidates(movies, [{"preferred_era": "modern", "preferred_language": "english"}])[0]["id"] == 2
+
+def test_empty_inputs():
+    assert rank_candidates([], [{}]) == []
+    assert rank_candidates([_movie(1)], [{}], watched_ids=[1]) == []
+
+def test_heuristic_recommendations_keep_ranker_order():
+    ranked = rank_candidates([_movie(1, rating=5.0), _movie(2, rating=9.0)], [{}])
+    result = heuristic_recommendations(ranked, limit=1)
+    assert result["generation_method"] == "heuristic_ranker"
+    assert [(rec["tmdb_id"], rec["confidence_score"]) for rec in result["recommendations"]] == [(2, ranked[0]["prerank_score"])]
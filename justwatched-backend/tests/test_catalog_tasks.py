@@ -0,0 +1,37 @@
+import asyncio
+import gzip
+import os
+import httpx
+from app.core.config import settings
+from app.crud.catalog_crud import CatalogCRUD
+from app.tasks import catalog_tasks
+
+def test_filter_existing_ids_uses_one_query(tmp_path):
+    catalog = CatalogCRUD(path=str(tmp_path / "catalog.db"))
+
+    async def main():
+        await catalog.upsert_export_rows("movie", [{"id": i, "original_title": f"M{i}"} for i in (3, 5, 7)])
+        # More IDs than SQLite allows as separate placeholders
+        return await catalog.filter_existing_ids("movie", [7, 1, 5] + list(range(100000, 140000)))
+
+    assert asyncio.run(main()) == [7, 5]
+
+def test_export_is_downloaded_with_the_pooled_client(monkeypatch):
+    body = gzip.compress(b'{"id": 1, "popularity": 2.5}\n\n{"id": 2}\n')
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        if len(requested) == 1:
+            return httpx.Response(404)  # Today's export isn't published yet
+        return httpx.Response(200, content=body)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://api.example.test/3")
+    monkeypatch.setattr(catalog_tasks, "get_tmdb_client", lambda: client)
+    monkeypatch.setattr(settings, "TMDB_EXPORTS_DIR", "")
+    monkeypatch.setattr(settings, "TMDB_EXPORTS_BASE_URL", "https://files.example.test/p/exports")
+
+    path, downloaded = asyncio.run(catalog_tasks._locate_export("movie_ids"))
+    assert downloaded and all(url.startswith("https://files.example.test/p/exports/movie_ids_") for url in requested)
+    assert list(catalog_tasks._iter_export_rows(path, downloaded)) == [{"id": 1, "popularity": 2.5}, {"id": 2}]
+    assert not os.path.exists(path)
@@ -0,0 +1,61 @@
+import pytest
+from app.core.config import settings
+from app.services.collaborative_filtering import (
+    ItemNeighbourIndex, build_rating_matrix, compute_item_neighbours, ratings_fingerprint, save_item_neighbours,
+)
+
+# Users who like 10 also like 20 and dislike 30; 40 is middling for everyone, 50 has too few raters
+def _ratings():
+    ratings = []
+    for user in range(8):
+        fan = user < 4
+        for media_id, rating in ((10, 5 if fan else 1), (20, 5 if fan else 1), (30, 1 if fan else 5), (40, 3)):
+            ratings.append({"user_id": f"u{user}", "media_id": str(media_id), "rating": rating})
+    ratings += [{"user_id": "u0", "media_id": "50", "rating": 5}, {"user_id": "u1", "media_id": "50", "rating": 5}]
+    return ratings
+
+def test_sparse_items_are_dropped_and_the_latest_rating_wins():
+    ratings = _ratings() + [
+        {"user_id": "u0", "media_id": "10", "rating": 1, "updated_at": "2024-01-02"},
+        {"user_id": "u0", "media_id": "tv-1", "rating": 5},
+    ]
+    item_ids, matrix = build_rating_matrix(ratings)
+    assert list(item_ids) == [10, 20, 30, 40]
+    assert matrix.shape == (8, 4)
+    # u0 now rates 10/20/30/40 as 1/5/1/3 (mean 2.5)
+    assert matrix[0].toarray().ravel().tolist() == [-1.5, 2.5, -1.5, 0.5]
+
+def test_fingerprint_ignores_order():
+    ratings = _ratings()
+    assert ratings_fingerprint(ratings) == ratings_fingerprint(list(reversed(ratings)))
+    assert ratings_fingerprint(ratings) != ratings_fingerprint(ratings[1:])
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    # Several item ranges, all computed in-process
+    monkeypatch.setattr(settings, "ITEM_CF_CHUNK_SIZE", 2)
+    ratings = _ratings()
+    item_ids, matrix = build_rating_matrix(ratings)
+    neighbours, scores = compute_item_neighbours(matrix, workers=1)
+    path = str(tmp_path / "item_cf.npz")
+    save_item_neighbours(path, item_ids, neighbours, scores, ratings_fingerprint(ratings))
+    return ItemNeighbourIndex(path)
+
+def test_neighbours_are_positive_and_shrunk(index):
+    assert index.available
+    assert index.fingerprint == ratings_fingerprint(_ratings())
+    liked = index.also_liked([10])
+    assert [movie_id for movie_id, _ in liked] == [20]
+    # Perfect correlation over 8 co-raters, shrunk by 8 / (8 + ITEM_CF_SHRINKAGE)
+    assert liked[0][1] == pytest.approx(8 / 18, abs=1e-3)
+
+def test_also_liked_excludes_seeds_and_weighs_them(index):
+    assert index.also_liked([10, 20]) == []
+    assert index.also_liked([999]) == []
+    # 30 and 40 move together once ratings are centered on each user's mean
+    assert [movie_id for movie_id, _ in index.also_liked([30, 10], weights=[1.0, 0.5])] == [40, 20]
+    assert [movie_id for movie_id, _ in index.also_liked([30, 10], weights=[0.5, 1.0])] == [20, 40]
+
+def test_disabled_index_returns_nothing(index, monkeypatch):
+    monkeypatch.setattr(settings, "ITEM_CF_ENABLED", False)
+    assert index.also_liked([10]) == []
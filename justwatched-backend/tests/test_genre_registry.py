@@ -0,0 +1,49 @@
+import asyncio
+import fakeredis
+from app.services.genre_registry import GenreRegistry, normalize_genre_name
+
+def test_normalize_genre_name():
+    assert normalize_genre_name("Sci-Fi Movies") == "sci fi"
+    assert normalize_genre_name("Action & Adventure") == "action and adventure"
+    assert normalize_genre_name("Comédie") == "comedie"
+    assert normalize_genre_name("Movies") == "movies"
+
+def test_resolve_exact_synonym_composite_and_fuzzy_names():
+    registry = GenreRegistry(redis=fakeredis.FakeRedis())
+    assert registry.resolve("Horror") == 27
+    assert registry.resolve("SCIENCE FICTION films") == 878
+    assert registry.resolve("sci-fi") == 878
+    assert registry.resolve("rom-com") == 10749
+    assert registry.resolve("dark psychological thriller") == 53
+    assert registry.resolve("Documentray") == 99
+    assert registry.resolve("knitting") is None
+    assert registry.resolve("") is None
+
+def test_resolve_per_media_type():
+    registry = GenreRegistry(redis=fakeredis.FakeRedis())
+    assert registry.resolve("sci-fi", "tv") == 10765
+    assert registry.resolve("action", "tv") == 10759
+    assert registry.resolve("action") == 28
+
+def test_names_for_falls_back_to_the_other_list():
+    registry = GenreRegistry(redis=fakeredis.FakeRedis())
+    assert registry.names_for([28, 10765, 999999, "x"]) == ["Action", "Sci-Fi & Fantasy"]
+
+class FakeTMDB:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_genre_list(self, media_type):
+        self.calls += 1
+        return [{"id": 28, "name": "Action Movies"}] if media_type == "movie" else []
+
+def test_live_lists_are_shared_through_redis():
+    redis = fakeredis.FakeRedis()
+    tmdb = FakeTMDB()
+    first, second = GenreRegistry(redis=redis), GenreRegistry(redis=redis)
+    asyncio.run(first.ensure_loaded(tmdb))
+    asyncio.run(second.ensure_loaded(tmdb))
+    assert tmdb.calls == 2  # Movie and TV lists, fetched once for both registries
+    assert second.name_for(28) == "Action Movies"
+    # Defaults fill genres missing from the live list
+    assert second.name_for(27) == "Horror"
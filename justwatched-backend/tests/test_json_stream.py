@@ -0,0 +1,25 @@
+from app.agents.json_stream import IncrementalArrayParser
+
+def test_items_arrive_as_their_braces_close():
+    parser = IncrementalArrayParser("r")
+    assert parser.feed('{"r":[{"i":1,"s":0.5') == []
+    assert parser.feed('},{"i":2') == [{"i": 1, "s": 0.5}]
+    assert parser.feed(',"why":"a } in text"}]}') == [{"i": 2, "why": "a } in text"}]
+
+def test_character_by_character_feed():
+    text = '```json\n{"note":"[{\\"i\\":9}]","r":[{"i":1,"u":[1,2],"x":{"y":1}},{"i":2}]}\n```'
+    parser = IncrementalArrayParser("r")
+    items = [item for ch in text for item in parser.feed(ch)]
+    assert items == [{"i": 1, "u": [1, 2], "x": {"y": 1}}, {"i": 2}]
+
+def test_only_the_named_top_level_array_is_read():
+    parser = IncrementalArrayParser("r")
+    assert parser.feed('{"meta":{"r":[{"i":0}]},"other":[{"i":3}],"r":[{"i":4}]}') == [{"i": 4}]
+
+def test_malformed_items_are_skipped():
+    parser = IncrementalArrayParser("r")
+    assert parser.feed('{"r":[{"i":1,},{"i":2}]}') == [{"i": 2}]
+
+def test_truncated_output_keeps_complete_items():
+    parser = IncrementalArrayParser("profiles")
+    assert parser.feed('{"profiles":[{"u":"U1","favorite_genres":["Drama"]},{"u":"U2","favorite_gen') == [{"u": "U1", "favorite_genres": ["Drama"]}]
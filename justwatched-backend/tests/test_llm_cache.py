@@ -0,0 +1,37 @@
+import asyncio
+import fakeredis
+from app.agents.llm_cache import LLMResponseCache
+from app.core.config import settings
+
+MESSAGES = [{"role": "system", "content": "Pick  movies.\n"}, {"role": "user", "content": "Candidates: [1, 2]"}]
+
+def test_keys_ignore_whitespace_but_not_params():
+    key = LLMResponseCache.make_key("gpt", MESSAGES, 0.7, 500)
+    respaced = [{"role": "system", "content": "Pick movies."}, {"role": "user", "content": " Candidates:  [1, 2] "}]
+    assert LLMResponseCache.make_key("gpt", respaced, 0.7, 500) == key
+    assert LLMResponseCache.make_key("gpt", MESSAGES, 0.2, 500) != key
+    assert LLMResponseCache.make_key("gpt", MESSAGES, 0.7, 500, output_schema="abc") != key
+
+def test_round_trip_counts_hits_and_saved_tokens():
+    cache = LLMResponseCache(redis=fakeredis.FakeRedis())
+
+    async def main():
+        await cache.aset("k", {"r": [1]}, {"prompt_tokens": 100, "completion_tokens": 20}, "recommendations")
+        return await cache.aget("k"), await cache.aget("missing")
+
+    assert asyncio.run(main()) == ({"r": [1]}, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["tokens_saved"], stats["entries"]) == (1, 1, 120, 1)
+
+def test_parse_failures_are_not_cached():
+    cache = LLMResponseCache(redis=fakeredis.FakeRedis())
+    cache.set("k", {"error": "JSON parsing failed"}, None)
+    assert cache.get("k") is None
+
+def test_oldest_entries_are_evicted_past_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_MAX_ENTRIES", 2)
+    cache = LLMResponseCache(redis=fakeredis.FakeRedis())
+    for key in ("a", "b", "c"):
+        cache.set(key, {"key": key}, None)
+    assert cache.get("a") is None and cache.get("c") == {"key": "c"}
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,77 @@
+import asyncio
+import fakeredis
+import pytest
+from app.agents.llm_limiter import LANES, LEASES_KEY, TPM_KEY_PREFIX, LLMLimiter, LLMQuotaExceeded, WAITING_KEY
+from app.core.config import settings
+from app.core.resilience import RateLimitTimeout
+
+MESSAGES = [{"role": "user", "content": "pick"}]
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "LLM_INTERACTIVE_RESERVED", 1)
+    monkeypatch.setattr(settings, "LLM_SCHEDULED_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "LLM_TOKENS_PER_MINUTE", 1000)
+    monkeypatch.setattr(settings, "LLM_USER_DAILY_TOKEN_QUOTA", 500)
+    return LLMLimiter(redis=fakeredis.FakeRedis())
+
+def _slots(limiter, lane, tries=10):
+    leases = [limiter._new_lease(MESSAGES, 10, lane, None) for _ in range(tries)]
+    return [lease for lease in leases if limiter._try_slot(lease)]
+
+def test_lanes_are_capped_and_interactive_gets_the_reserve(limiter):
+    assert len(_slots(limiter, "scheduled")) == 2
+    assert len(_slots(limiter, "on_demand")) == 1  # 3 shared slots, 2 taken by scheduled calls
+    assert len(_slots(limiter, "interactive")) == 1
+    assert limiter.redis.zcard(LEASES_KEY) == 4
+
+def test_lower_lanes_wait_behind_a_waiting_interactive_call(limiter):
+    _slots(limiter, "on_demand", tries=3)
+    interactive = limiter._new_lease(MESSAGES, 10, "interactive", None)
+    assert limiter._try_slot(interactive)
+    assert not limiter._try_slot(limiter._new_lease(MESSAGES, 10, "interactive", None))
+    # A queued interactive waiter blocks a lower lane even once a slot frees up
+    limiter.release(interactive)
+    assert not limiter._try_slot(limiter._new_lease(MESSAGES, 10, "scheduled", None))
+    assert limiter.redis.zcard(WAITING_KEY) == 2
+
+def test_tokens_per_minute_are_reserved_and_settled(limiter):
+    lease = limiter._new_lease(MESSAGES, 600, "interactive", "u1")
+    assert limiter._try_tpm(lease) == 0
+    assert 0 < limiter._try_tpm(limiter._new_lease(MESSAGES, 600, "interactive", None)) <= 60
+    window_key = f"{TPM_KEY_PREFIX}:{lease.window}"
+    limiter.release(lease, {"total_tokens": 100})
+    # The unused part of the reservation is refunded and the actual usage charged to the user's quota
+    assert int(limiter.redis.get(window_key)) == 100
+    assert int(limiter.redis.get(limiter._quota_key("u1"))) == 100
+
+def test_an_empty_window_admits_an_oversized_call(limiter):
+    assert limiter._try_tpm(limiter._new_lease(MESSAGES, 5000, "scheduled", None)) == 0
+
+def test_lower_lanes_get_a_share_of_the_tokens(limiter):
+    assert limiter._try_tpm(limiter._new_lease(MESSAGES, 500, "interactive", None)) == 0
+    assert limiter._try_tpm(limiter._new_lease(MESSAGES, 200, "scheduled", None)) > 0
+    assert limiter._try_tpm(limiter._new_lease(MESSAGES, 200, "on_demand", None)) == 0
+
+def test_daily_quota(limiter):
+    limiter.redis.set(limiter._quota_key("u1"), 500)
+    with pytest.raises(LLMQuotaExceeded):
+        limiter._new_lease(MESSAGES, 10, "interactive", "u1")
+    assert limiter._new_lease(MESSAGES, 10, "interactive", "u2")
+
+def test_async_acquire_and_release(limiter, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_LIMITER_MAX_WAIT_SCHEDULED", 0.05)
+    monkeypatch.setattr(settings, "LLM_LIMITER_POLL_INTERVAL", 0.01)
+
+    async def main():
+        leases = [await limiter.acquire(MESSAGES, 10, "scheduled") for _ in range(2)]
+        with pytest.raises(RateLimitTimeout):
+            await limiter.acquire(MESSAGES, 10, "scheduled")
+        for lease in leases:
+            await limiter.arelease(lease)
+        return await limiter.acquire(MESSAGES, 10, "scheduled")
+
+    assert asyncio.run(main()).holds_slot
+    # The caller that gave up left the waiting queue
+    assert not [m for m in limiter.redis.zrange(WAITING_KEY, 0, -1) if m.decode().startswith(f"{LANES['scheduled']}:")]
@@ -0,0 +1,25 @@
+import asyncio
+import threading
+import fakeredis
+from app.core.config import settings
+from app.services import movie_lists as movie_lists_module
+from app.services.movie_lists import MovieListStore
+
+def test_stale_lists_are_served_and_refreshed_once_off_the_event_loop(monkeypatch):
+    sent = []
+    monkeypatch.setattr(movie_lists_module.celery_app, "send_task", lambda name, args: sent.append((name, args, threading.current_thread().name)))
+    monkeypatch.setattr(settings, "MOVIE_LISTS_SOFT_TTL", -1)
+    store = MovieListStore(redis=fakeredis.FakeRedis())
+    params = {"time_window": "week", "language": None}
+
+    async def main():
+        missing = await store.aget("trending", params)
+        await store.aset("trending", params, [{"id": 1}])
+        return missing, await store.aget("trending", params), await store.aget("trending", params)
+
+    missing, first, second = asyncio.run(main())
+    assert missing is None and first == second == [{"id": 1}]
+    assert len(sent) == 1
+    name, args, thread = sent[0]
+    assert (name, args) == ("tasks.refresh_movie_list", ["trending", params])
+    assert thread.startswith("redis")
@@ -0,0 +1,63 @@
+from app.agents.output_schemas import OUTPUT_MODELS, response_format
+
+def _walk(node, path="$"):
+    if isinstance(node, dict):
+        yield path, node
+        for key, value in node.items():
+            yield from _walk(value, f"{path}.{key}")
+    elif isinstance(node, list):
+        for index, value in enumerate(node):
+            yield from _walk(value, f"{path}[{index}]")
+
+def test_strict_schemas_have_no_unsupported_keywords():
+    for model in OUTPUT_MODELS:
+        schema = response_format(model)["json_schema"]["schema"]
+        for path, node in _walk(schema):
+            if path.endswith(".properties"):
+                continue  # Property names, not schema keywords
+            assert "allOf" not in node, f"{model.__name__}: allOf at {path}"
+            assert "default" not in node, f"{model.__name__}: default at {path}"
+
+def test_strict_schema_objects_require_every_property():
+    for model in OUTPUT_MODELS:
+        schema = response_format(model)["json_schema"]["schema"]
+        for path, node in _walk(schema):
+            if path.endswith(".properties") or "properties" not in node:
+                continue
+            assert node["additionalProperties"] is False, f"{model.__name__} at {path}"
+            assert node["required"] == list(node["properties"]), f"{model.__name__} at {path}"
+
+def test_moodboard_palette_is_a_plain_ref():
+    from app.agents.output_schemas import MoodboardOutput
+    schema = response_format(MoodboardOutput)["json_schema"]["schema"]
+    assert schema["properties"]["color_palette"] == {"$ref": "#/$defs/ColorPalette"}
+
+def test_off_schema_output_is_rejected():
+    from app.agents.output_schemas import RecommendationsOutput, TasteProfileOutput, MoodboardOutput, validate_output
+    assert validate_output(RecommendationsOutput, {"recommendations": [{"tmdb_id": 1}]}) == (None, False)
+    assert validate_output(TasteProfileOutput, {}) == (None, False)
+    assert validate_output(MoodboardOutput, {"images": []}) == (None, False)
+    assert validate_output(RecommendationsOutput, [1, 2]) == (None, False)
+
+def test_valid_output_is_complete():
+    from app.agents.output_schemas import RecommendationsOutput, TasteProfileOutput, validate_output
+    assert validate_output(RecommendationsOutput, {"r": []}) == ({"r": []}, True)
+    result, complete = validate_output(TasteProfileOutput, {"favorite_genres": ["Drama"], "extra": 1})
+    assert complete and result == {"favorite_genres": ["Drama"]}
+
+def test_invalid_items_are_dropped():
+    from app.agents.output_schemas import GroupRecommendationsOutput, validate_output
+    data = {"r": [{"i": 1, "s": 3, "why": "fun", "u": [1]}, {"i": "x"}, "junk", {"i": 2}]}
+    result, complete = validate_output(GroupRecommendationsOutput, data)
+    assert not complete
+    assert result == {"r": [{"i": 1, "s": 1.0, "why": ["fun"], "u": [1]}, {"i": 2}]}
+
+def test_salvage_recovers_complete_items_from_truncated_output():
+    from app.agents.output_schemas import RecommendationsOutput, TasteProfileBatchOutput, salvage_output
+    truncated = '```json\n{"r":[{"i":4,"s":0.9,"why":"a {tricky} \\"quote\\""},{"i":"bad"},{"i":7,"s":0.5},{"i":9,"s":0.'
+    assert salvage_output(RecommendationsOutput, truncated) == {
+        "r": [{"i": 4, "s": 0.9, "why": 'a {tricky} "quote"'}, {"i": 7, "s": 0.5}]
+    }
+    assert salvage_output(RecommendationsOutput, '{"r":[{"i":') is None
+    batch = '{"profiles":[{"u":"U1","favorite_genres":["Drama"]},{"u":"U2","favorite_genres":["Com'
+    assert salvage_output(TasteProfileBatchOutput, batch) == {"profiles": [{"u": "U1", "favorite_genres": ["Drama"]}]}
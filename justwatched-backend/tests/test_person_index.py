@@ -0,0 +1,28 @@
+import asyncio
+import fakeredis
+from app.services.person_index import PersonIndex, pick_person
+
+def test_entries_round_trip_through_redis():
+    redis = fakeredis.FakeRedis()
+    writer, reader = PersonIndex(redis=redis), PersonIndex(redis=redis)
+    people = [{"id": 7, "name": "Greta Gerwig", "known_for_department": "Directing", "popularity": 30}]
+
+    async def main():
+        person, confidence = pick_person("greta gerwig", people, "Directing")
+        await writer.record("Greta Gerwig", "Directing", person, confidence, "tmdb")
+        return await reader.lookup("Greta  Gerwig", "Directing"), await reader.lookup("Greta Gerwig", "Acting")
+
+    found, other_department = asyncio.run(main())
+    assert found["id"] == 7 and found["confidence"] == 1.0
+    assert other_department is None
+
+def test_misses_are_rechecked_later(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "PERSON_INDEX_RECHECK_AFTER", -1)
+    index = PersonIndex(redis=fakeredis.FakeRedis())
+
+    async def main():
+        await index.record("Nobody", None, None, 0.0, "tmdb")
+        return await index.lookup("Nobody")
+
+    assert asyncio.run(main()) is None
@@ -0,0 +1,37 @@
+from app.agents.prompt_compaction import build_group_prompt, build_personal_prompt, trim_text
+from app.core.config import settings
+
+def _candidates(n, overview="A quiet story about a lighthouse keeper."):
+    return [{"tmdb_id": i, "title": f"Movie {i}", "genre_ids": [18], "release_date": "2001-01-01", "overview": overview} for i in range(1, n + 1)]
+
+def _last_line(prompt):
+    return prompt.messages[-1]["content"].splitlines()[-1]
+
+def test_personal_pick_count_follows_the_candidates_sent():
+    assert _last_line(build_personal_prompt({}, _candidates(10))) == "Pick the 10 best candidates."
+    assert _last_line(build_personal_prompt({}, _candidates(10), count=5)) == "Pick the 5 best candidates."
+    assert _last_line(build_personal_prompt({}, _candidates(3), count=5)) == "Pick the 3 best candidates."
+
+def test_group_pick_range_is_capped():
+    profiles = [{"user_id": "a"}, {"user_id": "b"}]
+    assert _last_line(build_group_prompt(profiles, _candidates(15))) == "Pick 7-10 candidates."
+    assert _last_line(build_group_prompt(profiles, _candidates(8))) == "Pick 7-8 candidates."
+    assert _last_line(build_group_prompt(profiles, _candidates(4))) == "Pick 4 candidates."
+
+def test_pick_count_tracks_budget_trimming(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_PROMPT_TOKEN_BUDGET", 250)
+    monkeypatch.setattr(settings, "LLM_PROMPT_MIN_CANDIDATES", 2)
+    prompt = build_personal_prompt({}, _candidates(20))
+    assert len(prompt.movies) < 20
+    assert _last_line(prompt) == f"Pick the {len(prompt.movies)} best candidates."
+
+def test_expand_maps_ids_back_and_drops_unknown_ones():
+    prompt = build_group_prompt([{"user_id": "a"}, {"user_id": "b"}], _candidates(3))
+    result = prompt.expand({"r": [{"i": 2, "s": 0.9, "why": "fun", "u": [2, 5]}, {"i": 9, "s": 0.5}]})
+    assert result["recommendations"] == [
+        {"tmdb_id": 2, "title": "Movie 2", "poster_path": None, "group_score": 0.9, "reasons": ["fun"], "participants_who_liked": ["b"]},
+    ]
+
+def test_trim_text_cuts_at_a_word():
+    assert trim_text("one two three", 9) == "one two…"
+    assert trim_text("  one   two ", 20) == "one two"
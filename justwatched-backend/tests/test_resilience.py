@@ -0,0 +1,79 @@
+import asyncio
+import time
+import fakeredis
+import pytest
+from app.core.resilience import CircuitBreaker, RateLimitTimeout, RetryBudget, TokenBucket, parse_retry_after
+
+class BrokenRedis:
+    def eval(self, *args):
+        raise ConnectionError("redis down")
+
+def test_token_bucket_allows_a_burst_then_makes_callers_wait():
+    bucket = TokenBucket("test", rate=10, capacity=3, redis=fakeredis.FakeRedis())
+    assert [bucket.try_take() for _ in range(3)] == [0, 0, 0]
+    assert 0 < bucket.try_take() <= 0.1
+
+def test_token_bucket_is_shared_through_redis():
+    redis = fakeredis.FakeRedis()
+    api, worker = TokenBucket("shared", rate=1, capacity=2, redis=redis), TokenBucket("shared", rate=1, capacity=2, redis=redis)
+    assert (api.try_take(), worker.try_take()) == (0, 0)
+    assert api.try_take() > 0 and worker.try_take() > 0
+
+def test_token_bucket_falls_back_to_a_local_bucket():
+    bucket = TokenBucket("test", rate=10, capacity=2, redis=BrokenRedis())
+    assert [bucket.try_take() for _ in range(2)] == [0, 0]
+    assert 0 < bucket.try_take() <= 0.1
+
+def test_token_bucket_acquire_gives_up_after_max_wait():
+    bucket = TokenBucket("test", rate=1, capacity=1, redis=fakeredis.FakeRedis())
+    asyncio.run(bucket.acquire(max_wait=0.1))
+    with pytest.raises(RateLimitTimeout):
+        asyncio.run(bucket.acquire(max_wait=0.1))
+
+def test_circuit_breaker_opens_then_allows_one_trial(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=10)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    now[0] += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() and not breaker.allow()
+    # A failed trial reopens the circuit at once
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+
+def test_circuit_breaker_unblocks_after_a_lost_trial(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    now[0] += 10
+    assert breaker.allow()
+    # The trial never reports back (e.g. it was cancelled)
+    now[0] += 10
+    assert breaker.allow()
+
+def test_retry_budget_limits_attempts_and_total_delay():
+    budget = RetryBudget(max_retries=3, base_delay=0.5, max_delay=4, max_delay_total=100)
+    delays = [budget.next_delay() for _ in range(4)]
+    assert all(0 <= d <= 0.5 * 2 ** i for i, d in enumerate(delays[:3]))
+    assert delays[3] is None
+
+    budget = RetryBudget(max_retries=5, base_delay=0.5, max_delay=4, max_delay_total=3)
+    assert budget.next_delay("2") == 2
+    assert budget.next_delay("2") is None
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,45 @@
+import asyncio
+from app.core.deadline import deadline_scope, time_left
+from app.crud import review_crud
+from app.crud.review_crud import ReviewCRUD
+
+class RecordingTasteStats:
+    def __init__(self):
+        self.calls = []
+
+    async def review_changed(self, user_id, old_review, new_review):
+        # The first update is the slowest, so a later one could overtake it
+        await asyncio.sleep(0.05 if new_review and not old_review else 0)
+        self.calls.append((user_id, old_review and old_review["review_id"], new_review and new_review["review_id"], time_left()))
+
+def test_taste_stats_updates_run_in_background_and_in_order():
+    crud = ReviewCRUD()
+    crud._taste_stats = RecordingTasteStats()
+
+    async def write_reviews():
+        with deadline_scope(5):
+            crud._schedule_taste_stats("u1", None, {"review_id": "r1"})
+            crud._schedule_taste_stats("u1", {"review_id": "r1"}, None)
+        # Scheduling returns at once; the updates are still pending
+        assert crud._taste_stats.calls == []
+        await asyncio.gather(*review_crud._taste_stats_updates.values())
+
+    asyncio.run(write_reviews())
+    assert [call[:3] for call in crud._taste_stats.calls] == [("u1", None, "r1"), ("u1", "r1", None)]
+    # Background updates are not cut off by the request's deadline
+    assert [call[3] for call in crud._taste_stats.calls] == [None, None]
+    assert review_crud._taste_stats_updates == {}
+
+def test_taste_stats_failures_do_not_escape():
+    class FailingTasteStats:
+        async def review_changed(self, *args):
+            raise RuntimeError("TMDB down")
+
+    crud = ReviewCRUD()
+    crud._taste_stats = FailingTasteStats()
+
+    async def write_review():
+        crud._schedule_taste_stats("u2", None, {"review_id": "r2"})
+        await asyncio.gather(*review_crud._taste_stats_updates.values())
+
+    asyncio.run(write_review())
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from app.services.similarity_index import (
+    SimilarityIndex, build_similarity_matrix, document_terms, save_similarity_index, top_rated_movie_ids,
+)
+
+DOCS = [
+    {"id": 1, "title": "Deep Space", "overview": "Astronauts drift through deep space after the station fails.", "genre_ids": [878], "keywords": ["space station"]},
+    {"id": 2, "title": "Orbit", "overview": "A lone astronaut repairs a failing space station in deep orbit.", "genre_ids": [878], "keywords": ["space station"]},
+    {"id": 3, "title": "Bake Off", "overview": "Two rival bakers compete at a village fair.", "genre_ids": [35], "keywords": ["baking"]},
+    {"id": 4, "title": "The Fair", "overview": "A village fair brings old rivals together over pies.", "genre_ids": [35, 10749], "keywords": []},
+    {"id": 5, "title": "", "overview": "", "genre_ids": [], "keywords": []},
+]
+
+@pytest.fixture
+def index(tmp_path):
+    ids, matrix, _ = build_similarity_matrix(DOCS)
+    path = str(tmp_path / "similarity.npz")
+    save_similarity_index(path, ids, matrix)
+    return SimilarityIndex(path)
+
+def test_stopwords_and_short_tokens_are_dropped():
+    assert document_terms({"overview": "The a of I"}) == {}
+    assert len(document_terms({"overview": "lonely robot", "genre_ids": [16]})) == 4  # 2 words, 1 bigram, 1 genre
+
+def test_rows_are_unit_length_and_empty_docs_are_skipped():
+    ids, matrix, _ = build_similarity_matrix(DOCS)
+    assert list(ids) == [1, 2, 3, 4]
+    assert np.allclose(np.sqrt(matrix.multiply(matrix).sum(axis=1)).A.ravel(), 1.0)
+
+def test_similar_movies(index):
+    neighbours = index.similar(1, limit=3)
+    assert neighbours[0][0] == 2
+    assert 1 not in [movie_id for movie_id, _ in neighbours]
+    assert all(0 < score <= 1 for _, score in neighbours)
+    assert index.similar(999) == []
+
+def test_similar_to_many_uses_the_weighted_centroid(index):
+    assert index.similar_to_many([3, 1], weights=[1.0, 0.01])[0][0] == 4
+    assert index.similar_to_many([3, 1], weights=[0.01, 1.0])[0][0] == 2
+    assert index.similar_to_many([999]) == []
+
+def test_top_rated_movie_ids():
+    reviews = [
+        {"media_id": "10", "rating": 4}, {"media_id": "11", "rating": 5}, {"media_id": "12", "rating": 2},
+        {"media_id": "13", "rating": 5, "media_type": "tv"}, {"media_id": "abc", "rating": 5},
+    ]
+    assert top_rated_movie_ids(reviews, limit=5) == [11, 10]
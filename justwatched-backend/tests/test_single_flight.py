@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+import fakeredis
+import pytest
+from app.core.config import settings
+from app.core.single_flight import SingleFlight
+
+class Interrupted(BaseException):
+    pass
+
+def test_concurrent_calls_share_one_run():
+    flight = SingleFlight("test", lock_ttl=5)
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return {"items": [1]}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(runs) == 1
+    assert results == [{"items": [1]}] * 5
+    # Followers get copies, not the leader's object
+    assert len({id(result) for result in results}) == 5
+
+def test_leader_errors_reach_followers():
+    flight = SingleFlight("test", lock_ttl=5)
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(main())] == [ValueError] * 3
+
+def test_cancelled_leader_hands_over_to_a_follower():
+    flight = SingleFlight("test", lock_ttl=5)
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "fresh"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("k", fetch)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    assert asyncio.run(main()) == ["fresh"] * 3
+    # The cancelled leader's run plus one run by the follower that took over
+    assert len(runs) == 2
+
+def test_cancelled_follower_leaves_the_leader_running():
+    flight = SingleFlight("test", lock_ttl=5)
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.005)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(main()) == "done"
+
+def test_sync_interrupted_leader_hands_over_to_a_follower():
+    flight = SingleFlight("test", lock_ttl=5)
+    leader_started = threading.Event()
+    runs = []
+    results = []
+
+    def leader_fn():
+        runs.append("leader")
+        leader_started.set()
+        time.sleep(0.05)
+        raise Interrupted()
+
+    def follower_fn():
+        runs.append("follower")
+        time.sleep(0.05)
+        return "fresh"
+
+    def lead():
+        with pytest.raises(Interrupted):
+            flight.do_sync("k", leader_fn)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    leader_started.wait()
+    followers = [threading.Thread(target=lambda: results.append(flight.do_sync("k", follower_fn))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    for thread in [leader, *followers]:
+        thread.join()
+    assert results == ["fresh"] * 3
+    assert runs == ["leader", "follower"]
+    assert flight._sync_calls == {}
+
+def test_distributed_follower_gets_the_published_result(monkeypatch):
+    monkeypatch.setattr(settings, "SINGLE_FLIGHT_POLL_INTERVAL", 0.005)
+    redis = fakeredis.FakeRedis()
+    # Two processes sharing one Redis
+    api, worker = SingleFlight("test", lock_ttl=5, redis=redis), SingleFlight("test", lock_ttl=5, redis=redis)
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return {"items": [1]}
+
+    async def main():
+        leader = asyncio.create_task(api.do("k", fetch, distributed=True))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(leader, worker.do("k", fetch, distributed=True))
+
+    assert asyncio.run(main()) == [{"items": [1]}] * 2
+    assert len(runs) == 1
+    # The leader released its lock
+    assert not redis.exists(api._lock_key("k"))
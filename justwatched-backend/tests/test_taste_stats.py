@@ -0,0 +1,71 @@
+import pytest
+from app.core.config import settings
+from app.services.taste_stats import (
+    _prune, _shift, apply_review, derive_profile, empty_stats, movie_features, retract_review, review_weight,
+)
+
+DAY = 86400
+NOW = 1_700_000_000.0
+DRAMA = {"genres": ["Drama"], "actors": ["A"], "directors": [], "eras": ["1990s"], "languages": ["en"]}
+HORROR = {"genres": ["Horror"], "actors": ["B"], "directors": [], "eras": ["1970s"], "languages": ["fr"]}
+
+def _review(review_id, rating, media_id="1", **fields):
+    return {"review_id": review_id, "media_id": media_id, "media_type": "movie", "rating": rating, **fields}
+
+def _stats():
+    stats = empty_stats()
+    stats["as_of"] = NOW
+    return stats
+
+def test_review_weight_is_signed_around_neutral():
+    assert review_weight(_review("r", 5)) == 1.0
+    assert review_weight(_review("r", 1)) == -1.0
+    assert review_weight(_review("r", None)) == settings.TASTE_STATS_UNRATED_WEIGHT
+    assert review_weight(_review("r", 5, status="watchlist")) == settings.TASTE_STATS_WATCHLIST_WEIGHT
+    assert review_weight(_review("r", 5, media_type="tv")) == 0.0
+
+def test_movie_features():
+    details = {
+        "genres": [{"name": "Drama"}], "release_date": "1994-09-23", "original_language": "en",
+        "credits": {"cast": [{"name": "A"}], "crew": [{"job": "Director", "name": "D"}, {"job": "Writer", "name": "W"}]},
+    }
+    assert movie_features(details) == {"genres": ["Drama"], "actors": ["A"], "directors": ["D"], "eras": ["1990s"], "languages": ["en"]}
+
+def test_apply_then_retract_leaves_nothing():
+    stats = _stats()
+    apply_review(stats, _review("r1", 5), DRAMA, NOW, at=NOW - 30 * DAY)
+    assert stats["histograms"]["genres"]["Drama"] == pytest.approx(0.5 ** (30 / settings.TASTE_STATS_HALF_LIFE_DAYS))
+    _shift(stats, NOW + 100 * DAY)
+    retract_review(stats, "r1", DRAMA, NOW + 100 * DAY)
+    _prune(stats)
+    assert stats["histograms"]["genres"] == {} and stats["applied"] == {}
+
+def test_scores_halve_every_half_life():
+    stats = _stats()
+    apply_review(stats, _review("r1", 5), DRAMA, NOW, at=NOW)
+    _shift(stats, NOW + settings.TASTE_STATS_HALF_LIFE_DAYS * DAY)
+    assert stats["histograms"]["genres"]["Drama"] == pytest.approx(0.5)
+
+def test_retracting_pruned_keys_leaves_no_stubs(monkeypatch):
+    monkeypatch.setattr(settings, "TASTE_STATS_MAX_FEATURES", 1)
+    stats = _stats()
+    apply_review(stats, _review("r1", 5), DRAMA, NOW, at=NOW)
+    apply_review(stats, _review("r2", 4, media_id="2"), HORROR, NOW, at=NOW)
+    _prune(stats)
+    assert stats["histograms"]["genres"] == {"Drama": 1.0}
+    retract_review(stats, "r2", HORROR, NOW)
+    retract_review(stats, "r1", DRAMA, NOW)
+    assert all(value == 0 for histogram in stats["histograms"].values() for value in histogram.values())
+    _prune(stats)
+    assert all(histogram == {} for histogram in stats["histograms"].values())
+
+def test_derive_profile():
+    stats = _stats()
+    apply_review(stats, _review("r1", 5), DRAMA, NOW, at=NOW)
+    apply_review(stats, _review("r2", 1, media_id="2"), HORROR, NOW, at=NOW)
+    profile = derive_profile(stats)
+    assert profile["favorite_genres"] == ["Drama"]
+    assert profile["favorite_actors"] == ["A"]
+    assert profile["preferred_era"] == "modern"
+    assert profile["preferred_language"] == "english"
+    assert profile["analysis_confidence"] == round(2 / 12, 2)
@@ -0,0 +1,46 @@
+import asyncio
+import fakeredis
+from app.services.tmdb_cache import TMDBResponseCache
+
+class BrokenRedis:
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("redis down")
+        return fail
+
+def test_entries_round_trip_through_both_tiers():
+    redis = fakeredis.FakeRedis()
+    writer, reader = TMDBResponseCache(redis=redis), TMDBResponseCache(redis=redis)
+
+    async def main():
+        await writer.set("k", 200, '{"id": 1}', "etag-1", ttl=60)
+        first = await reader.get("k")
+        second = await reader.get("k")
+        return first, second, await reader.get("missing")
+
+    first, second, missing = asyncio.run(main())
+    assert first["body"] == '{"id": 1}' and first["etag"] == "etag-1"
+    assert second == first and missing is None
+    stats = reader.stats()
+    assert (stats["redis_hits"], stats["local_hits"], stats["misses"]) == (1, 1, 1)
+
+def test_local_tier_is_bounded():
+    cache = TMDBResponseCache(max_entries=2, redis=fakeredis.FakeRedis())
+
+    async def main():
+        for key in ("a", "b", "c"):
+            await cache.set(key, 200, "{}", None, ttl=60)
+
+    asyncio.run(main())
+    assert list(cache._entries) == ["b", "c"] and cache.stats()["evictions"] == 1
+
+def test_redis_errors_degrade_to_misses():
+    cache = TMDBResponseCache(redis=BrokenRedis())
+
+    async def main():
+        await cache.set("k", 200, "{}", None, ttl=60)
+        cache.clear_local()
+        return await cache.get("k")
+
+    assert asyncio.run(main()) is None
+    assert cache.stats()["redis_errors"] == 2
@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+from app.core.config import settings
+from app.crud.catalog_crud import CatalogCRUD
+from app.services import tmdb_service as tmdb_module
+from app.services.tmdb_service import TMDBService
+
+def _details(movie_id, **fields):
+    return {"id": movie_id, "title": f"Movie {movie_id}", "overview": "A story.", "vote_average": 7.5,
+            "genres": [{"id": 18, "name": "Drama"}], **fields}
+
+def test_also_liked_skips_bare_catalog_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TMDB_CATALOG_ENABLED", True)
+    monkeypatch.setattr(tmdb_module, "similarity_index", SimpleNamespace(available=False))
+    monkeypatch.setattr(tmdb_module, "item_neighbours", SimpleNamespace(
+        available=True, also_liked=lambda movie_ids, limit: [(1, 0.9), (2, 0.8), (3, 0.7)]
+    ))
+    service = TMDBService()
+    service.catalog = CatalogCRUD(path=str(tmp_path / "catalog.db"))
+    fetched = []
+
+    async def details_bulk(movie_ids):
+        fetched.extend(movie_ids)
+        return {movie_id: _details(movie_id, adult=movie_id == 3) for movie_id in movie_ids}
+
+    monkeypatch.setattr(service, "get_movies_details_bulk", details_bulk)
+
+    async def main():
+        # 1 only has its export row; 2 has full details
+        await service.catalog.upsert_export_rows("movie", [{"id": 1, "original_title": "Film Un"}, {"id": 3, "adult": True}])
+        await service.catalog.upsert_movie(_details(2))
+        return await service.search_candidate_movies({}, seed_movie_ids=[99])
+
+    candidates = asyncio.run(main())
+    assert fetched == [1, 3]
+    assert [(movie["id"], movie["title"], movie["genre_ids"]) for movie in candidates] == [
+        (2, "Movie 2", [18]), (1, "Movie 1", [18])
+    ]
+
+def test_precomputed_lists_are_filled_to_full_size(monkeypatch):
+    import fakeredis
+    from app.services.movie_lists import MovieListStore
+    monkeypatch.setattr(tmdb_module, "movie_lists", MovieListStore(redis=fakeredis.FakeRedis()))
+    monkeypatch.setattr(settings, "MOVIE_LISTS_SIZE", 20)
+    service = TMDBService()
+    fetches = []
+
+    async def get(path, params=None, family=None):
+        fetches.append(path)
+        return {"results": [{"id": i} for i in range(30)]}
+
+    monkeypatch.setattr(service, "_get", get)
+
+    async def main():
+        first = await service.get_trending_movies(limit=5)
+        second = await service.get_trending_movies(limit=15)
+        longer = await service.get_trending_movies(limit=25)
+        return first, second, longer
+
+    first, second, longer = asyncio.run(main())
+    assert (len(first), len(second), len(longer)) == (5, 15, 25)
+    # The second call is served from the stored list; only the one longer than it goes live
+    assert len(fetches) == 2